@@ -1,32 +1,160 @@
 # Classe/Arquivo.py
 import hashlib
 import os
+import sys
+from datetime import datetime
+
+from .Metricas import contar, cronometrar
+
+TAMANHO_BLOCO = 65536  # Bloco de 64 KB
+
+
+def calcular_md5(caminho):
+    """Calcula o MD5 do conteúdo de `caminho` (propaga OSError)."""
+    hash_md5 = hashlib.md5()
+    with open(caminho, "rb") as f:
+        for chunk in iter(lambda: f.read(TAMANHO_BLOCO), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def calcular_impressao(caminho, tamanho_bloco=4096):
+    """
+    MD5 do primeiro, do bloco do meio e do último bloco do arquivo.
+    Arquivos com até 3 blocos são lidos inteiros, então a impressão
+    coincide com o MD5 completo.
+    """
+    hash_parcial = hashlib.md5()
+    with open(caminho, "rb") as f:
+        tamanho = os.fstat(f.fileno()).st_size
+        if tamanho <= 3 * tamanho_bloco:
+            hash_parcial.update(f.read())
+        else:
+            for inicio in (0, (tamanho - tamanho_bloco) // 2, tamanho - tamanho_bloco):
+                f.seek(inicio)
+                hash_parcial.update(f.read(tamanho_bloco))
+    return hash_parcial.hexdigest()
+
+
+def entra_em_duplicados(arquivo):
+    """
+    Regra única de quem pode ser duplicado (DetectorDuplicatas,
+    TabelaArquivos, GruposDuplicados e o índice SQLite): arquivo ainda
+    presente e com conteúdo. Vazios têm todos o mesmo MD5 e não desperdiçam
+    espaço.
+    """
+    return not arquivo.removido and bool(arquivo.tamanho)
+
+
+def formatar_data_ns(instante_ns):
+    """Data/hora local de um timestamp em nanossegundos ("-" quando não há)."""
+    if instante_ns is None:
+        return "-"
+    return datetime.fromtimestamp(instante_ns / 1e9).strftime("%d/%m/%Y %H:%M")
+
+
+def conferir_no_disco(item, caminho):
+    """
+    Para quem pediu explicitamente dados frescos: um stat de `caminho`
+    agora, trocando no dict `item` (um resultado de busca ou arquivo de um
+    grupo) tamanho, mtime_ns e modificacao pelos do disco. Marca "existe"
+    e muda "origem" para "disco".
+    """
+    item["origem"] = "disco"
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        item["existe"] = False
+        return item
+    item["existe"] = True
+    item["tamanho"] = st.st_size
+    item["mtime_ns"] = st.st_mtime_ns
+    item["modificacao"] = formatar_data_ns(st.st_mtime_ns)
+    return item
+
+
+def conferir_pagina(itens):
+    """conferir_no_disco de cada (item, caminho) de uma página, medido como uma etapa só."""
+    with cronometrar("conferir_disco"):
+        for item, caminho in itens:
+            conferir_no_disco(item, caminho)
+    contar("leitor_stat_total", len(itens), origem="conferir_disco")
+
 
 class Arquivo:
-    def __init__(self, nome: str, extensao: str, tamanho: int, caminho_completo: str = None):
+    # Sem __dict__: com milhões de arquivos na árvore, cada byte por instância conta
+    __slots__ = (
+        "nome", "extensao", "tamanho", "pasta", "_caminho",
+        "mtime_ns", "ctime_ns", "atime_ns", "inode", "dispositivo", "hash_md5", "removido",
+    )
+
+    def __init__(self, nome: str, extensao: str, tamanho: int, caminho_completo: str = None,
+                 mtime_ns: int = None, inode: int = None, dispositivo: int = None,
+                 ctime_ns: int = None, atime_ns: int = None):
         self.nome = nome
-        self.extensao = extensao
+        # Poucas extensões distintas repetidas milhões de vezes: uma string só para cada
+        self.extensao = sys.intern(extensao) if isinstance(extensao, str) else extensao
         self.tamanho = tamanho  # tamanho em bytes
-        self.caminho_completo = caminho_completo
+        # Pasta dona do arquivo (ver Pasta.adicionar_arquivo). Com ela o
+        # caminho completo é derivado; _caminho só guarda caminhos que não
+        # dá para derivar (ou de arquivos ainda fora de uma pasta)
+        self.pasta = None
+        self._caminho = caminho_completo
+        # Dados do stat da varredura (st_mtime_ns, st_ino, st_dev), usados
+        # para saber se o hash salvo ainda vale para o conteúdo atual e
+        # mostrados nas telas sem voltar ao disco. ctime/atime só quando a
+        # varredura foi configurada para guardá-los (ver Varredor)
+        self.mtime_ns = mtime_ns
+        self.ctime_ns = ctime_ns
+        self.atime_ns = atime_ns
+        self.inode = inode
+        self.dispositivo = dispositivo
         self.hash_md5 = None
         # Flag para indicar que o arquivo foi removido do disco mas permanece no cache
         self.removido = False
 
+    @property
+    def nome_arquivo(self):
+        """Nome com extensão, como aparece no disco."""
+        return f"{self.nome}.{self.extensao}" if self.extensao else self.nome
+
+    @property
+    def caminho_completo(self):
+        if self._caminho is not None:
+            return self._caminho
+        if self.pasta is None:
+            return None
+        return os.path.join(self.pasta.caminho_completo, self.nome_arquivo)
+
+    @caminho_completo.setter
+    def caminho_completo(self, valor):
+        self._caminho = valor
+
     def _calcular_hash(self):
         """Calcula o hash MD5 do arquivo baseado no seu conteúdo"""
         try:
-            hash_md5 = hashlib.md5()
             if not self.caminho_completo or not os.path.exists(self.caminho_completo):
                 self.hash_md5 = None
                 return
-            with open(self.caminho_completo, "rb") as f:
-                for chunk in iter(lambda: f.read(65536), b""):  # Bloco de 64 KB
-                    hash_md5.update(chunk)
-            self.hash_md5 = hash_md5.hexdigest()
+            self.hash_md5 = calcular_md5(self.caminho_completo)
         except Exception as e:
             print(f"Erro ao calcular hash de {self.caminho_completo}: {e}")
             self.hash_md5 = None
 
+    @property
+    def modificacao(self):
+        """Data da última modificação registrada na varredura (sem stat)."""
+        return formatar_data_ns(self.mtime_ns)
+
+    def mesma_versao(self, outro_arquivo):
+        """
+        True se `outro_arquivo` descreve a mesma versão deste arquivo, ou seja,
+        se o tamanho e o mtime batem. Sem mtime registrado não dá para afirmar.
+        """
+        if self.mtime_ns is None or outro_arquivo.mtime_ns is None:
+            return False
+        return self.tamanho == outro_arquivo.tamanho and self.mtime_ns == outro_arquivo.mtime_ns
+
     def comparar_byte_a_byte(self, outro_arquivo):
         """Compara dois arquivos byte a byte, retornando cedo na primeira diferença"""
         if self.tamanho != outro_arquivo.tamanho:
@@ -52,8 +180,25 @@ class Arquivo:
     # Métodos de serialização / cache
     # ================================
 
-    def to_dict(self):
-        """Converte o objeto em dicionário para salvar no cache"""
+    def to_dict(self, compacto=False):
+        """
+        Converte o objeto em dicionário para salvar no cache. No modo
+        compacto ficam de fora o caminho derivável da pasta e os campos vazios.
+        """
+        if compacto:
+            dados = {"nome": self.nome, "extensao": self.extensao, "tamanho": self.tamanho}
+            if self._caminho is not None:
+                dados["caminho_completo"] = self._caminho
+            if self.hash_md5:
+                dados["hash_md5"] = self.hash_md5
+            if self.removido:
+                dados["removido"] = True
+            for chave in ("mtime_ns", "ctime_ns", "atime_ns", "inode", "dispositivo"):
+                valor = getattr(self, chave)
+                if valor is not None:
+                    dados[chave] = valor
+            return dados
+
         return {
             "nome": self.nome,
             "extensao": self.extensao,
@@ -61,6 +206,11 @@ class Arquivo:
             "hash_md5": self.hash_md5,
             "caminho_completo": self.caminho_completo,
             "removido": self.removido,
+            "mtime_ns": self.mtime_ns,
+            "ctime_ns": self.ctime_ns,
+            "atime_ns": self.atime_ns,
+            "inode": self.inode,
+            "dispositivo": self.dispositivo,
         }
 
     @classmethod
@@ -70,7 +220,12 @@ class Arquivo:
             nome=data["nome"],
             extensao=data["extensao"],
             tamanho=data["tamanho"],
-            caminho_completo=data.get("caminho_completo")
+            caminho_completo=data.get("caminho_completo"),
+            mtime_ns=data.get("mtime_ns"),
+            inode=data.get("inode"),
+            dispositivo=data.get("dispositivo"),
+            ctime_ns=data.get("ctime_ns"),
+            atime_ns=data.get("atime_ns"),
         )
         arquivo.hash_md5 = data.get("hash_md5")
         arquivo.removido = data.get("removido", False)
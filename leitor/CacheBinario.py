@@ -0,0 +1,352 @@
+# CacheBinario.py
+import gc
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import weakref
+from array import array
+
+from .Arquivo import Arquivo
+from .Pasta import Pasta
+from .utils_serializacao import gravacao_atomica
+
+# Formato do Cache/cache.bin (little-endian, seções alinhadas em 8 bytes):
+#
+#   cabeçalho      MAGICO, versão, quantidades e o offset de cada seção
+#   arquivos       um registro de tamanho fixo por arquivo, agrupados por
+#                  pasta na ordem das pastas
+#   pastas         um registro por pasta em pré-ordem (a pai vem antes),
+#                  com o intervalo dos seus arquivos e os totais da subárvore
+#   textos         offsets (Q) + bytes UTF-8 de nomes, extensões e caminhos,
+#                  cada texto guardado uma vez só
+#   meta           JSON dos metadados (data, caminho_raiz, ...)
+#
+# Na carga só as pastas viram objetos; os arquivos de cada pasta são
+# decodificados do mmap na primeira vez que alguém lê pasta.arquivos.
+
+MAGICO = b"LEITORBN"
+VERSAO = 2
+
+CABECALHO = struct.Struct("<8sHHIQQQQQQQQ")
+# tamanho, mtime_ns, ctime_ns, atime_ns, inode, dispositivo, nome, extensao, caminho, pasta, hash, flags
+REGISTRO_ARQUIVO = struct.Struct("<qqqqQQIIII16sB7x")
+# Versão 1 (sem ctime/atime), ainda lida até a próxima gravação
+REGISTRO_ARQUIVO_V1 = struct.Struct("<qqQQIIII16sB7x")
+# pai, caminho, primeiro_arquivo, n_arquivos, total_subpastas, tamanho_total, total_arquivos
+REGISTRO_PASTA = struct.Struct("<iIQIIqQ")
+
+SEM_TEXTO = 0xFFFFFFFF
+
+REMOVIDO = 1
+TEM_HASH = 2
+HASH_TEXTO = 4  # hash fora do formato MD5 hexadecimal, guardado na tabela de textos
+TEM_MTIME = 8
+TEM_INODE = 16
+TEM_DISPOSITIVO = 32
+TEM_CTIME = 64
+TEM_ATIME = 128
+
+_ZEROS = bytes(8)
+
+
+def _alinhar(f):
+    resto = f.tell() % 8
+    if resto:
+        f.write(_ZEROS[resto:])
+
+
+class CacheBinario:
+    """Leitor do cache.bin via mmap (ver o formato acima) e a gravação dele."""
+
+    # Leitores ainda com o arquivo mapeado (ver liberar)
+    _abertos = weakref.WeakSet()
+
+    def __init__(self, caminho):
+        self.caminho = os.fspath(caminho)
+        with open(self.caminho, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magico, versao, _, self.n_pastas, self.n_arquivos, self.n_textos,
+             self._off_arquivos, self._off_pastas, self._off_indices, self._off_textos,
+             self._off_meta, self._tam_meta) = CABECALHO.unpack_from(self._mm, 0)
+            if magico != MAGICO:
+                raise ValueError(f"{self.caminho} não é um cache binário.")
+            if versao not in (1, VERSAO):
+                raise ValueError(f"Cache binário versão {versao}; esperada {VERSAO}.")
+            self._registro = REGISTRO_ARQUIVO if versao == VERSAO else REGISTRO_ARQUIVO_V1
+            self._indices = memoryview(self._mm)[
+                self._off_indices:self._off_indices + 8 * (self.n_textos + 1)
+            ].cast("Q")
+        except Exception:
+            self._mm.close()
+            raise
+        self._trava = threading.Lock()
+        self._pastas = []
+        self._extensoes = {}  # código -> extensão já decodificada
+        self._pendentes = 0
+        CacheBinario._abertos.add(self)
+
+    @staticmethod
+    def reconhece(caminho):
+        """True se `caminho` existe e começa com o MAGICO do formato."""
+        try:
+            with open(caminho, "rb") as f:
+                return f.read(len(MAGICO)) == MAGICO
+        except OSError:
+            return False
+
+    # ================================
+    # Leitura
+    # ================================
+
+    def texto(self, i):
+        if i == SEM_TEXTO:
+            return None
+        base = self._off_textos
+        return str(self._mm[base + self._indices[i]:base + self._indices[i + 1]], "utf-8", "surrogateescape")
+
+    def meta(self):
+        return json.loads(self._mm[self._off_meta:self._off_meta + self._tam_meta])
+
+    def carregar(self):
+        """
+        (raiz, meta) com as pastas já montadas e os totais preenchidos; os
+        arquivos ficam no mmap até serem lidos.
+        """
+        meta = self.meta()
+        if not self.n_pastas:
+            self.fechar()
+            return None, meta
+
+        pastas = self._pastas
+        fim = self._off_pastas + REGISTRO_PASTA.size * self.n_pastas
+        for pai, caminho, primeiro, n_arquivos, total_subpastas, tamanho_total, total_arquivos in (
+            REGISTRO_PASTA.iter_unpack(self._mm[self._off_pastas:fim])
+        ):
+            pasta = Pasta(self.texto(caminho), ler_conteudo=False)
+            pasta.tamanho_total = tamanho_total
+            pasta.total_arquivos = total_arquivos
+            pasta.total_subpastas = total_subpastas
+            if n_arquivos:
+                pasta._origem = (self, primeiro, n_arquivos)
+                self._pendentes += 1
+            pastas.append(pasta)
+
+            if pai >= 0:
+                pastas[pai].adicionar_subpasta(pasta)
+
+        if not self._pendentes:
+            self.fechar()
+        return pastas[0], meta
+
+    def carregar_arquivos(self, pasta):
+        """Decodifica os arquivos pendentes de `pasta` (chamado por Pasta.arquivos)."""
+        with self._trava:
+            if pasta._origem is None:  # outra thread chegou antes
+                return
+            _, primeiro, quantidade = pasta._origem
+            if self._mm is None:
+                raise ValueError(f"O cache binário {self.caminho} já foi fechado.")
+
+            inicio = self._off_arquivos + self._registro.size * primeiro
+            fim = inicio + self._registro.size * quantidade
+            # Os objetos novos vivem tanto quanto a árvore (cada arquivo.pasta
+            # aponta de volta para a pasta, um ciclo que fica para o coletor
+            # quando a árvore sai de uso); com o coletor parado durante a
+            # decodificação, as coletas disparadas pelas alocações não
+            # percorrem de novo milhões de objetos recém-criados
+            coletor_ligado = gc.isenabled()
+            gc.disable()
+            try:
+                arquivos = self._decodificar(pasta, self._mm[inicio:fim])
+            finally:
+                if coletor_ligado:
+                    gc.enable()
+
+            pasta._arquivos[:0] = arquivos
+            pasta._origem = None
+            self._pendentes -= 1
+            if not self._pendentes:
+                self._fechar()
+
+    def _decodificar(self, pasta, registros):
+        texto = self.texto
+        extensoes = self._extensoes
+        novo = Arquivo.__new__
+        arquivos = []
+        linhas = self._registro.iter_unpack(registros)
+        if self._registro is REGISTRO_ARQUIVO_V1:
+            # A v1 não tinha ctime/atime nem os bits deles nas flags
+            linhas = (
+                (tamanho, mtime_ns, 0, 0, *resto[:-1], resto[-1] & ~(TEM_CTIME | TEM_ATIME))
+                for tamanho, mtime_ns, *resto in linhas
+            )
+        for (tamanho, mtime_ns, ctime_ns, atime_ns, inode, dispositivo, nome, extensao, caminho,
+             _, hash_bruto, flags) in linhas:
+            # Mesmo estado que Arquivo.__init__ deixaria, sem passar por ele
+            arquivo = novo(Arquivo)
+            arquivo.nome = texto(nome)
+            ext = extensoes.get(extensao, extensoes)
+            if ext is extensoes:
+                ext = texto(extensao)
+                ext = extensoes[extensao] = sys.intern(ext) if ext is not None else None
+            arquivo.extensao = ext
+            arquivo.tamanho = tamanho
+            arquivo.pasta = pasta
+            arquivo._caminho = None if caminho == SEM_TEXTO else texto(caminho)
+            arquivo.mtime_ns = mtime_ns if flags & TEM_MTIME else None
+            arquivo.ctime_ns = ctime_ns if flags & TEM_CTIME else None
+            arquivo.atime_ns = atime_ns if flags & TEM_ATIME else None
+            arquivo.inode = inode if flags & TEM_INODE else None
+            arquivo.dispositivo = dispositivo if flags & TEM_DISPOSITIVO else None
+            if flags & HASH_TEXTO:
+                arquivo.hash_md5 = texto(int.from_bytes(hash_bruto[:4], "little"))
+            elif flags & TEM_HASH:
+                arquivo.hash_md5 = hash_bruto.hex()
+            else:
+                arquivo.hash_md5 = None
+            arquivo.removido = bool(flags & REMOVIDO)
+            arquivos.append(arquivo)
+        return arquivos
+
+    def fechar(self):
+        with self._trava:
+            self._fechar()
+
+    def _fechar(self):
+        if self._mm is not None:
+            self._indices.release()
+            self._mm.close()
+            self._mm = None
+        self._pastas = []
+        CacheBinario._abertos.discard(self)
+
+    @classmethod
+    def liberar(cls, caminho):
+        """
+        No Windows não dá para substituir um arquivo mapeado: antes de
+        regravar `caminho`, decodifica o que falta das árvores que ainda
+        leem dele e fecha o mapeamento.
+        """
+        if os.name != "nt":
+            return
+        caminho = os.path.abspath(caminho)
+        for leitor in list(cls._abertos):
+            if os.path.abspath(leitor.caminho) == caminho:
+                for pasta in list(leitor._pastas):
+                    if pasta._origem is not None:
+                        leitor.carregar_arquivos(pasta)
+                leitor.fechar()
+
+    # ================================
+    # Escrita
+    # ================================
+
+    @classmethod
+    def escrever(cls, caminho, raiz, meta=None):
+        """Grava `raiz` e `meta` em `caminho` no formato binário (troca atômica do arquivo)."""
+        caminho = os.fspath(caminho)
+        cls.liberar(caminho)
+
+        textos = {}
+        dados_textos = bytearray()
+        indices = array("Q", [0])
+
+        def codigo(valor):
+            if valor is None:
+                return SEM_TEXTO
+            i = textos.get(valor)
+            if i is None:
+                i = textos[valor] = len(indices) - 1
+                dados_textos.extend(valor.encode("utf-8", "surrogateescape"))
+                indices.append(len(dados_textos))
+            return i
+
+        # [pai, caminho, primeiro, n_arquivos, total_subpastas, tamanho_total, total_arquivos]
+        registros_pastas = []
+        n_arquivos = 0
+        with gravacao_atomica(caminho, "wb") as f:
+            f.write(bytes(CABECALHO.size))
+            _alinhar(f)
+            off_arquivos = f.tell()
+
+            pilha = [(raiz, -1)]
+            while pilha:
+                pasta, pai = pilha.pop()
+                pasta_id = len(registros_pastas)
+                arquivos = pasta.arquivos
+                tamanho = 0
+                lote = []
+                for arq in arquivos:
+                    lote.append(cls._registro_arquivo(arq, pasta_id, codigo))
+                    tamanho += arq.tamanho or 0
+                f.write(b"".join(lote))
+                registros_pastas.append(
+                    [pai, codigo(pasta.caminho_completo), n_arquivos, len(arquivos), 0, tamanho, len(arquivos)]
+                )
+                n_arquivos += len(arquivos)
+
+                filhos = []
+                atual = pasta.subpastas
+                while atual:
+                    filhos.append((atual.pasta, pasta_id))
+                    atual = atual.proximo
+                pilha.extend(reversed(filhos))
+
+            # Totais da subárvore: em pré-ordem, as filhas vêm depois da pai
+            for registro in reversed(registros_pastas[1:]):
+                pai = registros_pastas[registro[0]]
+                pai[4] += 1 + registro[4]
+                pai[5] += registro[5]
+                pai[6] += registro[6]
+
+            off_pastas = f.tell()
+            f.write(b"".join(REGISTRO_PASTA.pack(*registro) for registro in registros_pastas))
+            _alinhar(f)
+            off_indices = f.tell()
+            f.write(indices.tobytes())
+            off_textos = f.tell()
+            f.write(dados_textos)
+            off_meta = f.tell()
+            meta_json = json.dumps(meta or {}, ensure_ascii=False).encode("utf-8")
+            f.write(meta_json)
+
+            f.seek(0)
+            f.write(CABECALHO.pack(
+                MAGICO, VERSAO, 0, len(registros_pastas), n_arquivos, len(indices) - 1,
+                off_arquivos, off_pastas, off_indices, off_textos, off_meta, len(meta_json),
+            ))
+
+    @staticmethod
+    def _registro_arquivo(arq, pasta_id, codigo):
+        flags = REMOVIDO if arq.removido else 0
+        hash_bruto = b""
+        if arq.hash_md5:
+            try:
+                hash_bruto = bytes.fromhex(arq.hash_md5)
+            except ValueError:
+                pass
+            if len(hash_bruto) == 16 and hash_bruto.hex() == arq.hash_md5:
+                flags |= TEM_HASH
+            else:
+                flags |= TEM_HASH | HASH_TEXTO
+                hash_bruto = codigo(arq.hash_md5).to_bytes(4, "little")
+        if arq.mtime_ns is not None:
+            flags |= TEM_MTIME
+        if arq.ctime_ns is not None:
+            flags |= TEM_CTIME
+        if arq.atime_ns is not None:
+            flags |= TEM_ATIME
+        if arq.inode is not None:
+            flags |= TEM_INODE
+        if arq.dispositivo is not None:
+            flags |= TEM_DISPOSITIVO
+        return REGISTRO_ARQUIVO.pack(
+            arq.tamanho or 0, arq.mtime_ns or 0, arq.ctime_ns or 0, arq.atime_ns or 0,
+            arq.inode or 0, arq.dispositivo or 0,
+            codigo(arq.nome), codigo(arq.extensao), codigo(arq._caminho), pasta_id,
+            hash_bruto, flags,
+        )
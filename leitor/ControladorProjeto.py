@@ -11,7 +11,7 @@ class ControladorProjeto:
         self.manipulador.mostrar()
         print("\nDeseja verificar arquivos duplicados? (s/n): ", end="")
         if input().lower() in ['s', 'y', 'sim']:
-            self.manipulador.detectar_duplicatas()
+            self.manipulador.detectar_duplicatas(listar=True)
         while True:
             print("\nDeseja buscar algo? (s/n): ", end="")
             if input().lower() not in ['s', 'y', 'sim']:
@@ -0,0 +1,147 @@
+# DetectorDuplicatas.py
+from collections import defaultdict
+from functools import partial
+
+from .Arquivo import calcular_impressao, entra_em_duplicados
+from .Metricas import cronometrar
+from .MotorHash import MotorHash
+
+TAMANHO_BLOCO_IMPRESSAO = 4096  # 4 KB do início, do meio e do fim
+
+
+class DetectorDuplicatas:
+    """
+    Pipeline em etapas para encontrar duplicados lendo o mínimo possível:
+
+    1. agrupa por tamanho (descarta tamanhos únicos e arquivos vazios);
+    2. calcula uma impressão com o primeiro, o bloco do meio e o último bloco;
+    3. calcula o MD5 completo só de quem colidiu na impressão;
+    4. (opcional) confirma cada grupo com Arquivo.comparar_byte_a_byte.
+    """
+
+    def __init__(self, motor=None, tamanho_bloco=TAMANHO_BLOCO_IMPRESSAO,
+                 comparar_bytes=False, recalcular=False):
+        self.motor = motor or MotorHash()
+        self.tamanho_bloco = tamanho_bloco
+        self.comparar_bytes = comparar_bytes
+        self.recalcular = recalcular  # ignora hashes já presentes nos candidatos
+        self.estatisticas = {}
+
+    def detectar(self, arquivos):
+        """
+        Recebe (caminho_pasta, Arquivo), como os de Pasta.iter_arquivos()
+        (basta uma passada), preenche `hash_md5` dos candidatos e devolve
+        uma lista de (tamanho, hash_md5, [(caminho_pasta, Arquivo), ...]).
+        """
+        with cronometrar("duplicados"):
+            return self._detectar(arquivos)
+
+    def _detectar(self, arquivos):
+        stats = self.estatisticas = {
+            "arquivos": 0,
+            "candidatos_tamanho": 0,
+            "candidatos_impressao": 0,
+            "bytes_lidos_impressao": 0,
+            "bytes_lidos_hash": 0,
+            "hashes_calculados": 0,
+            "grupos": 0,
+        }
+
+        # 1. Tamanho
+        por_tamanho = defaultdict(list)
+        for caminho_pasta, arquivo in arquivos:
+            stats["arquivos"] += 1
+            if not entra_em_duplicados(arquivo) or not arquivo.caminho_completo:
+                continue
+            por_tamanho[arquivo.tamanho].append((caminho_pasta, arquivo))
+
+        candidatos = [item for grupo in por_tamanho.values() if len(grupo) > 1 for item in grupo]
+        stats["candidatos_tamanho"] = len(candidatos)
+        if not candidatos:
+            self._resumir()
+            return []
+
+        # 2. Impressão parcial (início, meio e fim)
+        self._etapa("impressão parcial")
+        limite_inteiro = 3 * self.tamanho_bloco
+        resultados = self.motor.mapear(
+            [arquivo for _, arquivo in candidatos],
+            partial(calcular_impressao, tamanho_bloco=self.tamanho_bloco),
+            custo=lambda arquivo: min(arquivo.tamanho, limite_inteiro),
+        )
+        impressoes = {id(arquivo): valor for arquivo, valor in resultados}
+        stats["bytes_lidos_impressao"] = self.motor.estatisticas.bytes
+
+        por_impressao = defaultdict(list)
+        for caminho_pasta, arquivo in candidatos:
+            impressao = impressoes.get(id(arquivo))
+            if impressao is None:
+                continue
+            por_impressao[(arquivo.tamanho, impressao)].append((caminho_pasta, arquivo))
+
+        colidiram = [grupo for grupo in por_impressao.values() if len(grupo) > 1]
+        stats["candidatos_impressao"] = sum(len(grupo) for grupo in colidiram)
+
+        # 3. MD5 completo só para quem colidiu. Em arquivos de até 3 blocos a
+        # impressão já cobre o conteúdo inteiro e vale como MD5.
+        precisa_hash = []
+        for (tamanho, impressao), grupo in por_impressao.items():
+            if len(grupo) < 2:
+                continue
+            for _, arquivo in grupo:
+                if tamanho <= limite_inteiro:
+                    arquivo.hash_md5 = impressao
+                    stats["hashes_calculados"] += 1
+                elif self.recalcular or not arquivo.hash_md5:
+                    precisa_hash.append(arquivo)
+
+        if precisa_hash:
+            self._etapa("hash MD5")
+            self.motor.calcular(precisa_hash, somente_sem_hash=False)
+            stats["bytes_lidos_hash"] = self.motor.estatisticas.bytes
+            stats["hashes_calculados"] += self.motor.estatisticas.arquivos
+
+        por_hash = defaultdict(list)
+        for grupo in colidiram:
+            for caminho_pasta, arquivo in grupo:
+                if arquivo.hash_md5:
+                    por_hash[(arquivo.tamanho, arquivo.hash_md5)].append((caminho_pasta, arquivo))
+
+        duplicatas = []
+        for (tamanho, hash_value), grupo in por_hash.items():
+            if len(grupo) < 2:
+                continue
+            # 4. Confirmação byte a byte (opcional)
+            subgrupos = self._confirmar_bytes(grupo) if self.comparar_bytes else [grupo]
+            for subgrupo in subgrupos:
+                if len(subgrupo) > 1:
+                    duplicatas.append((tamanho, hash_value, subgrupo))
+
+        stats["grupos"] = len(duplicatas)
+        self._resumir()
+        return duplicatas
+
+    def _etapa(self, nome):
+        if self.motor.progresso is not None:
+            self.motor.progresso.iniciar_etapa(nome)
+
+    def _confirmar_bytes(self, grupo):
+        """Separa o grupo em subgrupos cujo conteúdo é idêntico byte a byte."""
+        subgrupos = []
+        for item in grupo:
+            for subgrupo in subgrupos:
+                if subgrupo[0][1].comparar_byte_a_byte(item[1]):
+                    subgrupo.append(item)
+                    break
+            else:
+                subgrupos.append([item])
+        return subgrupos
+
+    def _resumir(self):
+        s = self.estatisticas
+        lidos = (s["bytes_lidos_impressao"] + s["bytes_lidos_hash"]) / (1024 * 1024)
+        print(
+            f"🧮 Duplicados: {s['arquivos']} arquivos → {s['candidatos_tamanho']} por tamanho "
+            f"→ {s['candidatos_impressao']} por impressão → {s['grupos']} grupos "
+            f"({lidos:.1f} MB lidos)"
+        )
@@ -0,0 +1,80 @@
+# DiarioAlteracoes.py
+import json
+import os
+
+from .utils_serializacao import gravacao_atomica
+
+VERSAO_DIARIO = 1
+
+
+class DiarioAlteracoes:
+    """
+    Alterações pontuais do cache (lotes do Observador) feitas desde a última
+    gravação completa, para um lote não precisar regravar o cache inteiro.
+    Arquivo de linhas JSON ao lado do cache (alteracoes.jsonl):
+
+        {"versao": 1, "base": [...]}            cabeçalho
+        {"meta": {...}, "pastas": [...], "arquivos": [[caminho_pasta, {...}], ...]}
+        ...                                     um lote por linha
+
+    `base` é a assinatura do cache sobre o qual as linhas se aplicam (ver
+    utils_cache._assinatura_base): a próxima gravação completa muda a
+    assinatura e o diário antigo deixa de valer, e é apagado. Cada lote
+    guarda o estado final dos arquivos que mudou (Arquivo.to_dict compacto),
+    então reaplicar uma linha é idempotente.
+
+    Quem anexa segura a trava do cache (utils_cache.trava_cache). Quem lê
+    não trava: uma linha ainda sem o "\\n" final é de um lote sendo gravado e
+    fica para a próxima leitura.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = os.fspath(caminho)
+
+    def tamanho(self):
+        """Tamanho do arquivo em bytes (0 se não existe)."""
+        try:
+            return os.stat(self.caminho).st_size
+        except OSError:
+            return 0
+
+    def ler(self, base, desde=0):
+        """
+        (lotes, posição) das linhas completas a partir do byte `desde`; a
+        posição é onde a próxima leitura deve continuar. (None, 0) se não
+        há diário ou ele é de outra `base`.
+        """
+        try:
+            with open(self.caminho, "rb") as f:
+                cabecalho = json.loads(f.readline())
+                if cabecalho.get("versao") != VERSAO_DIARIO or cabecalho.get("base") != list(base):
+                    return None, 0
+                if desde > f.tell():
+                    f.seek(desde)
+                inicio = f.tell()
+                dados = f.read()
+        except (OSError, ValueError):
+            return None, 0
+
+        completo = dados.rfind(b"\n") + 1
+        lotes = [json.loads(linha) for linha in dados[:completo].splitlines() if linha]
+        return lotes, inicio + completo
+
+    def anexar(self, base, lote):
+        """Acrescenta `lote` ao diário de `base` (recomeçando o arquivo se ele for de outra base). Devolve o tamanho final."""
+        # ASCII puro: nomes que não são UTF-8 válido voltam intactos (\udcxx)
+        linha = json.dumps(lote, separators=(",", ":")) + "\n"
+        if self.ler(base, desde=self.tamanho())[0] is None:
+            with gravacao_atomica(self.caminho, "w", encoding="ascii") as f:
+                f.write(json.dumps({"versao": VERSAO_DIARIO, "base": list(base)}) + "\n")
+                f.write(linha)
+        else:
+            with open(self.caminho, "a", encoding="ascii") as f:
+                f.write(linha)
+        return self.tamanho()
+
+    def apagar(self):
+        try:
+            os.remove(self.caminho)
+        except FileNotFoundError:
+            pass
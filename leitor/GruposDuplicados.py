@@ -0,0 +1,213 @@
+# GruposDuplicados.py
+import json
+import os
+import threading
+from array import array
+
+from .Arquivo import conferir_pagina, entra_em_duplicados, formatar_data_ns
+from .utils_serializacao import gravacao_atomica
+
+VERSAO = 1
+
+
+def _chave_desperdicio(grupo):
+    # Mais espaço desperdiçado primeiro; empate pelo maior arquivo e depois pelo hash
+    return (-grupo["desperdicio"], -grupo["tamanho"], grupo["hash"])
+
+
+class GruposDuplicados:
+    """
+    Grupos de duplicados calculados quando o cache é salvo com hashes,
+    gravados num arquivo de linhas (duplicados.jsonl) ao lado do cache:
+
+        {"versao": 1, "cache": [...], "total_grupos": ..., ...}   ← cabeçalho
+        {"tamanho": ..., "hash": ..., "arquivos": [[nome, caminho, mtime_ns], ...]}
+        ...
+
+    Os grupos já saem ordenados pelo espaço desperdiçado, então uma página
+    é um seek até a linha certa: a tela de duplicados não precisa da árvore
+    nem de stat no disco (a data de modificação é a da varredura, a menos
+    que a página peça para conferir no disco). Os offsets das linhas são
+    montados uma vez, ao abrir o arquivo.
+    """
+
+    _trava = threading.Lock()
+    _atual = (None, None)  # ((caminho, mtime_ns, tamanho), leitor) do último arquivo aberto
+
+    def __init__(self, caminho):
+        self.caminho = os.fspath(caminho)
+        self.offsets = array("Q")
+        with open(self.caminho, "rb") as f:
+            self.cabecalho = json.loads(f.readline())
+            if self.cabecalho.get("versao") != VERSAO:
+                raise ValueError(f"Versão de duplicados.jsonl não suportada: {self.cabecalho.get('versao')}")
+            posicao = f.tell()
+            for linha in f:
+                self.offsets.append(posicao)
+                posicao += len(linha)
+
+    @classmethod
+    def abrir(cls, caminho):
+        """Leitor de `caminho`, reaproveitado enquanto o arquivo não mudar. None se não existir."""
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return None
+        chave = (os.fspath(caminho), st.st_mtime_ns, st.st_size)
+        chave_atual, leitor = cls._atual
+        if chave_atual == chave:
+            return leitor
+        with cls._trava:
+            chave_atual, leitor = cls._atual
+            if chave_atual != chave:
+                leitor = cls(caminho)
+                cls._atual = (chave, leitor)
+            return leitor
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def assinatura_cache(self):
+        return self.cabecalho.get("cache")
+
+    # ================================
+    # Escrita
+    # ================================
+
+    @classmethod
+    def escrever(cls, caminho, grupos, assinatura_cache):
+        """
+        Grava os grupos [(tamanho, hash_md5, [(caminho_pasta, Arquivo), ...]), ...]
+        só com os arquivos que entram em duplicados (sem removidos nem
+        vazios, ver entra_em_duplicados), ignorando grupos que ficaram com
+        menos de dois.
+        `assinatura_cache` identifica o cache de onde eles vieram.
+        """
+        saida = []
+        total_duplicados = espaco_duplicado = 0
+        for tamanho, hash_md5, itens in grupos:
+            arquivos = [
+                [arquivo.nome_arquivo, arquivo.caminho_completo or os.path.join(caminho_pasta, arquivo.nome_arquivo),
+                 arquivo.mtime_ns]
+                for caminho_pasta, arquivo in itens if entra_em_duplicados(arquivo)
+            ]
+            if len(arquivos) < 2:
+                continue
+            copias = len(arquivos) - 1
+            total_duplicados += copias
+            espaco_duplicado += copias * tamanho
+            saida.append({
+                "tamanho": tamanho,
+                "hash": hash_md5,
+                "ext": (itens[0][1].extensao or "").lower(),
+                "desperdicio": copias * tamanho,
+                "arquivos": arquivos,
+            })
+        saida.sort(key=_chave_desperdicio)
+
+        cabecalho = {
+            "versao": VERSAO,
+            "cache": list(assinatura_cache) if assinatura_cache is not None else None,
+            "total_grupos": len(saida),
+            "total_duplicados": total_duplicados,
+            "espaco_duplicado": espaco_duplicado,
+        }
+
+        # ASCII puro: nomes que não são UTF-8 válido voltam intactos (\udcxx)
+        with gravacao_atomica(caminho, "w", encoding="ascii") as f:
+            f.write(json.dumps(cabecalho) + "\n")
+            for grupo in saida:
+                f.write(json.dumps(grupo, separators=(",", ":")) + "\n")
+        print(f"🧮 Grupos de duplicados gravados: {len(saida)} grupos, {total_duplicados} duplicados.")
+        return cabecalho
+
+    # ================================
+    # Leitura
+    # ================================
+
+    def _linhas(self, inicio, fim):
+        if inicio >= fim:
+            return
+        with open(self.caminho, "rb") as f:
+            f.seek(self.offsets[inicio])
+            for _ in range(fim - inicio):
+                yield f.readline()
+
+    def pagina(self, pagina=1, por_pagina=20, ext="", pasta="", verificar_disco=False):
+        """
+        Grupos da página `pagina`, do maior desperdício para o menor. Com
+        filtros de extensão/pasta o arquivo é lido inteiro (só as linhas que
+        contêm o texto procurado são decodificadas) e cada grupo traz só os
+        arquivos que passaram pelo filtro. `verificar_disco` faz um stat de
+        cada arquivo da página (ver conferir_pagina).
+        """
+        ext = ext.strip().lower().lstrip(".")
+        pasta = pasta.strip().lower()
+        inicio = (pagina - 1) * por_pagina
+
+        if not ext and not pasta:
+            total = len(self)
+            grupos = [
+                self._formatar(inicio + n + 1, json.loads(linha))
+                for n, linha in enumerate(self._linhas(inicio, min(inicio + por_pagina, total)))
+            ]
+        else:
+            total, grupos = 0, []
+            # Pré-filtro na linha crua (escapada como no JSON); só vale para texto ASCII
+            filtros = [json.dumps(texto)[1:-1].encode("ascii") for texto in (ext, pasta) if texto and texto.isascii()]
+            for posicao, linha in enumerate(self._linhas(0, len(self))):
+                if not all(texto in linha.lower() for texto in filtros):
+                    continue
+                grupo = json.loads(linha)
+                arquivos = [item for item in grupo["arquivos"] if self._passa(item, ext, pasta)]
+                if not arquivos:
+                    continue
+                total += 1
+                if inicio < total <= inicio + por_pagina:
+                    grupo["arquivos"] = arquivos
+                    grupos.append(self._formatar(posicao + 1, grupo))
+
+        if verificar_disco:
+            conferir_pagina([(arquivo, arquivo["caminho"]) for grupo in grupos for arquivo in grupo["arquivos"]])
+
+        return {
+            "status": "ok" if total else "vazio",
+            "total_grupos": self.cabecalho["total_grupos"],
+            "total_duplicados": self.cabecalho["total_duplicados"],
+            "espaco_duplicado": self.cabecalho["espaco_duplicado"],
+            "quantidade": total,
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+            "total_paginas": max(1, -(-total // por_pagina)),
+            "grupos": grupos,
+        }
+
+    @staticmethod
+    def _passa(item, ext, pasta):
+        nome, caminho, _ = item
+        if ext and not nome.lower().endswith(f".{ext}"):
+            return False
+        return not pasta or pasta in caminho.lower()
+
+    @staticmethod
+    def _formatar(posicao, grupo):
+        arquivos = []
+        for nome, caminho, mtime_ns in grupo["arquivos"]:
+            arquivos.append({
+                "nome": nome,
+                "caminho": caminho,
+                "tamanho": grupo["tamanho"],
+                "mtime_ns": mtime_ns,
+                "modificacao": formatar_data_ns(mtime_ns),
+                "origem": "cache",
+            })
+        return {
+            "id": posicao,  # posição no ranking de desperdício
+            "ext": grupo["ext"],
+            "hash": grupo["hash"],
+            "tamanho": grupo["tamanho"],
+            "desperdicio": grupo["desperdicio"],
+            "qtd_arquivos": len(arquivos),
+            "arquivos": arquivos,
+        }
@@ -0,0 +1,242 @@
+# IndiceBusca.py
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .Metricas import metricas
+
+ORDENACOES = ("tamanho", "nome", "caminho")  # "-campo" ordena do maior para o menor
+
+
+def normalizar_extensao(extensao):
+    return (extensao or "").strip().replace(" ", "").lstrip(".").lower()
+
+
+def _trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+    """
+    Índices invertidos sobre os arquivos de uma árvore, para as buscas do
+    ManipuladorPasta não percorrerem (e baixarem a caixa de) todos os
+    arquivos a cada consulta:
+
+    - extensão → ids dos arquivos;
+    - tamanhos ordenados, consultados por faixa com bisect;
+    - trigramas do nome (minúsculo) → ids, para o filtro de substring.
+
+    Os ids são as posições em `entradas` (mesma ordem de coletar_arquivos),
+    então os resultados saem na mesma ordem da busca linear.
+
+    Quando a árvore é alterada no lugar (lotes do Observador), atualizar()
+    acrescenta os arquivos novos no fim dos índices; os que mudaram de
+    tamanho, e os novos, ficam fora da lista ordenada por tamanho, num
+    conjunto à parte conferido em toda consulta por faixa.
+    """
+
+    _trava = threading.Lock()
+    _atual = (None, None)  # (raiz, índice) da última árvore indexada
+
+    def __init__(self, arquivos):
+        inicio = time.perf_counter()
+        self.entradas = arquivos
+        self.nomes = []
+        self.extensoes = []
+        self.por_extensao = {}
+        postagens = {}
+
+        for id_arquivo, (_, arquivo) in enumerate(arquivos):
+            nome = arquivo.nome.lower()
+            ext = normalizar_extensao(arquivo.extensao)
+            self.nomes.append(nome)
+            self.extensoes.append(ext)
+            self.por_extensao.setdefault(ext, []).append(id_arquivo)
+            for trigrama in _trigramas(nome):
+                postagens.setdefault(trigrama, []).append(id_arquivo)
+
+        self.por_extensao = {ext: array("I", ids) for ext, ids in self.por_extensao.items()}
+        self.por_trigrama = {tri: array("I", ids) for tri, ids in postagens.items()}
+
+        ordem = sorted(range(len(arquivos)), key=lambda i: arquivos[i][1].tamanho or 0)
+        self.tamanhos = array("q", (arquivos[i][1].tamanho or 0 for i in ordem))
+        self.ids_por_tamanho = array("I", ordem)
+        self.fora_da_ordem = {}  # id(Arquivo) -> id no índice, dos que não estão em `tamanhos`
+
+        segundos = time.perf_counter() - inicio
+        metricas().observar("leitor_etapa_segundos", segundos, etapa="indice_busca")
+        print(f"🔎 Índice de busca: {len(arquivos)} arquivos em {segundos:.2f}s")
+
+    @classmethod
+    def para(cls, raiz):
+        """Índice da árvore `raiz`, reaproveitado enquanto a árvore for a mesma."""
+        raiz_atual, indice = cls._atual
+        if raiz_atual is raiz:
+            return indice
+        with cls._trava:
+            raiz_atual, indice = cls._atual
+            if raiz_atual is not raiz:
+                indice = cls(raiz.coletar_arquivos())
+                cls._atual = (raiz, indice)
+            return indice
+
+    @classmethod
+    def atualizar(cls, raiz, novos, alterados):
+        """
+        Leva para o índice de `raiz`, se ele já existe, uma alteração feita
+        no lugar: `novos` [(caminho_pasta, Arquivo)] entram no fim e
+        `alterados` [(Arquivo, tamanho quando foi indexado)] saem da ordem
+        por tamanho. Nome e extensão de um arquivo não mudam no lugar.
+        """
+        with cls._trava:
+            raiz_atual, indice = cls._atual
+            if raiz_atual is raiz:
+                indice._acrescentar(novos, alterados)
+
+    def _acrescentar(self, novos, alterados):
+        fora = dict(self.fora_da_ordem)
+        for arquivo, tamanho in alterados:
+            if id(arquivo) in fora:
+                continue
+            inicio = bisect_left(self.tamanhos, tamanho or 0)
+            fim = bisect_right(self.tamanhos, tamanho or 0)
+            for i in self.ids_por_tamanho[inicio:fim]:
+                if self.entradas[i][1] is arquivo:
+                    fora[id(arquivo)] = i
+                    break
+
+        for item in novos:
+            id_arquivo = len(self.entradas)
+            arquivo = item[1]
+            nome = arquivo.nome.lower()
+            ext = normalizar_extensao(arquivo.extensao)
+            # Os ids novos são os maiores: as listas continuam em ordem crescente
+            self.nomes.append(nome)
+            self.extensoes.append(ext)
+            self.por_extensao.setdefault(ext, array("I")).append(id_arquivo)
+            for trigrama in _trigramas(nome):
+                self.por_trigrama.setdefault(trigrama, array("I")).append(id_arquivo)
+            fora[id(arquivo)] = id_arquivo
+            self.entradas.append(item)
+        # Troca o dicionário inteiro: consultas em andamento continuam com o anterior
+        self.fora_da_ordem = fora
+
+    def __len__(self):
+        return len(self.entradas)
+
+    # ================================
+    # Candidatos por índice
+    # ================================
+
+    def _faixa_tamanho(self, t_min, t_max):
+        inicio = bisect_left(self.tamanhos, t_min) if t_min is not None else 0
+        fim = bisect_right(self.tamanhos, t_max) if t_max is not None else len(self.tamanhos)
+        ids = self.ids_por_tamanho[inicio:fim] if inicio < fim else array("I")
+        fora = self.fora_da_ordem
+        if fora:
+            # O tamanho deles na lista ordenada pode estar velho; consultar() confere o atual
+            extras = set(fora.values())
+            ids = array("I", [i for i in ids if i not in extras])
+            ids.extend(sorted(extras))
+        return ids
+
+    def _postagem_nome(self, nome):
+        """Menor lista de ids entre os trigramas de `nome` (vazia se algum faltar)."""
+        menor = None
+        for trigrama in _trigramas(nome):
+            ids = self.por_trigrama.get(trigrama)
+            if ids is None:
+                return array("I")
+            if menor is None or len(ids) < len(menor):
+                menor = ids
+        return menor
+
+    def consultar(self, nome="", extensao=None, t_min=None, t_max=None):
+        """
+        Ids dos arquivos que passam pelos filtros, em ordem. `nome` já deve
+        vir em minúsculas; `extensao` None não filtra.
+
+        Cada filtro com índice fornece um conjunto de candidatos; parte-se do
+        menor deles e os outros filtros são conferidos só nesses candidatos.
+        """
+        # (ids, já em ordem crescente?)
+        fontes = []
+        if extensao is not None:
+            fontes.append((self.por_extensao.get(extensao, array("I")), True))
+        if t_min is not None or t_max is not None:
+            fontes.append((self._faixa_tamanho(t_min, t_max), False))
+        if len(nome) >= 3:
+            fontes.append((self._postagem_nome(nome), True))
+
+        if fontes:
+            candidatos, ordenado = min(fontes, key=lambda fonte: len(fonte[0]))
+            if not ordenado:
+                candidatos = sorted(candidatos)
+        else:
+            candidatos = range(len(self.entradas))
+
+        resultado = []
+        for i in candidatos:
+            if nome and nome not in self.nomes[i]:
+                continue
+            if extensao is not None and self.extensoes[i] != extensao:
+                continue
+            if t_min is not None or t_max is not None:
+                tamanho = self.entradas[i][1].tamanho or 0
+                if t_min is not None and tamanho < t_min:
+                    continue
+                if t_max is not None and tamanho > t_max:
+                    continue
+            resultado.append(i)
+        return resultado
+
+    def arquivos(self, ids):
+        """[(caminho_pasta, Arquivo), ...] dos ids informados."""
+        return [self.entradas[i] for i in ids]
+
+    # ================================
+    # Ordenação e agregados
+    # ================================
+
+    def _chave(self, campo):
+        if campo == "tamanho":
+            return lambda i: self.entradas[i][1].tamanho or 0
+        if campo == "nome":
+            return self.nomes.__getitem__
+        if campo == "caminho":
+            return lambda i: (self.entradas[i][0], self.nomes[i])
+        raise ValueError(f"Ordenação inválida: {campo!r} (use {', '.join(ORDENACOES)})")
+
+    def primeiros(self, ids, k, ordenar=""):
+        """
+        Os `k` primeiros ids na ordem `ordenar` ("tamanho", "-tamanho",
+        "nome", ...; vazio mantém a ordem da varredura). Usa heapq, então
+        guarda só k ids em vez de ordenar todos os resultados.
+        """
+        if not ordenar:
+            return ids[:k]
+        decrescente = ordenar.startswith("-")
+        chave = self._chave(ordenar.lstrip("-"))
+        if decrescente:
+            return heapq.nlargest(k, ids, key=chave)
+        return heapq.nsmallest(k, ids, key=chave)
+
+    def agregar(self, ids, top=6):
+        """Total de bytes, extensões mais frequentes e pastas que mais ocupam entre os ids."""
+        total_bytes = 0
+        por_extensao = {}
+        por_pasta = {}
+        for i in ids:
+            caminho_pasta, arquivo = self.entradas[i]
+            tamanho = arquivo.tamanho or 0
+            total_bytes += tamanho
+            ext = self.extensoes[i]
+            por_extensao[ext] = por_extensao.get(ext, 0) + 1
+            por_pasta[caminho_pasta] = por_pasta.get(caminho_pasta, 0) + tamanho
+        return {
+            "bytes": total_bytes,
+            "por_extensao": heapq.nlargest(top, por_extensao.items(), key=lambda item: item[1]),
+            "por_pasta": heapq.nlargest(top, por_pasta.items(), key=lambda item: item[1]),
+        }
@@ -0,0 +1,313 @@
+# IndiceSQLite.py
+import os
+import time
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .Arquivo import Arquivo, conferir_pagina, formatar_data_ns
+from .IndiceBusca import ORDENACOES
+from .ManipuladorPasta import POR_PAGINA_PADRAO, parse_tamanho, resposta_busca
+from .Pasta import Pasta
+from .models import ArquivoIndexado, MetaIndice, PastaIndexada
+
+TAMANHO_LOTE = 5000
+
+
+
+class IndiceSQLite:
+    """
+    Guarda a árvore do cache em tabelas indexadas (PastaIndexada,
+    ArquivoIndexado, MetaIndice) no banco do Django, para que as telas
+    consultem por SQL em vez de reler e percorrer o cache.json inteiro.
+    """
+
+    # ================================
+    # Escrita
+    # ================================
+
+    def salvar(self, raiz, meta=None, resumo=None):
+        """Reescreve o índice inteiro com a árvore `raiz`, os metadados `meta` e o resumo da home."""
+        with transaction.atomic():
+            self._limpar()
+
+            pastas, arquivos = [], []
+            proximo_id = 1
+            pilha = [(raiz, None)]
+            while pilha:
+                pasta, pai_id = pilha.pop()
+                pasta_id = proximo_id
+                proximo_id += 1
+                pastas.append(PastaIndexada(
+                    id=pasta_id, nome=pasta.nome, caminho_completo=pasta.caminho_completo, pai_id=pai_id,
+                ))
+                for arq in pasta.arquivos:
+                    arquivos.append(self._arquivo_para_linha(arq, pasta_id))
+
+                filhos = []
+                atual = pasta.subpastas
+                while atual:
+                    filhos.append((atual.pasta, pasta_id))
+                    atual = atual.proximo
+                pilha.extend(reversed(filhos))
+
+                if len(pastas) >= TAMANHO_LOTE:
+                    PastaIndexada.objects.bulk_create(pastas)
+                    pastas = []
+                if len(arquivos) >= TAMANHO_LOTE:
+                    ArquivoIndexado.objects.bulk_create(arquivos)
+                    arquivos = []
+
+            PastaIndexada.objects.bulk_create(pastas)
+            ArquivoIndexado.objects.bulk_create(arquivos)
+
+            # "salvo_em" identifica esta versão do índice (ver utils_cache)
+            meta = {k: v for k, v in (meta or {}).items() if k != "estrutura"}
+            meta["salvo_em"] = time.time_ns()
+            MetaIndice.objects.bulk_create([
+                MetaIndice(chave=chave, valor=valor) for chave, valor in meta.items()
+            ])
+            if resumo is not None:
+                self.salvar_resumo(resumo)
+
+    def aplicar_lote(self, lote, resumo=None):
+        """
+        Grava só o que um lote do Observador mudou (formato do
+        DiarioAlteracoes): as pastas novas, as linhas dos arquivos alterados
+        (ou novas linhas) e os metadados do lote. "salvo_em" não muda: ele
+        identifica a última gravação completa.
+        """
+        ids = {}
+
+        def id_da_pasta(caminho):
+            if caminho not in ids:
+                ids[caminho] = (
+                    PastaIndexada.objects.filter(nome=os.path.basename(caminho), caminho_completo=caminho)
+                    .order_by("id").values_list("id", flat=True).first()
+                )
+            return ids[caminho]
+
+        with transaction.atomic():
+            for caminho in lote.get("pastas", ()):
+                pai_id = id_da_pasta(os.path.dirname(caminho))
+                if id_da_pasta(caminho) is None and pai_id is not None:
+                    ids[caminho] = PastaIndexada.objects.create(
+                        nome=os.path.basename(caminho), caminho_completo=caminho, pai_id=pai_id,
+                    ).id
+
+            for caminho_pasta, dados in lote.get("arquivos", ()):
+                pasta_id = id_da_pasta(caminho_pasta)
+                if pasta_id is None:
+                    continue
+                arquivo = Arquivo.from_dict(dados)
+                if arquivo.caminho_completo is None:
+                    arquivo.caminho_completo = os.path.join(caminho_pasta, arquivo.nome_arquivo)
+                linha = self._arquivo_para_linha(arquivo, pasta_id)
+                campos = {
+                    campo.attname: getattr(linha, campo.attname)
+                    for campo in ArquivoIndexado._meta.concrete_fields if not campo.primary_key
+                }
+                if not ArquivoIndexado.objects.filter(
+                    pasta_id=pasta_id, nome=linha.nome, extensao=linha.extensao,
+                ).update(**campos):
+                    linha.save()
+
+            for chave, valor in (lote.get("meta") or {}).items():
+                MetaIndice.objects.update_or_create(chave=chave, defaults={"valor": valor})
+            if resumo is not None:
+                self.salvar_resumo(resumo)
+
+    def salvar_resumo(self, resumo):
+        MetaIndice.objects.update_or_create(chave="resumo", defaults={"valor": resumo.to_dict()})
+
+    def _limpar(self):
+        # DELETE direto: o índice não tem relações a cascatear
+        with connection.cursor() as cursor:
+            for model in (ArquivoIndexado, PastaIndexada, MetaIndice):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+    def _arquivo_para_linha(self, arq, pasta_id):
+        return ArquivoIndexado(
+            pasta_id=pasta_id,
+            nome=arq.nome,
+            nome_busca=arq.nome.lower(),
+            extensao=arq.extensao or "",
+            extensao_busca=(arq.extensao or "").lower(),
+            tamanho=arq.tamanho or 0,
+            hash_md5=arq.hash_md5,
+            caminho_completo=arq.caminho_completo,
+            removido=arq.removido,
+            mtime_ns=arq.mtime_ns,
+            ctime_ns=arq.ctime_ns,
+            atime_ns=arq.atime_ns,
+            inode=arq.inode,
+            dispositivo=arq.dispositivo,
+        )
+
+    # ================================
+    # Leitura
+    # ================================
+
+    def existe(self):
+        return PastaIndexada.objects.filter(pai__isnull=True).exists()
+
+    def caminho_raiz(self):
+        """Caminho da pasta raiz do índice, ou None se o índice estiver vazio."""
+        return (
+            PastaIndexada.objects.filter(pai__isnull=True)
+            .order_by("id").values_list("caminho_completo", flat=True).first()
+        )
+
+    def carregar_meta(self):
+        return {m.chave: m.valor for m in MetaIndice.objects.exclude(chave="resumo")}
+
+    def carregar_resumo(self):
+        return MetaIndice.objects.filter(chave="resumo").values_list("valor", flat=True).first()
+
+    def carregar_raiz(self):
+        """Reconstrói a árvore de Pasta a partir do índice (ou None se vazio)."""
+        pastas = {}
+        raiz = None
+
+        for pasta_id, pai_id, caminho in PastaIndexada.objects.order_by("id").values_list(
+            "id", "pai_id", "caminho_completo"
+        ).iterator(chunk_size=TAMANHO_LOTE):
+            pasta = Pasta(caminho, ler_conteudo=False)
+            pastas[pasta_id] = pasta
+            if pai_id is None:
+                raiz = raiz or pasta
+                continue
+            pastas[pai_id].adicionar_subpasta(pasta)
+
+        if raiz is None:
+            return None
+
+        for arq in self._iterar_arquivos(ArquivoIndexado.objects.order_by("id")):
+            pastas[arq.pasta_id].adicionar_arquivo(self._linha_para_arquivo(arq))
+        raiz.calcular_totais()
+        return raiz
+
+    def _iterar_arquivos(self, queryset):
+        return queryset.iterator(chunk_size=TAMANHO_LOTE)
+
+    def _linha_para_arquivo(self, linha):
+        arquivo = Arquivo(
+            linha.nome, linha.extensao, linha.tamanho, linha.caminho_completo,
+            mtime_ns=linha.mtime_ns, inode=linha.inode, dispositivo=linha.dispositivo,
+            ctime_ns=linha.ctime_ns, atime_ns=linha.atime_ns,
+        )
+        arquivo.hash_md5 = linha.hash_md5
+        arquivo.removido = linha.removido
+        return arquivo
+
+    # Mesmas ordenações do IndiceBusca, com o id desempatando
+    _ORDEM_SQL = {
+        "tamanho": ("tamanho",),
+        "nome": ("nome",),
+        "caminho": ("pasta__caminho_completo", "nome"),
+    }
+
+    def buscar(self, nome="", extensao="", tamanho_min="", tamanho_max="", hash_md5="",
+               pagina=1, por_pagina=POR_PAGINA_PADRAO, ordenar="", limite=None, agregados=False,
+               verificar_disco=False):
+        """
+        Mesmo contrato de ManipuladorPasta.buscar_avancado, via SQL (ORDER
+        BY/LIMIT). O hash só é comparado com o que já está no índice.
+        """
+        nome = nome.lower().strip()
+        extensao = extensao.lower().strip().replace(" ", "").lstrip(".")
+        hash_md5 = hash_md5.lower().strip()
+        t_min = parse_tamanho(tamanho_min)
+        t_max = parse_tamanho(tamanho_max)
+
+        qs = ArquivoIndexado.objects.all()
+        if extensao:
+            qs = qs.filter(extensao_busca=extensao)
+        if t_min is not None:
+            qs = qs.filter(tamanho__gte=t_min)
+        if t_max is not None:
+            qs = qs.filter(tamanho__lte=t_max)
+        if nome:
+            qs = qs.filter(nome_busca__contains=nome)
+        sem_hash = 0
+        if hash_md5:
+            sem_hash = qs.filter(hash_md5__isnull=True).count()
+            qs = qs.filter(hash_md5__contains=hash_md5)
+
+        campo = ordenar.lstrip("-")
+        if ordenar and campo not in ORDENACOES:
+            raise ValueError(f"Ordenação inválida: {campo!r} (use {', '.join(ORDENACOES)})")
+        ordem = self._ORDEM_SQL.get(campo, ()) + ("id",)
+        if ordenar.startswith("-"):
+            ordem = tuple(f"-{coluna}" for coluna in ordem)
+
+        encontrados = qs.count()
+        total = encontrados if limite is None else min(encontrados, limite)
+        inicio = (pagina - 1) * por_pagina
+        fim = min(inicio + por_pagina, total)
+
+        resultados, conferir = [], []
+        for arq in (qs.select_related("pasta").order_by(*ordem)[inicio:fim] if inicio < fim else []):
+            nome_arquivo = f"{arq.nome}.{arq.extensao}" if arq.extensao else arq.nome
+            item = {
+                "nome": nome_arquivo,
+                "caminho": arq.pasta.caminho_completo,
+                "extensao": arq.extensao,
+                "tamanho": arq.tamanho,
+                "hash_md5": arq.hash_md5 or "",
+                "mtime_ns": arq.mtime_ns,
+                "modificacao": formatar_data_ns(arq.mtime_ns),
+                "origem": "cache",
+            }
+            if verificar_disco:
+                conferir.append((item, arq.caminho_completo or os.path.join(item["caminho"], nome_arquivo)))
+            resultados.append(item)
+        if conferir:
+            conferir_pagina(conferir)
+
+        return resposta_busca(
+            resultados, total, encontrados, pagina, por_pagina, ordenar,
+            agregados=self._agregar(qs) if agregados else None, sem_hash=sem_hash,
+        )
+
+    def _agregar(self, qs, top=6):
+        por_extensao = (
+            qs.values_list("extensao_busca").annotate(qtd=Count("id")).order_by("-qtd")[:top]
+        )
+        por_pasta = (
+            qs.values_list("pasta__caminho_completo").annotate(total=Sum("tamanho")).order_by("-total")[:top]
+        )
+        return {
+            "bytes": qs.aggregate(total=Sum("tamanho"))["total"] or 0,
+            "por_extensao": [list(linha) for linha in por_extensao],
+            "por_pasta": [list(linha) for linha in por_pasta],
+        }
+
+    def grupos_duplicados(self):
+        """
+        Devolve [(tamanho, hash_md5, [(caminho_pasta, Arquivo), ...]), ...]
+        para os pares (tamanho, hash) que aparecem mais de uma vez entre os
+        arquivos que entram em duplicados (ver Arquivo.entra_em_duplicados).
+        """
+        arquivos = connection.ops.quote_name(ArquivoIndexado._meta.db_table)
+        pastas = connection.ops.quote_name(PastaIndexada._meta.db_table)
+        sql = f"""
+            SELECT a.*, p.caminho_completo AS caminho_pasta
+            FROM {arquivos} a
+            JOIN (
+                SELECT tamanho, hash_md5 FROM {arquivos}
+                WHERE hash_md5 IS NOT NULL AND tamanho > 0 AND NOT removido
+                GROUP BY tamanho, hash_md5
+                HAVING COUNT(*) > 1
+            ) d ON a.tamanho = d.tamanho AND a.hash_md5 = d.hash_md5 AND NOT a.removido
+            JOIN {pastas} p ON p.id = a.pasta_id
+            ORDER BY a.id
+        """
+
+        grupos = defaultdict(list)
+        for linha in ArquivoIndexado.objects.raw(sql).iterator():
+            grupos[(linha.tamanho, linha.hash_md5)].append(
+                (linha.caminho_pasta, self._linha_para_arquivo(linha))
+            )
+        return [(tamanho, hash_md5, grupo) for (tamanho, hash_md5), grupo in grupos.items()]
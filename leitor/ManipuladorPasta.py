@@ -1,132 +1,180 @@
 # Manipulador/ManipuladorPasta.py
-import json
+import heapq
 import os
 from datetime import datetime, timezone, timedelta
-from collections import defaultdict
 
-from .Pasta import Pasta
+from .Arquivo import conferir_pagina
 from .NoPasta import NoPasta
+from .Varredor import Varredor
+from .DetectorDuplicatas import DetectorDuplicatas
+from .IndiceBusca import IndiceBusca, normalizar_extensao
+from .utils_cache import carregar_raiz_do_cache, salvar_cache
+
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAX = 500
+
+
+# NOVA FUNÇÃO: aceita tanto número (int) quanto string antiga ("30mb")
+def parse_tamanho(valor):
+    if not valor:  # None, "", 0
+        return None
+    try:
+        # Caso 1: já vem como número (int/float) → nosso novo padrão do JS
+        if isinstance(valor, (int, float)):
+            return int(valor)
+        # Caso 2: ainda vem como string (ex: "30mb", "5 gb", "1000") → compatibilidade
+        if isinstance(valor, str):
+            valor = valor.strip().lower().replace(" ", "").replace(",", ".")
+            mult = 1
+
+            if valor.endswith("kb"):
+                mult = 1024
+                valor = valor[:-2]
+            elif valor.endswith("mb"):
+                mult = 1024**2
+                valor = valor[:-2]
+            elif valor.endswith("gb"):
+                mult = 1024**3
+                valor = valor[:-2]
+            elif valor.endswith("b"):
+                valor = valor[:-1]
+
+            # Remove tudo que não for número ou ponto
+            num_str = ''.join(c for c in valor if c.isdigit() or c == '.')
+            if not num_str:
+                return None
+            return int(float(num_str) * mult)
+    except:
+        pass
+    return None  # Qualquer erro → ignora o filtro
+
+
+def resposta_busca(resultados, total, encontrados, pagina, por_pagina, ordenar, agregados=None, sem_hash=0):
+    """Envelope comum das buscas paginadas (árvore em memória e SQLite)."""
+    resposta = {
+        "status": "ok" if total else "vazio",
+        "quantidade": total,            # resultados navegáveis (já com o limite)
+        "encontrados": encontrados,     # tudo que passou pelos filtros
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+        "total_paginas": max(1, -(-total // por_pagina)),
+        "ordenar": ordenar,
+        "resultados": resultados,
+    }
+    if agregados is not None:
+        resposta["agregados"] = agregados
+    if sem_hash:
+        resposta["sem_hash"] = sem_hash  # candidatos que o filtro por hash não pôde comparar
+    return resposta
+
 
 class ManipuladorPasta:
-    def __init__(self, caminho, interativo=True):
+    def __init__(self, caminho, interativo=True, raiz=None, carregar=True):
         self.caminho = caminho
         self.raiz = None
         self.no_raiz = None
-        self.carregar_estrutura(interativo=interativo)
+        self.estatisticas_varredura = None
+        if raiz is not None:
+            # Árvore já carregada (ex.: snapshot em memória dos views)
+            self.raiz = raiz
+            self.no_raiz = NoPasta(raiz)
+        elif carregar:
+            self.carregar_estrutura(interativo=interativo)
 
-        
     def carregar_estrutura(self, forcar_recriacao=False, interativo=True):
         """Carrega estrutura do cache ou cria nova árvore."""
-        pasta_cache = os.path.join(os.getcwd(), "cache")
-        os.makedirs(pasta_cache, exist_ok=True)
-        cache_file = os.path.join(pasta_cache, "cache.json")
-
-        if not forcar_recriacao and os.path.exists(cache_file):
-            try:
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
+        if not forcar_recriacao:
+            raiz, _ = carregar_raiz_do_cache()
+            if raiz is not None:
                 # Apenas carrega o cache sem perguntar nada
-                self.raiz = Pasta.from_dict(data["estrutura"])
+                self.raiz = raiz
                 self.no_raiz = NoPasta(self.raiz)
                 print("✅ Estrutura carregada do cache.")
                 return
 
-            except Exception as e:
-                print(f"Erro ao carregar cache: {e}")
-
         # Se não tem cache ou forçado a recriar
-        self.raiz = Pasta(self.caminho)
-        self.no_raiz = NoPasta(self.raiz)
+        self.varrer()
         self.salvar_cache()
         print("✅ Cache recriado.")
 
-    def salvar_cache(self, extra_meta=None):
-        pasta_cache = os.path.join(os.getcwd(), "cache")
-        os.makedirs(pasta_cache, exist_ok=True)
-        cache_file = os.path.join(pasta_cache, "cache.json")
+    def varrer(self, progresso=None, tempos_extras=False):
+        """Varre self.caminho do disco, sem gravar o cache."""
+        varredor = Varredor(progresso=progresso, tempos_extras=tempos_extras)
+        self.raiz = varredor.varrer(self.caminho)
+        self.estatisticas_varredura = varredor.estatisticas
+        self.no_raiz = NoPasta(self.raiz)
+        return self.raiz
 
-        data = {
+    def salvar_cache(self, extra_meta=None):
+        meta = {
             "data": datetime.now(timezone(timedelta(hours=-3))).strftime('%d_%m_%Y,%H:%M'),
-            "estrutura": self.raiz.to_dict(),
         }
 
         if extra_meta:
-            data.update(extra_meta)  # ex: {"hash_calculado": True}
+            meta.update(extra_meta)  # ex: {"hash_calculado": True}
 
-        with open(cache_file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        salvar_cache(self.raiz, meta)
 
-    def detectar_duplicatas(self):
+    def detectar_duplicatas(self, motor=None, comparar_bytes=False, listar=False):
         """
-        Detecta arquivos duplicados usando MD5. Garante que todos os arquivos
-        tenham seu hash calculado se a função for chamada.
+        Detecta arquivos duplicados em etapas (tamanho → impressão parcial →
+        MD5 completo), calculando o hash só de quem ainda pode ser duplicado.
+        Mostra uma linha de resumo; com `listar`, também cada grupo (modo
+        interativo e scan --verbosity 2).
         """
-        from .Arquivo import Arquivo
+        detector = DetectorDuplicatas(motor=motor, comparar_bytes=comparar_bytes)
+        duplicatas = detector.detectar(self.raiz.iter_arquivos())
 
-        todos_arquivos = self.raiz.coletar_arquivos()
-
-        # 1. Garante que todos os arquivos tenham hash calculado
-        for _, arquivo in todos_arquivos:
-            if not arquivo.hash_md5:
-                if arquivo.caminho_completo and os.path.exists(arquivo.caminho_completo):
-                    arquivo._calcular_hash()
-
-        # 2. Agrupa arquivos por hash (ignorando arquivos sem hash)
-        hash_dict = defaultdict(list)
-        for caminho_pasta, arquivo in todos_arquivos:
-            if arquivo.hash_md5:
-                hash_dict[arquivo.hash_md5].append((caminho_pasta, arquivo))
+        if not duplicatas:
+            print("✅ Nenhum arquivo duplicado encontrado.")
+            return detector.estatisticas
 
-        # 3. Filtra os grupos que de fato são duplicados
-        duplicatas = []
         total_duplicados = 0
         espaco_duplicado = 0
-        for hash_value, grupo in hash_dict.items():
-            if len(grupo) > 1:
-                tamanho = grupo[0][1].tamanho  # Tamanho é o mesmo para todos no grupo
-                duplicatas.append((tamanho, hash_value, grupo))
-                total_duplicados += len(grupo) - 1
-                espaco_duplicado += (len(grupo) - 1) * tamanho
-
-        if not duplicatas:
-            print("\n✅ Nenhum arquivo duplicado encontrado.")
-            return
-
-        print("\n📑 Arquivos duplicados encontrados (usando MD5):")
-        for tamanho, hash_value, grupo in duplicatas:
-            print(f"\nTamanho: {tamanho} bytes  - Hash: {hash_value}")
-            for i, (caminho, arquivo) in enumerate(grupo, 1):
-                caminho_relativo = os.path.relpath(os.path.join(caminho, f"{arquivo.nome}.{arquivo.extensao}"), self.caminho)
-                print(f" {i}. {arquivo.nome}.{arquivo.extensao} em {caminho_relativo}")
-
-        print(f"\n📈 Estatísticas:")
-        print(f" Arquivos duplicados: {total_duplicados}")
-        print(f" Espaço desperdiçado: {espaco_duplicado / (1024 * 1024):.2f} MB")
+        for tamanho, _, grupo in duplicatas:
+            total_duplicados += len(grupo) - 1
+            espaco_duplicado += (len(grupo) - 1) * tamanho
+
+        if listar:
+            print("\n📑 Arquivos duplicados encontrados (usando MD5):")
+            for tamanho, hash_value, grupo in duplicatas:
+                print(f"\nTamanho: {tamanho} bytes  - Hash: {hash_value}")
+                for i, (caminho, arquivo) in enumerate(grupo, 1):
+                    caminho_relativo = os.path.relpath(os.path.join(caminho, arquivo.nome_arquivo), self.caminho)
+                    print(f" {i}. {arquivo.nome_arquivo} em {caminho_relativo}")
+            print()
+
+        print(
+            f"📈 Duplicados: {len(duplicatas)} grupos, {total_duplicados} arquivos duplicados, "
+            f"{espaco_duplicado / (1024 * 1024):.2f} MB desperdiçados."
+        )
+        return detector.estatisticas
 
     def buscar_pasta(self, termo):
             termo = termo.lower()
             resultados = []
 
-            def rec(no, caminho):
-                while no:
-                    pasta = no.pasta
-                    caminho_atual = os.path.join(caminho, pasta.nome)
-
-                    if termo in pasta.nome.lower():
-                        tamanho_total = self.calcular_tamanho_pasta(pasta)
-                        resultados.append({
-                            "nome": pasta.nome,
-                            "caminho": caminho_atual,
-                            "tamanho_total": tamanho_total
-                        })
-
-                    if pasta.subpastas:
-                        rec(pasta.subpastas, caminho_atual)
-
-                    no = no.proximo
-
-            rec(self.no_raiz, "")
+            # Pilha de (NoPasta, caminho da pai) em vez de recursão: a
+            # profundidade da árvore não esbarra no limite do Python
+            pilha = [(self.no_raiz, "")] if self.no_raiz else []
+            while pilha:
+                no, caminho = pilha.pop()
+                pasta = no.pasta
+                caminho_atual = os.path.join(caminho, pasta.nome)
+
+                if termo in pasta.nome.lower():
+                    tamanho_total = self.calcular_tamanho_pasta(pasta)
+                    resultados.append({
+                        "nome": pasta.nome,
+                        "caminho": caminho_atual,
+                        "tamanho_total": tamanho_total
+                    })
+
+                # a irmã vai por baixo das filhas, para manter a ordem em profundidade
+                if no.proximo:
+                    pilha.append((no.proximo, caminho))
+                if pasta.subpastas:
+                    pilha.append((pasta.subpastas, caminho_atual))
 
             return {
                 "status": "ok" if resultados else "vazio",
@@ -144,14 +192,22 @@ class ManipuladorPasta:
 
         resultados = []
 
-        for caminho_pasta, arquivo in self.raiz.coletar_arquivos():
-            nome_ext = f"{arquivo.nome}.{arquivo.extensao}".lower()
-            if nome_ext.endswith(termo):
-                resultados.append({
-                    "nome": f"{arquivo.nome}.{arquivo.extensao}",
-                    "caminho": caminho_pasta,
-                    "tamanho": arquivo.tamanho
-                })
+        if "." in termo[1:]:
+            # Ex.: ".tar.gz" pega parte do nome; não dá para usar o índice
+            arquivos = [
+                (caminho_pasta, arquivo) for caminho_pasta, arquivo in self.raiz.iter_arquivos()
+                if f"{arquivo.nome}.{arquivo.extensao}".lower().endswith(termo)
+            ]
+        else:
+            indice = IndiceBusca.para(self.raiz)
+            arquivos = indice.arquivos(indice.consultar(extensao=normalizar_extensao(termo)))
+
+        for caminho_pasta, arquivo in arquivos:
+            resultados.append({
+                "nome": f"{arquivo.nome}.{arquivo.extensao}",
+                "caminho": caminho_pasta,
+                "tamanho": arquivo.tamanho
+            })
 
         return {
             "status": "ok" if resultados else "vazio",
@@ -165,16 +221,14 @@ class ManipuladorPasta:
         termo = termo.lower()
         resultados = []
 
-        for caminho_pasta, arquivo in self.raiz.coletar_arquivos():
-            nome = arquivo.nome.lower()
-
-            if termo in nome:
-                nome_ext = f"{arquivo.nome}.{arquivo.extensao}"
-                resultados.append({
-                    "nome": nome_ext,
-                    "caminho": caminho_pasta,
-                    "tamanho": arquivo.tamanho
-                })
+        indice = IndiceBusca.para(self.raiz)
+        for caminho_pasta, arquivo in indice.arquivos(indice.consultar(nome=termo)):
+            nome_ext = f"{arquivo.nome}.{arquivo.extensao}"
+            resultados.append({
+                "nome": nome_ext,
+                "caminho": caminho_pasta,
+                "tamanho": arquivo.tamanho
+            })
 
         return {
             "status": "ok" if resultados else "vazio",
@@ -190,129 +244,150 @@ class ManipuladorPasta:
 
 
     def _montar_json_pasta(self, pasta):
-        subpastas_json = []
+        resultado = None
+        pilha = [(pasta, None)]  # (pasta, lista "subpastas" da pai)
+        while pilha:
+            atual, destino = pilha.pop()
+            dados = {
+                "nome": atual.nome,
+                "arquivos": [
+                    {
+                        "nome": arq.nome,
+                        "extensao": arq.extensao,
+                        "tamanho": arq.tamanho
+                    }
+                    for arq in atual.arquivos
+                ],
+                "subpastas": []
+            }
+            if destino is None:
+                resultado = dados
+            else:
+                destino.append(dados)
+            pilha.extend((sub, dados["subpastas"]) for sub in reversed(atual.listar_subpastas()))
 
-        sub = pasta.subpastas
-        while sub is not None:
-            subpastas_json.append(self._montar_json_pasta(sub.pasta))
-            sub = sub.proximo
-
-        return {
-            "nome": pasta.nome,
-            "arquivos": [
-                {
-                    "nome": arq.nome,
-                    "extensao": arq.extensao,
-                    "tamanho": arq.tamanho
-                }
-                for arq in pasta.arquivos
-            ],
-            "subpastas": subpastas_json
-        }
+        return resultado
 
 
     def calcular_tamanho_pasta(self, pasta):
+        # Totais já calculados na varredura/carga do cache
+        if pasta.tamanho_total is not None:
+            return pasta.tamanho_total
+
         total = 0
+        pilha = [pasta]
+        while pilha:
+            atual = pilha.pop()
+            if atual.tamanho_total is not None:
+                total += atual.tamanho_total
+                continue
+            for arq in atual.arquivos:
+                total += arq.tamanho
+            pilha.extend(atual.listar_subpastas())
 
-        for arq in pasta.arquivos:
-            total += arq.tamanho
+        return total
 
-        sub = pasta.subpastas
-        while sub is not None:
-            total += self.calcular_tamanho_pasta(sub.pasta)
-            sub = sub.proximo
+    def maiores_pastas(self, profundidade=1, limite=20):
+        """
+        Maiores pastas a `profundidade` níveis abaixo da raiz (as subpastas
+        diretas estão no nível 1), pelos totais acumulados de cada Pasta.
+        """
+        nivel = [self.raiz]
+        for _ in range(profundidade):
+            proximo_nivel = []
+            for pasta in nivel:
+                atual = pasta.subpastas
+                while atual:
+                    proximo_nivel.append(atual.pasta)
+                    atual = atual.proximo
+            nivel = proximo_nivel
+
+        for pasta in nivel:
+            if pasta.tamanho_total is None:
+                pasta.calcular_totais()
+
+        maiores = heapq.nlargest(limite, nivel, key=lambda pasta: pasta.tamanho_total)
+        resultados = [
+            {
+                "nome": pasta.nome,
+                "caminho": pasta.caminho_completo,
+                "tamanho_total": pasta.tamanho_total,
+                "total_arquivos": pasta.total_arquivos,
+                "total_subpastas": pasta.total_subpastas,
+            }
+            for pasta in maiores
+        ]
 
-        return total
+        return {
+            "status": "ok" if resultados else "vazio",
+            "profundidade": profundidade,
+            "quantidade": len(resultados),
+            "resultados": resultados
+        }
 
-    def buscar_avancado(self, nome="", extensao="", tamanho_min="", tamanho_max="", hash_md5="", somente_cache=False):
+    def buscar_avancado(self, nome="", extensao="", tamanho_min="", tamanho_max="", hash_md5="", somente_cache=False,
+                        pagina=1, por_pagina=POR_PAGINA_PADRAO, ordenar="", limite=None, agregados=False,
+                        verificar_disco=False):
+        """
+        Busca no cache e devolve só a página `pagina` (de `por_pagina`
+        itens) na ordem `ordenar` (ver IndiceBusca.ORDENACOES), com o total
+        de resultados. `limite` restringe quantos resultados podem ser
+        navegados (ex.: os 1000 maiores); `agregados` inclui bytes, extensões
+        e pastas de todos os encontrados, para os gráficos da tela.
+
+        Tudo sai do cache, sem tocar no disco. Com `verificar_disco` os
+        arquivos da página passam por um stat. O filtro por hash só compara
+        os hashes já calculados; quantos candidatos ainda não têm hash vai
+        em "sem_hash" (o cálculo é da tarefa de hash, ver views.buscar_arquivos).
+        """
         nome = nome.lower().strip()
         extensao = extensao.lower().strip().replace(" ", "")
         hash_md5 = hash_md5.lower().strip()
 
-        # NOVA FUNÇÃO: aceita tanto número (int) quanto string antiga ("30mb")
-        def parse_tamanho(valor):
-            if not valor:  # None, "", 0
-                return None
-            try:
-                # Caso 1: já vem como número (int/float) → nosso novo padrão do JS
-                if isinstance(valor, (int, float)):
-                    return int(valor)
-                # Caso 2: ainda vem como string (ex: "30mb", "5 gb", "1000") → compatibilidade
-                if isinstance(valor, str):
-                    valor = valor.strip().lower().replace(" ", "").replace(",", ".")
-                    mult = 1
-                    original = valor
-
-                    if valor.endswith("kb"):
-                        mult = 1024
-                        valor = valor[:-2]
-                    elif valor.endswith("mb"):
-                        mult = 1024**2
-                        valor = valor[:-2]
-                    elif valor.endswith("gb"):
-                        mult = 1024**3
-                        valor = valor[:-2]
-                    elif valor.endswith("b"):
-                        valor = valor[:-1]
-
-                    # Remove tudo que não for número ou ponto
-                    num_str = ''.join(c for c in valor if c.isdigit() or c == '.')
-                    if not num_str:
-                        return None
-                    return int(float(num_str) * mult)
-            except:
-                pass
-            return None  # Qualquer erro → ignora o filtro
-
         # Converte os filtros de tamanho
         t_min = parse_tamanho(tamanho_min)
         t_max = parse_tamanho(tamanho_max)
 
-        resultados = []
-
-        for caminho_pasta, arquivo in self.raiz.coletar_arquivos():
-            nome_ext = f"{arquivo.nome}.{arquivo.extensao}".lower()
-
-            # Filtro por nome
-            if nome and nome not in arquivo.nome.lower():
-                continue
-
-            # Filtro por extensão
-            if extensao:
-                ext_user = extensao.lstrip(".").lower()
-                ext_real = arquivo.extensao.lstrip(".").lower()
-                if ext_user != ext_real:
-                    continue
-
-            # Filtro por tamanho
-            if t_min is not None and arquivo.tamanho < t_min:
-                continue
-            if t_max is not None and arquivo.tamanho > t_max:
-                continue
-
-            # Filtro por hash MD5
-            if hash_md5:
-                if not arquivo.hash_md5:
-                    try:
-                        arquivo._calcular_hash()
-                    except:
-                        continue  # Se não conseguir calcular, pula
-                if hash_md5 not in (arquivo.hash_md5 or "").lower():
-                    continue
-
-            # Adiciona resultado
-            resultados.append({
-                "nome": f"{arquivo.nome}.{arquivo.extensao}",
-                "caminho": caminho_pasta,
-                "extensao": arquivo.extensao,
-                "tamanho": arquivo.tamanho,           # em bytes
-                "hash_md5": arquivo.hash_md5 or "",
-                "modificacao": None,
-                "origem": "cache" 
-            })
-
-        return {
-            "status": "ok" if resultados else "vazio",
-            "quantidade": len(resultados),
-            "resultados": resultados
-        }
+        # Nome, extensão e tamanho saem dos índices invertidos
+        indice = IndiceBusca.para(self.raiz)
+        ids = indice.consultar(
+            nome=nome,
+            extensao=normalizar_extensao(extensao) if extensao else None,
+            t_min=t_min,
+            t_max=t_max,
+        )
+
+        # Filtro por hash MD5
+        sem_hash = 0
+        if hash_md5:
+            sem_hash = sum(1 for i in ids if not indice.entradas[i][1].hash_md5)
+            ids = [i for i in ids if hash_md5 in (indice.entradas[i][1].hash_md5 or "").lower()]
+
+        total = len(ids) if limite is None else min(len(ids), limite)
+        inicio = (pagina - 1) * por_pagina
+        fim = min(inicio + por_pagina, total)
+
+        resultados, conferir = [], []
+        if inicio < fim:
+            # Só os `fim` primeiros na ordem pedida; a página é o final deles
+            for caminho_pasta, arquivo in indice.arquivos(indice.primeiros(ids, fim, ordenar)[inicio:]):
+                item = {
+                    "nome": arquivo.nome_arquivo,
+                    "caminho": caminho_pasta,
+                    "extensao": arquivo.extensao,
+                    "tamanho": arquivo.tamanho,           # em bytes
+                    "hash_md5": arquivo.hash_md5 or "",
+                    "mtime_ns": arquivo.mtime_ns,
+                    "modificacao": arquivo.modificacao,  # da varredura
+                    "origem": "cache"
+                }
+                if verificar_disco:
+                    conferir.append((item, arquivo.caminho_completo or os.path.join(caminho_pasta, arquivo.nome_arquivo)))
+                resultados.append(item)
+        if conferir:
+            conferir_pagina(conferir)
+
+        return resposta_busca(
+            resultados, total, len(ids), pagina, por_pagina, ordenar,
+            agregados=indice.agregar(ids) if agregados else None, sem_hash=sem_hash,
+        )
@@ -0,0 +1,200 @@
+# Metricas.py
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+LIMITE_LOG_BUSCAS_LENTAS = 5 * 1024 * 1024  # bytes; passou disso o log vira .1 e recomeça
+
+DESCRICOES = {
+    "leitor_requisicoes_total": ("counter", "Requisições atendidas, por view, método e status."),
+    "leitor_requisicao_segundos": ("histogram", "Tempo de cada requisição (até a resposta sair da view), por view."),
+    "leitor_etapa_segundos": ("histogram", "Tempo das etapas internas: carga do cache, varredura, hash, busca etc."),
+    "leitor_arquivos_varridos_total": ("counter", "Arquivos encontrados pelas varreduras."),
+    "leitor_pastas_varridas_total": ("counter", "Pastas lidas pelas varreduras."),
+    "leitor_erros_varredura_total": ("counter", "Arquivos e pastas ignorados por erro na varredura."),
+    "leitor_stat_total": ("counter", "Chamadas de stat no disco, por origem."),
+    "leitor_arquivos_hash_total": ("counter", "Arquivos que passaram pelo MotorHash."),
+    "leitor_bytes_hash_total": ("counter", "Bytes lidos pelo MotorHash."),
+    "leitor_erros_hash_total": ("counter", "Arquivos que o MotorHash não conseguiu ler."),
+    "leitor_recargas_cache_total": ("counter", "Vezes que o snapshot em memória foi relido do disco."),
+    "leitor_buscas_lentas_total": ("counter", "Buscas em /buscar-arquivos/ acima de LEITOR_BUSCA_LENTA_SEGUNDOS."),
+    "leitor_snapshot_geracao": ("gauge", "Geração atual do snapshot do cache."),
+    "leitor_snapshot_carregado": ("gauge", "1 se há uma árvore carregada no snapshot."),
+    "leitor_observador_ativo": ("gauge", "1 se o Observador está acompanhando as pastas."),
+}
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _rotulos(rotulos, extra=None):
+    itens = list(rotulos) + ([extra] if extra else [])
+    if not itens:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in itens) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    __slots__ = ("baldes", "soma", "contagem")
+
+    def __init__(self):
+        self.baldes = [0] * (len(BALDES_SEGUNDOS) + 1)  # o último é o +Inf
+        self.soma = 0.0
+        self.contagem = 0
+
+    def observar(self, valor):
+        self.baldes[bisect_left(BALDES_SEGUNDOS, valor)] += 1
+        self.soma += valor
+        self.contagem += 1
+
+
+class Metricas:
+    """
+    Contadores e tempos do processo, expostos em /metrics no formato texto
+    do Prometheus. Cada série é (nome, rótulos); os rótulos viram uma tupla
+    ordenada.
+
+    Quem instrumenta mede etapas inteiras (uma carga do cache, uma
+    varredura, um lote de hash, uma página de stat), nunca arquivo por
+    arquivo: cada registro é uma soma sob a trava. O texto só é montado
+    quando alguém lê /metrics, então sem scraping o custo é só esse.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._contadores = {}
+        self._histogramas = {}
+
+    def contar(self, nome, valor=1, **rotulos):
+        if not valor:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(segundos)
+
+    @contextmanager
+    def cronometrar(self, etapa):
+        """Mede o bloco em leitor_etapa_segundos{etapa=...} (também quando ele levanta exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar("leitor_etapa_segundos", time.perf_counter() - inicio, etapa=etapa)
+
+    def zerar(self):
+        with self._trava:
+            self._contadores.clear()
+            self._histogramas.clear()
+
+    def texto(self, medidores=None):
+        """
+        Exposição no formato texto do Prometheus (0.0.4). `medidores` são
+        gauges calculados na hora, {(nome, ((rótulo, valor), ...)): valor}.
+        """
+        with self._trava:
+            contadores = dict(self._contadores)
+            histogramas = {
+                chave: (list(h.baldes), h.soma, h.contagem) for chave, h in self._histogramas.items()
+            }
+
+        series = {}
+        for (nome, rotulos), valor in list(contadores.items()) + list((medidores or {}).items()):
+            series.setdefault(nome, []).append(f"{nome}{_rotulos(rotulos)} {_numero(valor)}")
+        for (nome, rotulos), (baldes, soma, contagem) in histogramas.items():
+            linhas = series.setdefault(nome, [])
+            acumulado = 0
+            for limite, quantidade in zip(BALDES_SEGUNDOS + ("+Inf",), baldes):
+                acumulado += quantidade
+                le = limite if isinstance(limite, str) else _numero(float(limite))
+                linhas.append(f"{nome}_bucket{_rotulos(rotulos, ('le', le))} {acumulado}")
+            linhas.append(f"{nome}_sum{_rotulos(rotulos)} {_numero(soma)}")
+            linhas.append(f"{nome}_count{_rotulos(rotulos)} {contagem}")
+
+        saida = []
+        for nome in sorted(series):
+            tipo, ajuda = DESCRICOES.get(nome, ("untyped", ""))
+            if ajuda:
+                saida.append(f"# HELP {nome} {ajuda}")
+            saida.append(f"# TYPE {nome} {tipo}")
+            saida.extend(sorted(series[nome]) if tipo != "histogram" else series[nome])
+        return "\n".join(saida) + "\n"
+
+
+_metricas = Metricas()
+
+
+def metricas():
+    """As métricas do processo."""
+    return _metricas
+
+
+def contar(nome, valor=1, **rotulos):
+    _metricas.contar(nome, valor, **rotulos)
+
+
+def cronometrar(etapa):
+    return _metricas.cronometrar(etapa)
+
+
+def registrar_busca_lenta(segundos, filtros, resultado=None):
+    """
+    Guarda uma busca lenta em Cache/buscas_lentas.jsonl (uma por linha,
+    com os filtros recebidos) e avisa no console.
+    """
+    from .utils_cache import caminho_cache
+
+    contar("leitor_buscas_lentas_total")
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "segundos": round(segundos, 3),
+        "filtros": filtros,
+        "encontrados": (resultado or {}).get("encontrados"),
+    }
+    print(f"🐢 Busca lenta ({segundos:.2f}s): {json.dumps(filtros, ensure_ascii=False)}")
+
+    caminho = caminho_cache().with_name("buscas_lentas.jsonl")
+    try:
+        os.makedirs(caminho.parent, exist_ok=True)
+        if caminho.exists() and caminho.stat().st_size > LIMITE_LOG_BUSCAS_LENTAS:
+            os.replace(caminho, caminho.with_name(caminho.name + ".1"))
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Não foi possível gravar o log de buscas lentas: {e}")
+
+
+class MiddlewareMetricas:
+    """Tempo e contagem de cada requisição, pelo nome da rota (url_name)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        segundos = time.perf_counter() - inicio
+
+        rota = getattr(request, "resolver_match", None)
+        view = (rota.url_name or rota.view_name) if rota is not None else "sem_rota"
+        _metricas.observar("leitor_requisicao_segundos", segundos, view=view)
+        _metricas.contar("leitor_requisicoes_total", view=view, metodo=request.method,
+                         status=str(response.status_code))
+        return response
@@ -0,0 +1,292 @@
+# MotorHash.py
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .Arquivo import calcular_md5
+from .Metricas import contar, metricas
+from .Progresso import OperacaoCancelada
+
+WORKERS_PADRAO = min(8, os.cpu_count() or 1)
+LIMITE_BYTES_EM_VOO = 256 * 1024 * 1024  # 256 MB lidos ao mesmo tempo, no máximo
+LOTE_MAX_ARQUIVOS = 64                  # arquivos pequenos viajam juntos
+LOTE_MAX_BYTES = 8 * 1024 * 1024
+
+MODOS = ("thread", "processo")
+
+
+def _executar_lote(funcao, caminhos):
+    """
+    Executado dentro do worker (thread ou processo).
+    Devolve uma lista de (valor, erro) na mesma ordem dos caminhos.
+    """
+    resultados = []
+    for caminho in caminhos:
+        try:
+            resultados.append((funcao(caminho), None))
+        except FileNotFoundError:
+            resultados.append((None, None))
+        except Exception as e:
+            resultados.append((None, str(e)))
+    return resultados
+
+
+def reaproveitar_hashes(raiz_antiga, raiz_nova):
+    """
+    Copia para a árvore nova os hashes da árvore antiga cujos arquivos não
+    mudaram (mesmo caminho, tamanho e mtime). Devolve um dict com quantos
+    hashes foram reaproveitados e quantos foram descartados por mudança.
+
+    O caminho é comparado exatamente (só normpath): chave_caminho ignora a
+    caixa, e no Linux A.txt e a.txt são arquivos diferentes que podem ter o
+    mesmo tamanho e mtime.
+    """
+    resultado = {"reaproveitados": 0, "invalidados": 0}
+    if raiz_antiga is None or raiz_nova is None:
+        return resultado
+
+    antigos = {}
+    for _, arquivo in raiz_antiga.iter_arquivos():
+        if arquivo.hash_md5 and arquivo.caminho_completo and not arquivo.removido:
+            antigos[os.path.normpath(arquivo.caminho_completo)] = arquivo
+
+    for _, arquivo in raiz_nova.iter_arquivos():
+        if arquivo.hash_md5 or not arquivo.caminho_completo:
+            continue
+        antigo = antigos.get(os.path.normpath(arquivo.caminho_completo))
+        if antigo is None:
+            continue
+        if arquivo.mesma_versao(antigo):
+            arquivo.hash_md5 = antigo.hash_md5
+            resultado["reaproveitados"] += 1
+        else:
+            resultado["invalidados"] += 1
+
+    print(f"♻️ Hashes reaproveitados: {resultado['reaproveitados']}, invalidados: {resultado['invalidados']}")
+    return resultado
+
+
+def revalidar_hashes(arquivos):
+    """
+    Confere no disco (um stat por arquivo) se os hashes já salvos continuam
+    valendo. Quem mudou tem o hash descartado e o stat atualizado, para ser
+    recalculado depois. Aceita Arquivo ou tuplas (caminho_pasta, Arquivo).
+    """
+    resultado = {"reaproveitados": 0, "invalidados": 0}
+    for item in arquivos:
+        arquivo = item[1] if isinstance(item, tuple) else item
+        if not arquivo.hash_md5 or not arquivo.caminho_completo:
+            continue
+        try:
+            st = os.stat(arquivo.caminho_completo)
+        except OSError:
+            arquivo.hash_md5 = None
+            resultado["invalidados"] += 1
+            continue
+
+        if arquivo.mtime_ns is not None and (arquivo.tamanho, arquivo.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            resultado["reaproveitados"] += 1
+            continue
+
+        arquivo.hash_md5 = None
+        arquivo.tamanho = st.st_size
+        arquivo.mtime_ns = st.st_mtime_ns
+        arquivo.inode = st.st_ino
+        arquivo.dispositivo = st.st_dev
+        if arquivo.ctime_ns is not None:
+            arquivo.ctime_ns = st.st_ctime_ns
+            arquivo.atime_ns = st.st_atime_ns
+        resultado["invalidados"] += 1
+
+    contar("leitor_stat_total", resultado["reaproveitados"] + resultado["invalidados"], origem="revalidacao")
+    print(f"♻️ Hashes ainda válidos: {resultado['reaproveitados']}, invalidados: {resultado['invalidados']}")
+    return resultado
+
+
+class EstatisticasHash:
+    def __init__(self):
+        self.arquivos = 0
+        self.bytes = 0
+        self.erros = 0
+        self.inicio = None
+        self.fim = None
+
+    @property
+    def segundos(self):
+        if self.inicio is None:
+            return 0.0
+        fim = self.fim if self.fim is not None else time.perf_counter()
+        return max(fim - self.inicio, 1e-9)
+
+    @property
+    def mb_por_segundo(self):
+        if self.inicio is None:
+            return 0.0
+        return self.bytes / (1024 * 1024) / self.segundos
+
+    def to_dict(self):
+        return {
+            "arquivos": self.arquivos,
+            "bytes": self.bytes,
+            "erros": self.erros,
+            "segundos": round(self.segundos, 3),
+            "mb_por_segundo": round(self.mb_por_segundo, 1),
+        }
+
+    def __repr__(self):
+        return (
+            f"{self.arquivos} arquivos, {self.bytes / (1024 * 1024):.1f} MB "
+            f"em {self.segundos:.2f}s ({self.mb_por_segundo:.1f} MB/s)"
+        )
+
+
+class MotorHash:
+    """
+    Calcula o MD5 de um lote de Arquivo em paralelo.
+
+    - modo "thread": bom para discos lentos/rede, onde o gargalo é o I/O
+      (hashlib libera o GIL enquanto processa cada bloco).
+    - modo "processo": bom para NVMe, onde o gargalo passa a ser a CPU.
+
+    Arquivos pequenos são agrupados em lotes para diminuir o custo de
+    despacho, e a quantidade de bytes em processamento ao mesmo tempo é
+    limitada por `limite_bytes`.
+
+    Com um `progresso` (ver Progresso), arquivos e bytes lidos são
+    publicados a cada lote e um cancelamento pedido descarta os lotes que
+    ainda não começaram (OperacaoCancelada).
+    """
+
+    def __init__(self, workers=None, modo="thread", limite_bytes=LIMITE_BYTES_EM_VOO, progresso=None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de hash inválido: {modo!r} (use {', '.join(MODOS)})")
+        self.workers = max(1, workers or WORKERS_PADRAO)
+        self.modo = modo
+        self.limite_bytes = max(1, limite_bytes)
+        self.progresso = progresso
+        self.estatisticas = EstatisticasHash()
+
+    def calcular(self, arquivos, somente_sem_hash=True):
+        """
+        Preenche `hash_md5` dos objetos Arquivo recebidos.
+        Aceita tanto Arquivo quanto tuplas (caminho_pasta, Arquivo),
+        como as de Pasta.iter_arquivos().
+        """
+        selecionados = []
+        for item in arquivos:
+            arquivo = item[1] if isinstance(item, tuple) else item
+            if somente_sem_hash and arquivo.hash_md5:
+                continue
+            selecionados.append(arquivo)
+
+        for arquivo, hash_md5 in self.mapear(selecionados, calcular_md5):
+            arquivo.hash_md5 = hash_md5
+
+        print(f"🔐 Hash ({self.modo}, {self.workers} workers): {self.estatisticas}")
+        return self.estatisticas
+
+    def mapear(self, arquivos, funcao, custo=None):
+        """
+        Aplica `funcao(caminho)` a cada Arquivo no pool e devolve uma lista
+        de (arquivo, valor). `funcao` precisa ser de nível de módulo (ou um
+        functools.partial dela) para funcionar no modo "processo".
+        `custo(arquivo)` diz quantos bytes cada chamada lê (padrão: tamanho).
+        """
+        self.estatisticas = EstatisticasHash()
+        self.estatisticas.inicio = time.perf_counter()
+        custo = custo or (lambda arquivo: arquivo.tamanho or 0)
+        resultados = []
+
+        lotes = self._montar_lotes(arquivos, custo, resultados)
+        if self.progresso is not None:
+            self.progresso.atualizar(
+                forcar=True, caminho_atual=None, arquivos=0, bytes=0, erros=0,
+                arquivos_total=sum(len(lote) for lote, _ in lotes),
+                bytes_total=sum(bytes_lote for _, bytes_lote in lotes),
+            )
+        if lotes:
+            Executor = ThreadPoolExecutor if self.modo == "thread" else ProcessPoolExecutor
+            with Executor(max_workers=self.workers) as executor:
+                self._despachar(executor, lotes, funcao, resultados)
+
+        self.estatisticas.fim = time.perf_counter()
+        metricas().observar("leitor_etapa_segundos", self.estatisticas.segundos, etapa="hash")
+        contar("leitor_arquivos_hash_total", self.estatisticas.arquivos)
+        contar("leitor_bytes_hash_total", self.estatisticas.bytes)
+        contar("leitor_erros_hash_total", self.estatisticas.erros)
+        if self.progresso is not None:
+            self.progresso.atualizar(
+                forcar=True, caminho_atual=None, arquivos=self.estatisticas.arquivos,
+                bytes=self.estatisticas.bytes, erros=self.estatisticas.erros,
+            )
+        return resultados
+
+    def _montar_lotes(self, arquivos, custo, resultados):
+        lotes = []
+        lote, bytes_lote = [], 0
+
+        for arquivo in arquivos:
+            if not arquivo.caminho_completo:
+                resultados.append((arquivo, None))
+                continue
+
+            bytes_arquivo = custo(arquivo)
+            if lote and (len(lote) >= LOTE_MAX_ARQUIVOS or bytes_lote + bytes_arquivo > LOTE_MAX_BYTES):
+                lotes.append((lote, bytes_lote))
+                lote, bytes_lote = [], 0
+            lote.append((arquivo, bytes_arquivo))
+            bytes_lote += bytes_arquivo
+
+        if lote:
+            lotes.append((lote, bytes_lote))
+        return lotes
+
+    def _despachar(self, executor, lotes, funcao, resultados):
+        em_voo = {}
+        bytes_em_voo = 0
+        pendentes = iter(lotes)
+        proximo = next(pendentes, None)
+
+        while proximo is not None or em_voo:
+            if self.progresso is not None and self.progresso.cancelado:
+                for futuro in em_voo:
+                    futuro.cancel()
+                raise OperacaoCancelada()
+
+            # Enfileira enquanto couber no limite (sempre ao menos um lote)
+            while proximo is not None and (not em_voo or bytes_em_voo + proximo[1] <= self.limite_bytes):
+                lote, bytes_lote = proximo
+                caminhos = [arquivo.caminho_completo for arquivo, _ in lote]
+                futuro = executor.submit(_executar_lote, funcao, caminhos)
+                em_voo[futuro] = proximo
+                bytes_em_voo += bytes_lote
+                proximo = next(pendentes, None)
+
+            prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                lote, bytes_lote = em_voo.pop(futuro)
+                bytes_em_voo -= bytes_lote
+                self._aplicar(lote, futuro, resultados)
+            if self.progresso is not None and self.progresso.precisa_publicar():
+                self.progresso.atualizar(
+                    caminho_atual=lote[-1][0].caminho_completo,
+                    arquivos=self.estatisticas.arquivos,
+                    bytes=self.estatisticas.bytes,
+                    erros=self.estatisticas.erros,
+                )
+
+    def _aplicar(self, lote, futuro, resultados):
+        try:
+            valores = futuro.result()
+        except Exception as e:
+            print(f"Erro ao processar um lote com {len(lote)} arquivos: {e}")
+            valores = [(None, str(e))] * len(lote)
+
+        for (arquivo, bytes_arquivo), (valor, erro) in zip(lote, valores):
+            resultados.append((arquivo, valor))
+            if erro:
+                print(f"Erro ao calcular hash de {arquivo.caminho_completo}: {erro}")
+                self.estatisticas.erros += 1
+            elif valor is not None:
+                self.estatisticas.arquivos += 1
+                self.estatisticas.bytes += bytes_arquivo
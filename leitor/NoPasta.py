@@ -1,4 +1,6 @@
 class NoPasta:
+    __slots__ = ("pasta", "proximo", "filho")
+
     def __init__(self, pasta):
         self.pasta = pasta
         self.proximo = None  # irmão (próxima pasta no mesmo nível)
@@ -0,0 +1,762 @@
+# Observador.py
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from functools import partial
+
+from .Arquivo import Arquivo
+from .Metricas import contar, cronometrar
+from .Pasta import Pasta
+from .Varredor import Varredor, arquivo_do_stat
+
+# Constantes do inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+MASCARA = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK
+)
+
+# wd, mask, cookie, len (seguido de `len` bytes do nome, completados com \0)
+EVENTO = struct.Struct("iIII")
+
+INTERVALO_SINCRONIZACAO = 5.0  # de quanto em quanto tempo conferir se a árvore do cache mudou
+
+# Campos que um lote do diário leva de um arquivo para o outro (ver aplicar_lote)
+CAMPOS_ESTADO = (
+    "tamanho", "mtime_ns", "ctime_ns", "atime_ns", "inode", "dispositivo", "hash_md5", "removido",
+)
+
+
+def _chave(caminho):
+    return os.path.normcase(os.path.normpath(caminho))
+
+
+def mapa_pastas(raiz):
+    """{chave do caminho: Pasta} de todas as pastas da árvore (menos a raiz sem caminho)."""
+    return {
+        _chave(pasta.caminho_completo): pasta
+        for pasta in raiz.iter_pastas() if pasta.caminho_completo
+    }
+
+
+class Inotify:
+    """O mínimo do inotify(7) do Linux, via ctypes (sem dependências)."""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify só existe no Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._adicionar = libc.inotify_add_watch
+        self._adicionar.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._remover = libc.inotify_rm_watch
+        self._remover.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            codigo = ctypes.get_errno()
+            raise OSError(codigo, os.strerror(codigo))
+
+    def observar(self, caminho, mascara=MASCARA):
+        """Watch de `caminho`; a mesma pasta (mesmo inode) devolve sempre o mesmo wd."""
+        wd = self._adicionar(self.fd, os.fsencode(caminho), mascara)
+        if wd < 0:
+            codigo = ctypes.get_errno()
+            raise OSError(codigo, os.strerror(codigo), caminho)
+        return wd
+
+    def esquecer(self, wd):
+        # Se o kernel já tirou o watch (pasta apagada), o erro não interessa
+        self._remover(self.fd, wd)
+
+    def ler(self, timeout):
+        """Eventos [(wd, máscara, cookie, nome)] que chegarem em até `timeout` segundos."""
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return []
+        try:
+            dados = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        eventos = []
+        posicao = 0
+        while posicao + EVENTO.size <= len(dados):
+            wd, mascara, cookie, tamanho = EVENTO.unpack_from(dados, posicao)
+            posicao += EVENTO.size
+            nome = dados[posicao:posicao + tamanho].rstrip(b"\0")
+            posicao += tamanho
+            eventos.append((wd, mascara, cookie, os.fsdecode(nome)))
+        return eventos
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+class MudancasArvore:
+    """
+    Leva para uma árvore (o snapshot, ver utils_cache.alterar_snapshot) o
+    estado atual no disco de caminhos que mudaram, um stat por caminho:
+
+    - arquivo existente: entra na pasta ou tem o stat atualizado (o hash é
+      descartado se tamanho, mtime ou inode mudaram);
+    - pasta que não estava na árvore: é varrida e pendurada na pai;
+    - caminho que sumiu: arquivos marcados como removidos, como na
+      atualização por varredura.
+
+    Guarda os arquivos como estavam antes (`antes`) e como ficaram
+    (`depois`), para o Resumo ser corrigido sem recalcular a árvore toda, e
+    monta o lote do diário com o que mudou (ver DiarioAlteracoes). O mesmo
+    lote, lido do diário, é reaplicado em outra árvore com aplicar_lote.
+
+    `pastas` é o mapa chave do caminho -> Pasta da árvore; quem altera a
+    mesma árvore várias vezes passa sempre o mesmo, e as pastas novas entram
+    nele.
+    """
+
+    def __init__(self, raiz, tempos_extras=False, pastas=None):
+        self.raiz = raiz
+        self.tempos_extras = tempos_extras
+        self.pastas = pastas if pastas is not None else mapa_pastas(raiz)
+        self._pastas_criadas = []  # caminhos, a pai antes das filhas
+        self._nomes = {}    # id(pasta) -> {nome no disco: Arquivo}
+        self._antes = {}    # id(arquivo) -> (caminho_pasta, cópia do arquivo antes da mudança)
+        self._depois = {}   # id(arquivo) -> (caminho_pasta, arquivo)
+        self._tocadas = {}  # chave -> Pasta com totais a recalcular
+        self.criados = self.alterados = self.removidos = self.pastas_novas = 0
+
+    @property
+    def antes(self):
+        return list(self._antes.values())
+
+    @property
+    def depois(self):
+        return list(self._depois.values())
+
+    @property
+    def houve_mudanca(self):
+        return bool(self._depois or self._tocadas)
+
+    @property
+    def mexeu_em_hash(self):
+        """True se algum arquivo com hash mudou (os duplicados precisam ser recontados)."""
+        return any(arquivo.hash_md5 for _, arquivo in self._antes.values())
+
+    @property
+    def novos(self):
+        """(caminho_pasta, Arquivo) dos arquivos que não estavam na árvore."""
+        return [item for chave, item in self._depois.items() if chave not in self._antes]
+
+    @property
+    def tamanhos_anteriores(self):
+        """(Arquivo, tamanho antes da mudança) dos arquivos que já estavam na árvore."""
+        return [(self._depois[chave][1], copia.tamanho) for chave, (_, copia) in self._antes.items()]
+
+    def lote(self, meta=None):
+        """O que mudou, no formato de uma linha do DiarioAlteracoes."""
+        return {
+            "meta": meta or {},
+            "pastas": list(self._pastas_criadas),
+            "arquivos": [[caminho, arquivo.to_dict(compacto=True)] for caminho, arquivo in self._depois.values()],
+        }
+
+    # ================================
+    # Aplicação
+    # ================================
+
+    def aplicar_caminho(self, caminho):
+        """Confere `caminho` (arquivo ou pasta) no disco e atualiza a árvore."""
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            st = None
+
+        if st is not None and stat.S_ISDIR(st.st_mode):
+            if _chave(caminho) in self.pastas:
+                self.reler_pasta(caminho)
+            else:
+                self._pasta_de(caminho)
+        elif st is not None and stat.S_ISREG(st.st_mode):
+            self._atualizar_arquivo(caminho, st)
+        else:
+            pasta = self.pastas.get(_chave(caminho))
+            if pasta is not None:
+                self._remover_pasta(pasta)
+            else:
+                self._remover_arquivo(caminho)
+
+    def reler_pasta(self, caminho):
+        """Confere o conteúdo direto de uma pasta (não a subárvore) com o disco."""
+        pasta = self.pastas.get(_chave(caminho))
+        if pasta is None:
+            self.aplicar_caminho(caminho)
+            return
+        try:
+            with os.scandir(caminho) as it:
+                entradas = list(it)
+        except OSError:
+            if not os.path.isdir(caminho):
+                self._remover_pasta(pasta)
+            return
+
+        arquivos_vistos, pastas_vistas = set(), set()
+        for entrada in entradas:
+            try:
+                if entrada.is_file():
+                    arquivos_vistos.add(os.path.normcase(entrada.name))
+                    self._atualizar_arquivo(entrada.path, entrada.stat())
+                elif entrada.is_dir():
+                    pastas_vistas.add(_chave(entrada.path))
+                    if _chave(entrada.path) not in self.pastas:
+                        self._pasta_de(entrada.path)
+            except OSError:
+                continue
+
+        for nome, arquivo in self._nomes_da(pasta).items():
+            if nome not in arquivos_vistos:
+                self._marcar_removido(pasta, arquivo)
+        atual = pasta.subpastas
+        while atual:
+            if _chave(atual.pasta.caminho_completo) not in pastas_vistas:
+                self._remover_pasta(atual.pasta)
+            atual = atual.proximo
+
+    def aplicar_lote(self, lote):
+        """Reaplica um lote do diário: cria as pastas e deixa os arquivos no estado gravado, sem ir ao disco."""
+        for caminho in lote.get("pastas", ()):
+            self._criar_pasta(caminho)
+        for caminho_pasta, dados in lote.get("arquivos", ()):
+            pasta = self._criar_pasta(caminho_pasta)
+            if pasta is None:
+                continue
+            gravado = Arquivo.from_dict(dados)
+            nomes = self._nomes_da(pasta)
+            chave = os.path.normcase(gravado.nome_arquivo)
+            arquivo = nomes.get(chave)
+            if arquivo is None:
+                pasta.adicionar_arquivo(gravado)
+                arquivo = nomes[chave] = gravado
+            else:
+                self._guardar_antes(pasta, arquivo)
+                for campo in CAMPOS_ESTADO:
+                    setattr(arquivo, campo, getattr(gravado, campo))
+            self._depois[id(arquivo)] = (pasta.caminho_completo, arquivo)
+            self._tocar(pasta)
+
+    def recalcular_totais(self):
+        """Totais das pastas mexidas e dos ancestrais delas, de baixo para cima."""
+        afetadas = dict(self._tocadas)
+        for chave in list(self._tocadas):
+            caminho = os.path.dirname(chave)
+            while caminho in self.pastas and caminho not in afetadas:
+                afetadas[caminho] = self.pastas[caminho]
+                caminho = os.path.dirname(caminho)
+        # O caminho de uma filha é sempre mais longo que o da pai
+        for chave in sorted(afetadas, key=len, reverse=True):
+            afetadas[chave].somar_totais()
+        if afetadas and not self.raiz.caminho_completo:
+            self.raiz.somar_totais()  # raiz sem caminho que junta várias pastas varridas
+
+    # ================================
+    # Auxiliares
+    # ================================
+
+    def _nomes_da(self, pasta):
+        nomes = self._nomes.get(id(pasta))
+        if nomes is None:
+            nomes = self._nomes[id(pasta)] = {
+                os.path.normcase(arquivo.nome_arquivo): arquivo for arquivo in pasta.arquivos
+            }
+        return nomes
+
+    def _criar_pasta(self, caminho):
+        """Pasta da árvore em `caminho`, criada vazia (e as ancestrais que faltarem) se for preciso."""
+        pasta = self.pastas.get(_chave(caminho))
+        if pasta is not None:
+            return pasta
+        pai_caminho = os.path.dirname(caminho)
+        if pai_caminho == caminho:
+            return None
+        pai = self._criar_pasta(pai_caminho)
+        if pai is None:
+            return None
+        pasta = Pasta(caminho, ler_conteudo=False)
+        pai.adicionar_subpasta(pasta)
+        self.pastas[_chave(caminho)] = pasta
+        self._pastas_criadas.append(caminho)
+        self._tocar(pasta)
+        return pasta
+
+    def _tocar(self, pasta):
+        self._tocadas[_chave(pasta.caminho_completo)] = pasta
+
+    def _guardar_antes(self, pasta, arquivo):
+        if id(arquivo) in self._antes:
+            return
+        copia = Arquivo(arquivo.nome, arquivo.extensao, arquivo.tamanho)
+        copia.hash_md5 = arquivo.hash_md5
+        copia.removido = arquivo.removido
+        self._antes[id(arquivo)] = (pasta.caminho_completo, copia)
+
+    def _pasta_de(self, caminho):
+        """Pasta da árvore em `caminho`; se ela existe no disco mas não na árvore, é varrida e pendurada na pai."""
+        pasta = self.pastas.get(_chave(caminho))
+        if pasta is not None or not os.path.isdir(caminho):
+            return pasta
+        pai_caminho = os.path.dirname(caminho)
+        if pai_caminho == caminho:
+            return None
+        pai = self._pasta_de(pai_caminho)
+        if pai is None:
+            return None  # fora da árvore observada
+        if _chave(caminho) in self.pastas:
+            return self.pastas[_chave(caminho)]  # veio na varredura de uma ancestral nova
+
+        nova = Varredor(tempos_extras=self.tempos_extras).varrer(caminho)
+        pai.adicionar_subpasta(nova)
+
+        for sub in nova.iter_pastas():
+            self.pastas[_chave(sub.caminho_completo)] = sub
+            self._pastas_criadas.append(sub.caminho_completo)
+            self.pastas_novas += 1
+        for caminho_pasta, arquivo in nova.iter_arquivos():
+            self._depois[id(arquivo)] = (caminho_pasta, arquivo)
+            self.criados += 1
+        self._tocar(pai)
+        return nova
+
+    def _atualizar_arquivo(self, caminho, st):
+        pasta = self._pasta_de(os.path.dirname(caminho))
+        if pasta is None:
+            return
+        nome = os.path.basename(caminho)
+        nomes = self._nomes_da(pasta)
+        arquivo = nomes.get(os.path.normcase(nome))
+
+        if arquivo is None:
+            arquivo = arquivo_do_stat(nome, caminho, st, self.tempos_extras)
+            pasta.adicionar_arquivo(arquivo)
+            nomes[os.path.normcase(nome)] = arquivo
+            self.criados += 1
+        else:
+            versao = (st.st_size, st.st_mtime_ns, st.st_ino)
+            if not arquivo.removido and (arquivo.tamanho, arquivo.mtime_ns, arquivo.inode) == versao:
+                return
+            self._guardar_antes(pasta, arquivo)
+            if (arquivo.tamanho, arquivo.mtime_ns, arquivo.inode) != versao:
+                arquivo.hash_md5 = None
+            arquivo.tamanho = st.st_size
+            arquivo.mtime_ns = st.st_mtime_ns
+            arquivo.inode = st.st_ino
+            arquivo.dispositivo = st.st_dev
+            if self.tempos_extras:
+                arquivo.ctime_ns = st.st_ctime_ns
+                arquivo.atime_ns = st.st_atime_ns
+            arquivo.removido = False
+            self.alterados += 1
+
+        self._depois[id(arquivo)] = (pasta.caminho_completo, arquivo)
+        self._tocar(pasta)
+
+    def _marcar_removido(self, pasta, arquivo):
+        if arquivo.removido:
+            return
+        self._guardar_antes(pasta, arquivo)
+        arquivo.removido = True
+        self._depois[id(arquivo)] = (pasta.caminho_completo, arquivo)
+        self.removidos += 1
+
+    def _remover_arquivo(self, caminho):
+        pasta = self.pastas.get(_chave(os.path.dirname(caminho)))
+        if pasta is None:
+            return
+        arquivo = self._nomes_da(pasta).get(os.path.normcase(os.path.basename(caminho)))
+        if arquivo is not None:
+            self._marcar_removido(pasta, arquivo)
+
+    def _remover_pasta(self, pasta):
+        for sub in pasta.iter_pastas():
+            for arquivo in self._nomes_da(sub).values():
+                self._marcar_removido(sub, arquivo)
+
+
+def _tarefa_aplicar_lote(caminhos, pastas, tempos_extras, progresso, eventos):
+    """
+    Tarefa da FilaTarefas: aplica um lote do Observador no snapshot e grava
+    só o que mudou (ver utils_cache.gravar_alteracoes), sem reler nem
+    regravar o cache inteiro.
+    """
+    from .utils_cache import trava_cache
+
+    # Um scan/update do cron pode estar gravando o mesmo cache
+    with trava_cache(progresso):
+        return _aplicar_lote(caminhos, pastas, tempos_extras, progresso, eventos)
+
+
+def _aplicar_lote(caminhos, pastas, tempos_extras, progresso, eventos):
+    from .Resumo import Resumo
+    from .utils_cache import alterar_snapshot, carregar_resumo, gravar_alteracoes
+
+    # Antes de alterar_snapshot: sem resumo gravado, ele é calculado do snapshot
+    resumo = carregar_resumo()
+    with alterar_snapshot() as (raiz, meta, pastas_da_arvore):
+        if raiz is None:
+            return "Nenhum cache para atualizar."
+
+        progresso.iniciar_etapa("aplicando alterações", arquivos_total=len(caminhos) + len(pastas))
+        mudancas = MudancasArvore(raiz, tempos_extras=tempos_extras, pastas=pastas_da_arvore)
+        feitos = 0
+        with cronometrar("observador"):
+            # Pais antes das filhas: uma pasta nova é varrida uma vez só, inteira
+            for metodo, lista in ((mudancas.reler_pasta, pastas), (mudancas.aplicar_caminho, caminhos)):
+                for caminho in sorted(lista, key=len):
+                    metodo(caminho)
+                    feitos += 1
+                    if progresso.precisa_publicar():
+                        progresso.verificar()
+                        progresso.atualizar(arquivos=feitos, caminho_atual=caminho)
+
+        if not mudancas.houve_mudanca:
+            return f"{eventos} evento(s) sem alteração no cache."
+
+        mudancas.recalcular_totais()
+        if resumo is not None:
+            resumo.subtrair(Resumo.dos_arquivos(mudancas.antes, com_duplicados=False))
+            resumo.somar(Resumo.dos_arquivos(mudancas.depois, com_duplicados=False))
+            if mudancas.mexeu_em_hash:
+                resumo.calcular_duplicados(raiz.iter_arquivos())
+
+        meta = dict(meta or {})
+        meta["data"] = datetime.now().strftime('%d_%m_%Y,%H:%M')
+        meta["observador"] = {"atualizado_em": time.time(), "eventos": eventos}
+        progresso.verificar()
+        progresso.iniciar_etapa("salvando")
+        gravar_alteracoes(mudancas, meta, resumo=resumo)
+    return (f"Alterações aplicadas: {mudancas.criados} novo(s), {mudancas.alterados} alterado(s), "
+            f"{mudancas.removidos} removido(s), {mudancas.pastas_novas} pasta(s) nova(s).")
+
+
+class Observador:
+    """
+    Acompanha as pastas do cache e transforma criações, alterações,
+    remoções e renomeações em atualizações pontuais da árvore (ver
+    MudancasArvore), sem varrer de novo o volume inteiro.
+
+    - inotify (Linux): um watch por pasta; cada evento traz o caminho exato
+      do que mudou.
+    - polling (fora do Linux, inotify indisponível ou limite de watches
+      atingido): a cada `intervalo_polling` segundos um stat de cada pasta,
+      e as que tiverem o mtime mudado são relidas (só a pasta, não a
+      subárvore). Um arquivo reescrito no lugar não muda o mtime da pasta,
+      então a cada `intervalo_polling_arquivos` segundos (bem mais
+      espaçado, porque custa um stat por arquivo) todas as pastas do
+      polling são relidas, e só os arquivos com tamanho, mtime ou inode
+      diferentes entram no lote.
+
+    Os eventos são acumulados e aplicados em lotes: um lote sai quando nada
+    novo chega por `espera` segundos, ou `espera_maxima` segundos depois do
+    primeiro evento. Cada lote é uma tarefa da FilaTarefas, então nunca roda
+    junto com uma varredura ou atualização, e o próximo só sai quando o
+    anterior terminar.
+    """
+
+    def __init__(self, espera=2.0, espera_maxima=30.0, intervalo_polling=60.0, tempos_extras=False,
+                 usar_inotify=True, intervalo_polling_arquivos=600.0):
+        self.espera = espera
+        self.espera_maxima = max(espera_maxima, espera)
+        self.intervalo_polling = intervalo_polling
+        self.intervalo_polling_arquivos = max(intervalo_polling_arquivos, intervalo_polling)
+        self.tempos_extras = tempos_extras
+        self._trava = threading.Lock()
+        self._caminhos = set()  # arquivos/pastas com evento
+        self._pastas = set()    # pastas a reler inteiras (polling, fila do inotify cheia)
+        self._primeiro_evento = None
+        self._ultimo_evento = None
+        self._watches = {}          # wd -> caminho da pasta
+        self._wd_por_chave = {}     # chave do caminho -> wd
+        self._sondadas = {}         # chave do caminho -> [caminho, mtime_ns] (polling)
+        self._limite_atingido = False
+        self._geracao = None
+        self._proxima_sincronizacao = 0.0
+        self._tarefa = None     # id da tarefa do último lote
+        self._parar = threading.Event()
+        self._thread = None
+        self.eventos = 0
+        self.lotes = 0
+        self.ultimo_lote_em = None
+
+        self.inotify = None
+        if usar_inotify:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                print(f"⚠️ inotify indisponível ({e}); usando polling a cada {intervalo_polling:.0f}s.")
+
+    # ================================
+    # API
+    # ================================
+
+    def iniciar(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._rodar, name="observador", daemon=True)
+            self._thread.start()
+            print(f"👀 Observador iniciado ({'inotify' if self.inotify else 'polling'}).")
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.inotify is not None:
+            self.inotify.fechar()
+            self.inotify = None
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def estado(self):
+        with self._trava:
+            pendentes = len(self._caminhos) + len(self._pastas)
+        return {
+            "ativo": self.ativo,
+            "modo": "inotify" if self.inotify is not None else "polling",
+            "pastas_inotify": len(self._watches),
+            "pastas_polling": len(self._sondadas),
+            "limite_watches_atingido": self._limite_atingido,
+            "eventos": self.eventos,
+            "pendentes": pendentes,
+            "lotes": self.lotes,
+            "ultimo_lote_em": self.ultimo_lote_em,
+            "tarefa": self._tarefa,
+        }
+
+    # ================================
+    # Laço
+    # ================================
+
+    def _rodar(self):
+        proxima_sondagem = time.monotonic() + self.intervalo_polling
+        proxima_releitura = time.monotonic() + self.intervalo_polling_arquivos
+        while not self._parar.is_set():
+            try:
+                if time.monotonic() >= self._proxima_sincronizacao:
+                    self._sincronizar()
+                    self._proxima_sincronizacao = time.monotonic() + INTERVALO_SINCRONIZACAO
+                if self.inotify is not None:
+                    self._tratar_eventos(self.inotify.ler(0.5))
+                else:
+                    self._parar.wait(0.5)
+                if self._sondadas and time.monotonic() >= proxima_releitura:
+                    self._marcar(pastas=[caminho for caminho, _ in self._sondadas.values()])
+                    proxima_releitura = time.monotonic() + self.intervalo_polling_arquivos
+                    proxima_sondagem = time.monotonic() + self.intervalo_polling
+                elif self._sondadas and time.monotonic() >= proxima_sondagem:
+                    self._sondar()
+                    proxima_sondagem = time.monotonic() + self.intervalo_polling
+                self._despachar()
+            except Exception:
+                traceback.print_exc()
+                self._parar.wait(5)
+
+    def _sincronizar(self):
+        """Acompanha as pastas da árvore atual do cache (novas varreduras trocam a árvore)."""
+        from .utils_cache import carregar_snapshot, info_snapshot
+
+        raiz, _ = carregar_snapshot()
+        geracao = info_snapshot()["geracao"]
+        if geracao == self._geracao:
+            return
+        self._geracao = geracao
+
+        atuais = {}
+        if raiz is not None:
+            for pasta in raiz.iter_pastas():
+                if pasta.caminho_completo:
+                    atuais[_chave(pasta.caminho_completo)] = pasta.caminho_completo
+
+        for chave in [c for c in self._wd_por_chave if c not in atuais]:
+            wd = self._wd_por_chave.pop(chave)
+            self._watches.pop(wd, None)
+            self.inotify.esquecer(wd)
+        for chave in [c for c in self._sondadas if c not in atuais]:
+            del self._sondadas[chave]
+        for chave, caminho in atuais.items():
+            if chave not in self._wd_por_chave and chave not in self._sondadas:
+                self._observar_pasta(caminho)
+
+    def _observar_pasta(self, caminho):
+        chave = _chave(caminho)
+        if self.inotify is not None and not self._limite_atingido:
+            try:
+                wd = self.inotify.observar(caminho)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                    return
+                if e.errno == errno.ENOSPC:
+                    self._limite_atingido = True
+                    print("⚠️ Limite de watches do inotify atingido (fs.inotify.max_user_watches); "
+                          "as pastas restantes vão para o polling.")
+            else:
+                anterior = self._watches.get(wd)  # mesmo inode: a pasta foi renomeada
+                if anterior is not None and self._wd_por_chave.get(_chave(anterior)) == wd:
+                    del self._wd_por_chave[_chave(anterior)]
+                self._watches[wd] = caminho
+                self._wd_por_chave[chave] = wd
+                return
+        try:
+            self._sondadas[chave] = [caminho, os.stat(caminho).st_mtime_ns]
+        except OSError:
+            pass
+
+    def _observar_subarvore(self, caminho):
+        """Pasta criada ou trazida para dentro: observa ela e as subpastas dela."""
+        pilha = [caminho]
+        while pilha:
+            atual = pilha.pop()
+            self._observar_pasta(atual)
+            try:
+                with os.scandir(atual) as it:
+                    pilha.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _tratar_eventos(self, eventos):
+        for wd, mascara, _, nome in eventos:
+            self.eventos += 1
+            if mascara & IN_Q_OVERFLOW:
+                print("⚠️ A fila do inotify transbordou; as pastas observadas serão relidas.")
+                self._marcar(pastas=list(self._watches.values()))
+                continue
+            base = self._watches.get(wd)
+            if mascara & IN_IGNORED:
+                if base is not None:
+                    del self._watches[wd]
+                    if self._wd_por_chave.get(_chave(base)) == wd:
+                        del self._wd_por_chave[_chave(base)]
+                continue
+            if base is None:
+                continue
+            if nome:
+                caminho = os.path.join(base, nome)
+            elif mascara & (IN_DELETE_SELF | IN_MOVE_SELF):
+                caminho = base  # a própria pasta (importa nas raízes, que não têm pai observada)
+            else:
+                continue
+            if mascara & IN_ISDIR and mascara & (IN_CREATE | IN_MOVED_TO):
+                self._observar_subarvore(caminho)
+            self._marcar(caminhos=[caminho])
+
+    def _sondar(self):
+        contar("leitor_stat_total", len(self._sondadas), origem="observador")
+        for chave, item in list(self._sondadas.items()):
+            caminho, mtime_ns = item
+            try:
+                atual = os.stat(caminho).st_mtime_ns
+            except OSError:
+                del self._sondadas[chave]
+                self._marcar(caminhos=[caminho])
+                continue
+            if atual != mtime_ns:
+                item[1] = atual
+                self._marcar(pastas=[caminho])
+                self._sondar_subpastas_novas(caminho)
+
+    def _sondar_subpastas_novas(self, caminho):
+        # Subpastas que apareceram entram já no polling e sem mtime de
+        # referência: na próxima rodada são relidas uma vez, o que pega o
+        # que for criado nelas antes de o lote atual chegar ao cache
+        try:
+            with os.scandir(caminho) as it:
+                novas = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+        for sub in novas:
+            self._sondadas.setdefault(_chave(sub), [sub, None])
+
+    def _marcar(self, caminhos=(), pastas=()):
+        agora = time.monotonic()
+        with self._trava:
+            self._caminhos.update(caminhos)
+            self._pastas.update(pastas)
+            if self._primeiro_evento is None:
+                self._primeiro_evento = agora
+            self._ultimo_evento = agora
+
+    def _despachar(self):
+        from .Tarefas import FINAIS, fila_tarefas
+
+        agora = time.monotonic()
+        with self._trava:
+            if not (self._caminhos or self._pastas):
+                return
+            if agora - self._ultimo_evento < self.espera and agora - self._primeiro_evento < self.espera_maxima:
+                return
+            if self._tarefa is not None:
+                anterior = fila_tarefas().obter(self._tarefa)
+                if anterior is not None and anterior["estado"] not in FINAIS:
+                    return  # os eventos continuam se juntando até o lote anterior terminar
+            caminhos, pastas = self._caminhos, self._pastas
+            self._caminhos, self._pastas = set(), set()
+            self._primeiro_evento = self._ultimo_evento = None
+
+        tarefa = fila_tarefas().enfileirar(
+            "observador", partial(_tarefa_aplicar_lote, caminhos, pastas, self.tempos_extras),
+            eventos=len(caminhos) + len(pastas),
+        )
+        self._tarefa = tarefa.id
+        self.lotes += 1
+        self.ultimo_lote_em = time.time()
+
+
+_observador = None
+_trava_observador = threading.Lock()
+
+
+def observador():
+    """O Observador do processo, ou None se ele não foi iniciado."""
+    return _observador
+
+
+def iniciar_observador():
+    """Inicia o Observador se LEITOR_OBSERVADOR = True (chamado pelo wsgi/asgi)."""
+    global _observador
+    from django.conf import settings
+
+    if not getattr(settings, "LEITOR_OBSERVADOR", False):
+        return None
+    with _trava_observador:
+        if _observador is None:
+            _observador = Observador(
+                espera=getattr(settings, "LEITOR_OBSERVADOR_ESPERA", 2.0),
+                espera_maxima=getattr(settings, "LEITOR_OBSERVADOR_ESPERA_MAXIMA", 30.0),
+                intervalo_polling=getattr(settings, "LEITOR_OBSERVADOR_POLLING", 60.0),
+                tempos_extras=getattr(settings, "LEITOR_VARREDURA_TEMPOS_EXTRAS", False),
+                usar_inotify=getattr(settings, "LEITOR_OBSERVADOR_INOTIFY", True),
+                intervalo_polling_arquivos=getattr(settings, "LEITOR_OBSERVADOR_POLLING_ARQUIVOS", 600.0),
+            )
+        _observador.iniciar()
+        return _observador
@@ -2,111 +2,230 @@ import os
 from .Arquivo import Arquivo
 from .NoPasta import NoPasta
 
+
+def chave_caminho(caminho):
+    """Forma usada para comparar caminhos de pastas e arquivos (normpath + minúsculas)."""
+    return os.path.normpath(caminho).lower() if caminho else ""
+
+
 class Pasta:
+    __slots__ = (
+        "nome", "caminho_completo", "_arquivos", "_origem", "_subpastas", "_ultima_subpasta",
+        "tamanho_total", "total_arquivos", "total_subpastas",
+    )
+
     def __init__(self, caminho: str, ler_conteudo: bool = True):
         self.nome = os.path.basename(caminho)
         self.caminho_completo = caminho
-        self.arquivos = []
-        self.subpastas = None
+        self._arquivos = []
+        # (leitor, primeiro, quantidade) dos arquivos ainda não decodificados
+        # do cache binário (ver CacheBinario); None quando já estão em _arquivos
+        self._origem = None
+        self._subpastas = None  # primeiro NoPasta da lista de filhas
+        self._ultima_subpasta = None  # último NoPasta, para adicionar_subpasta não percorrer a lista
+        # Totais acumulados da subárvore (ver calcular_totais); None = não calculado
+        self.tamanho_total = None
+        self.total_arquivos = None
+        self.total_subpastas = None
         if ler_conteudo:
             self._ler_conteudo(caminho)
 
     def _ler_conteudo(self, caminho: str):
-        anterior = None
-
-        # 🔒 protege o os.listdir
-        try:
-            itens = os.listdir(caminho)
-        except PermissionError:
-            print(f"[PERMISSÃO NEGADA] Não foi possível listar: {caminho}")
-            return
-        except OSError as e:
-            print(f"[ERRO OS] Erro ao listar {caminho}: {e}")
-            return
-
-        for item in itens:
-            full_path = os.path.join(caminho, item)
-
-            # Arquivo normal
-            if os.path.isfile(full_path):
-                try:
-                    nome, extensao = os.path.splitext(item)
-                    extensao = extensao.lstrip(".")
-                    tamanho = os.path.getsize(full_path)
-                    self.arquivos.append(Arquivo(nome, extensao, tamanho, full_path))
-                except (PermissionError, OSError) as e:
-                    print(f"[ERRO ARQUIVO] Ignorando {full_path}: {e}")
-                continue
-
-            # Subpasta
-            if os.path.isdir(full_path):
-                try:
-                    nova_pasta = Pasta(full_path)  # continua recursivo
-                except PermissionError as e:
-                    print(f"[PERMISSÃO NEGADA] Ignorando pasta {full_path}: {e}")
-                    continue
-                except OSError as e:
-                    print(f"[ERRO OS] Ignorando pasta {full_path}: {e}")
-                    continue
-
-                novo_no = NoPasta(nova_pasta)
-                if self.subpastas is None:
-                    self.subpastas = novo_no
-                else:
-                    anterior.proximo = novo_no
-                anterior = novo_no
-
+        """Lê a árvore do disco usando o Varredor (os.scandir + pool de threads)."""
+        from .Varredor import Varredor
+
+        Varredor().varrer_em(self)
+
+    @property
+    def arquivos(self):
+        # Uma leitura só: outra thread pode decodificar e zerar _origem entre o teste e o uso
+        origem = self._origem
+        if origem is not None:
+            origem[0].carregar_arquivos(self)
+        return self._arquivos
+
+    @arquivos.setter
+    def arquivos(self, valor):
+        self._origem = None
+        self._arquivos = valor
+
+    @property
+    def subpastas(self):
+        return self._subpastas
+
+    @subpastas.setter
+    def subpastas(self, no):
+        self._subpastas = no
+        self._ultima_subpasta = None
+
+    def adicionar_subpasta(self, subpasta):
+        """
+        Pendura `subpasta` no fim da lista de filhas e devolve o NoPasta.
+        O último nó fica guardado; se alguém encadeou nós por fora depois
+        dele, o resto da lista é percorrido uma vez só.
+        """
+        no = NoPasta(subpasta)
+        ultimo = self._ultima_subpasta or self._subpastas
+        if ultimo is None:
+            self._subpastas = no
+        else:
+            while ultimo.proximo:
+                ultimo = ultimo.proximo
+            ultimo.proximo = no
+        self._ultima_subpasta = no
+        return no
+
+    def adicionar_arquivo(self, arquivo):
+        """
+        Põe `arquivo` nesta pasta. Se o caminho dele for o desta pasta + nome,
+        ele deixa de ser guardado e passa a ser derivado da pasta.
+        """
+        caminho = arquivo._caminho
+        arquivo.pasta = self
+        if caminho is not None and caminho == os.path.join(self.caminho_completo, arquivo.nome_arquivo):
+            arquivo._caminho = None
+        self.arquivos.append(arquivo)
 
     def __repr__(self):
         return f"Pasta({self.nome}, arquivos={len(self.arquivos)})"
 
     def to_dict(self):
-        return {
-            "nome": self.nome,
-            "caminho_completo": self.caminho_completo,
-            "arquivos": [a.to_dict() for a in self.arquivos],
-            "subpastas": self._subpastas_to_list(self.subpastas)
-        }
-
-    def _subpastas_to_list(self, no):
-        resultado = []
-        atual = no
-        while atual:
-            resultado.append(atual.pasta.to_dict())
-            atual = atual.proximo
+        """Dict aninhado da subárvore (formato do cache.json), montado sem recursão."""
+        resultado = None
+        pilha = [(self, None)]  # (pasta, lista "subpastas" da pai)
+        while pilha:
+            pasta, destino = pilha.pop()
+            dados = {
+                "nome": pasta.nome,
+                "caminho_completo": pasta.caminho_completo,
+                "arquivos": [a.to_dict() for a in pasta.arquivos],
+                "subpastas": [],
+            }
+            if destino is None:
+                resultado = dados
+            else:
+                destino.append(dados)
+            pilha.extend((filha, dados["subpastas"]) for filha in reversed(pasta.listar_subpastas()))
         return resultado
 
     @classmethod
     def from_dict(cls, data: dict):
         """
         Reconstrói a árvore de Pasta a partir do dict (cache.json),
-        sem reler o disco de novo.
+        sem reler o disco de novo e sem recursão (a profundidade da
+        árvore não esbarra no limite do Python).
         """
-        # NÃO ler conteúdo aqui
-        pasta = cls(data["caminho_completo"], ler_conteudo=False)
-
-        # arquivos vindos do cache
-        pasta.arquivos = [Arquivo.from_dict(a) for a in data.get("arquivos", [])]
+        raiz = None
+        pilha = [(data, None)]  # (dados da pasta, Pasta pai)
+        while pilha:
+            dados, pai = pilha.pop()
+            # NÃO ler conteúdo aqui
+            pasta = cls(dados["caminho_completo"], ler_conteudo=False)
+
+            # arquivos vindos do cache
+            for a in dados.get("arquivos", []):
+                pasta.adicionar_arquivo(Arquivo.from_dict(a))
+
+            # subpastas vindas do cache (lista encadeada, na ordem do dict)
+            if pai is None:
+                raiz = pasta
+            else:
+                pai.adicionar_subpasta(pasta)
+            pilha.extend((sub, pasta) for sub in reversed(dados.get("subpastas", [])))
 
-        # subpastas vindas do cache (lista encadeada)
-        pasta.subpastas = None
-        anterior = None
+        return raiz
 
-        for subpasta_data in data.get("subpastas", []):
-            subpasta = Pasta.from_dict(subpasta_data)
-            novo_no = NoPasta(subpasta)
-            if pasta.subpastas is None:
-                pasta.subpastas = novo_no
-            else:
-                anterior.proximo = novo_no
-            anterior = novo_no
+    def listar_subpastas(self):
+        """Filhas diretas, na ordem da lista encadeada."""
+        filhas = []
+        atual = self.subpastas
+        while atual:
+            filhas.append(atual.pasta)
+            atual = atual.proximo
+        return filhas
 
-        return pasta
+    def iter_pastas(self):
+        """
+        Esta pasta e todas as de baixo, em pré-ordem (a pai antes das
+        filhas, as irmãs na ordem da lista). Usa uma pilha explícita, então
+        árvores profundas não esbarram no limite de recursão.
+        """
+        pilha = [self]
+        while pilha:
+            pasta = pilha.pop()
+            yield pasta
+            pilha.extend(reversed(pasta.listar_subpastas()))
+
+    def iter_arquivos(self):
+        """(caminho_pasta, Arquivo) de toda a subárvore, sob demanda, na ordem de iter_pastas."""
+        for pasta in self.iter_pastas():
+            caminho = pasta.caminho_completo
+            for arquivo in pasta.arquivos:
+                yield caminho, arquivo
 
     def coletar_arquivos(self):
-        arquivos = [(self.caminho_completo, arquivo) for arquivo in self.arquivos]
+        """Lista de iter_arquivos(), para quem precisa de acesso por posição ou de várias passadas."""
+        return list(self.iter_arquivos())
+
+    def indice_caminhos(self):
+        """
+        {chave_caminho(caminho): Pasta} de todas as pastas desta subárvore,
+        em pré-ordem, numa única passada. Quem vai procurar muitas pastas
+        pelo caminho monta o índice uma vez em vez de descer a árvore a cada busca.
+        """
+        return {chave_caminho(pasta.caminho_completo): pasta for pasta in self.iter_pastas()}
+
+    def calcular_totais(self):
+        """
+        Preenche tamanho_total, total_arquivos e total_subpastas de todas as
+        pastas desta subárvore numa única passada pós-ordem.
+        """
+        pilha = [(self, False)]
+        while pilha:
+            pasta, filhos_prontos = pilha.pop()
+            if filhos_prontos:
+                pasta.somar_totais()
+                continue
+            pilha.append((pasta, True))
+            pilha.extend((filha, False) for filha in pasta.listar_subpastas())
+
+    def somar_totais(self):
+        """Recalcula os totais desta pasta a partir dos arquivos e dos totais das filhas."""
+        tamanho = sum(arq.tamanho or 0 for arq in self.arquivos)
+        arquivos = len(self.arquivos)
+        subpastas = 0
         atual = self.subpastas
         while atual:
-            arquivos.extend(atual.pasta.coletar_arquivos())
+            filha = atual.pasta
+            if filha.tamanho_total is None:
+                filha.calcular_totais()
+            tamanho += filha.tamanho_total
+            arquivos += filha.total_arquivos
+            subpastas += 1 + filha.total_subpastas
             atual = atual.proximo
-        return arquivos
+        self.tamanho_total = tamanho
+        self.total_arquivos = arquivos
+        self.total_subpastas = subpastas
+
+    def pastas_sob(self, caminho):
+        """
+        Devolve (ancestrais, pastas): `pastas` são as pastas mais altas que
+        estão em `caminho` ou abaixo dele e `ancestrais` as pastas acima
+        delas, de cima para baixo. Só desce pelos ancestrais de `caminho`.
+        """
+        alvo = chave_caminho(caminho)
+        ancestrais, encontradas = [], []
+        pilha = [self]
+        while pilha:
+            pasta = pilha.pop()
+            atual = chave_caminho(pasta.caminho_completo)
+            if atual and (atual == alvo or atual.startswith(alvo + os.sep)):
+                encontradas.append(pasta)
+                continue
+            if not atual or alvo.startswith(atual.rstrip(os.sep) + os.sep):
+                ancestrais.append(pasta)
+                no = pasta.subpastas
+                while no:
+                    pilha.append(no.pasta)
+                    no = no.proximo
+        return ancestrais, encontradas
@@ -0,0 +1,96 @@
+# Progresso.py
+import threading
+import time
+
+INTERVALO_PADRAO = 0.5  # segundos entre duas publicações
+
+
+class OperacaoCancelada(Exception):
+    """Levantada por quem percebe que a tarefa teve o cancelamento pedido."""
+
+
+class Progresso:
+    """
+    Contadores de uma operação longa (varredura, hash) e o pedido de
+    cancelamento dela.
+
+    Varredor e MotorHash chamam atualizar() no laço principal; a
+    publicação para `ao_publicar` acontece no máximo a cada `intervalo`
+    segundos, então o custo no laço é uma comparação de tempo. Quem monta
+    valores caros (como o caminho atual) deve olhar precisa_publicar()
+    antes.
+    """
+
+    def __init__(self, ao_publicar=None, intervalo=INTERVALO_PADRAO):
+        self.ao_publicar = ao_publicar
+        self.intervalo = intervalo
+        self.etapa = None
+        self.contadores = {}
+        self.inicio_etapa = time.perf_counter()
+        self._proxima = 0.0
+        self._cancelar = threading.Event()
+
+    # ================================
+    # Contadores
+    # ================================
+
+    def iniciar_etapa(self, nome, **totais):
+        """Troca de etapa (ex.: "varrendo", "hash"), zerando os contadores."""
+        self.etapa = nome
+        self.contadores = dict(totais)
+        self.inicio_etapa = time.perf_counter()
+        self.publicar()
+
+    def precisa_publicar(self):
+        return time.perf_counter() >= self._proxima
+
+    def atualizar(self, forcar=False, **contadores):
+        """Guarda os contadores e publica se já passou o intervalo (ou se `forcar`)."""
+        self.contadores.update(contadores)
+        if forcar or self.precisa_publicar():
+            self.publicar()
+
+    def publicar(self):
+        self._proxima = time.perf_counter() + self.intervalo
+        if self.ao_publicar is not None:
+            self.ao_publicar(self.instantaneo())
+
+    def instantaneo(self):
+        """Etapa, contadores, percentual e ETA (quando há um total conhecido)."""
+        dados = dict(self.contadores)
+        segundos = time.perf_counter() - self.inicio_etapa
+        dados["etapa"] = self.etapa
+        dados["segundos_etapa"] = round(segundos, 1)
+
+        # Vazão da etapa: separa um disco lento de uma varredura travada
+        if segundos > 0:
+            if dados.get("arquivos"):
+                dados["arquivos_por_segundo"] = round(dados["arquivos"] / segundos, 1)
+            if dados.get("bytes"):
+                dados["mb_por_segundo"] = round(dados["bytes"] / (1024 * 1024) / segundos, 1)
+
+        # Bytes dão uma estimativa melhor que quantidade de arquivos
+        for feito, total in (("bytes", "bytes_total"), ("arquivos", "arquivos_total")):
+            if dados.get(total):
+                fracao = min(dados.get(feito, 0) / dados[total], 1.0)
+                dados["percentual"] = round(100 * fracao, 1)
+                if fracao > 0:
+                    dados["eta_segundos"] = round(segundos * (1 - fracao) / fracao, 1)
+                break
+        return dados
+
+    # ================================
+    # Cancelamento
+    # ================================
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def verificar(self):
+        """Levanta OperacaoCancelada se o cancelamento foi pedido."""
+        if self._cancelar.is_set():
+            raise OperacaoCancelada()
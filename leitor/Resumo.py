@@ -0,0 +1,139 @@
+# Resumo.py
+from collections import defaultdict
+
+from .TabelaArquivos import TabelaArquivos
+
+FAIXAS = ("gt_1gb", "between_100mb_1gb", "lt_100mb")
+
+
+class Resumo:
+    """
+    Totais da home (bytes e quantidade por extensão, faixas de tamanho,
+    duplicados por (tamanho, hash_md5)) calculados junto com a varredura e
+    gravados ao lado da árvore, para a home não precisar carregá-la. Os
+    duplicados saem da TabelaArquivos, com a mesma regra do duplicados.jsonl
+    (sem removidos nem vazios, ver Arquivo.entra_em_duplicados).
+
+    Tudo menos os duplicados é aditivo: dá para somar e subtrair resumos de
+    subárvores (ver atualizar_cache).
+    """
+
+    VERSAO = 1
+
+    def __init__(self):
+        self.caminho_raiz = ""
+        self.hash_calculado = False
+        self.total_arquivos = 0
+        self.arquivos_com_hash = 0
+        self.ext_tamanhos = defaultdict(int)
+        self.ext_quantidades = defaultdict(int)
+        self.ext_buckets = defaultdict(lambda: dict.fromkeys(FAIXAS, 0))
+        self.total_duplicados = 0
+        self.espaco_duplicado = 0
+
+    # ================================
+    # Montagem
+    # ================================
+
+    @classmethod
+    def da_arvore(cls, raiz, com_duplicados=True):
+        resumo = cls.da_tabela(TabelaArquivos.para(raiz), com_duplicados=com_duplicados)
+        resumo.caminho_raiz = raiz.caminho_completo or ""
+        return resumo
+
+    @classmethod
+    def dos_arquivos(cls, arquivos, com_duplicados=True):
+        return cls.da_tabela(TabelaArquivos(arquivos), com_duplicados=com_duplicados)
+
+    @classmethod
+    def da_tabela(cls, tabela, com_duplicados=True):
+        resumo = cls()
+        resumo.total_arquivos = len(tabela)
+        resumo.arquivos_com_hash = tabela.arquivos_com_hash()
+        for ext, totais in tabela.totais_por_extensao().items():
+            resumo.ext_quantidades[ext] = totais["quantidade"]
+            resumo.ext_tamanhos[ext] = totais["tamanho"]
+            resumo.ext_buckets[ext].update(totais["faixas"])
+        if com_duplicados:
+            resumo.total_duplicados, resumo.espaco_duplicado = tabela.estatisticas_duplicados()
+        return resumo
+
+    def somar(self, outro, sinal=1):
+        """Soma (ou subtrai, com sinal=-1) as partes aditivas de outro resumo."""
+        self.total_arquivos += sinal * outro.total_arquivos
+        self.arquivos_com_hash += sinal * outro.arquivos_com_hash
+        for ext, quantidade in outro.ext_quantidades.items():
+            self.ext_quantidades[ext] += sinal * quantidade
+            self.ext_tamanhos[ext] += sinal * outro.ext_tamanhos[ext]
+            for faixa in FAIXAS:
+                self.ext_buckets[ext][faixa] += sinal * outro.ext_buckets[ext][faixa]
+            if self.ext_quantidades[ext] <= 0:
+                del self.ext_tamanhos[ext], self.ext_quantidades[ext], self.ext_buckets[ext]
+
+    def subtrair(self, outro):
+        self.somar(outro, sinal=-1)
+
+    def calcular_duplicados(self, arquivos):
+        """
+        Duplicados por (tamanho, hash_md5). Recontam também os arquivos com
+        hash, que podem mudar fora da subárvore atualizada.
+        """
+        tabela = TabelaArquivos(arquivos)
+        self.arquivos_com_hash = tabela.arquivos_com_hash()
+        self.total_duplicados, self.espaco_duplicado = tabela.estatisticas_duplicados()
+
+    # ================================
+    # Consulta / persistência
+    # ================================
+
+    def agregados(self):
+        """Formato esperado por views._contexto_home."""
+        return {
+            "total_arquivos": self.total_arquivos,
+            "ext_tamanhos": dict(self.ext_tamanhos),
+            "ext_buckets": {ext: dict(faixas) for ext, faixas in self.ext_buckets.items()},
+            "hash_disponivel": self.arquivos_com_hash > 0,
+            "total_duplicados": self.total_duplicados,
+            "espaco_duplicado": self.espaco_duplicado,
+        }
+
+    def to_dict(self):
+        return {
+            "versao": self.VERSAO,
+            "caminho_raiz": self.caminho_raiz,
+            "hash_calculado": self.hash_calculado,
+            "total_arquivos": self.total_arquivos,
+            "arquivos_com_hash": self.arquivos_com_hash,
+            "extensoes": {
+                ext: {
+                    "quantidade": self.ext_quantidades[ext],
+                    "tamanho": self.ext_tamanhos[ext],
+                    "faixas": dict(self.ext_buckets[ext]),
+                }
+                for ext in self.ext_quantidades
+            },
+            "total_duplicados": self.total_duplicados,
+            "espaco_duplicado": self.espaco_duplicado,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Resumo salvo, ou None se o formato for de outra versão."""
+        if not data or data.get("versao") != cls.VERSAO:
+            return None
+        resumo = cls()
+        resumo.caminho_raiz = data.get("caminho_raiz", "")
+        resumo.hash_calculado = bool(data.get("hash_calculado"))
+        resumo.total_arquivos = data["total_arquivos"]
+        resumo.arquivos_com_hash = data.get("arquivos_com_hash", 0)
+        for ext, info in data.get("extensoes", {}).items():
+            resumo.ext_quantidades[ext] = info["quantidade"]
+            resumo.ext_tamanhos[ext] = info["tamanho"]
+            resumo.ext_buckets[ext].update(info["faixas"])
+        resumo.total_duplicados = data.get("total_duplicados", 0)
+        resumo.espaco_duplicado = data.get("espaco_duplicado", 0)
+        return resumo
+
+    def __repr__(self):
+        return f"Resumo({self.total_arquivos} arquivos, {len(self.ext_quantidades)} extensões)"
+
@@ -0,0 +1,255 @@
+# TabelaArquivos.py
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+
+from .Arquivo import entra_em_duplicados
+from .Metricas import metricas
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele as passadas são em Python puro
+    np = None
+
+UM_GB = 1024 ** 3
+CEM_MB = 100 * 1024 ** 2
+
+SEM_HASH = -1
+SEM_MTIME = -1
+
+
+class TabelaArquivos:
+    """
+    Inventário em colunas (uma linha por arquivo, na ordem de
+    iter_arquivos) para somas e agrupamentos sobre todos os arquivos
+    sem tocar nos objetos Arquivo:
+
+    - tamanhos, mtimes: array('q')
+    - ext_codigos: índice em `extensoes` (extensão em minúsculas)
+    - pasta_ids: índice em `caminhos_pasta`
+    - hash_ids: índice em `hashes`, ou SEM_HASH
+    - duplicaveis: 1 se o arquivo entra nos duplicados (entra_em_duplicados)
+
+    Com NumPy instalado as colunas são lidas sem cópia (np.frombuffer) e as
+    agregações viram operações vetorizadas.
+    """
+
+    _trava = threading.Lock()
+    _atual = (None, None)  # (raiz, tabela) da última árvore tabulada
+
+    def __init__(self, arquivos):
+        inicio = time.perf_counter()
+        self.arquivos = []
+        self.caminhos_pasta = []
+        self.extensoes = []
+        self.hashes = []
+        self.tamanhos = array("q")
+        self.mtimes = array("q")
+        self.ext_codigos = array("i")
+        self.pasta_ids = array("i")
+        self.hash_ids = array("i")
+        self.duplicaveis = array("b")
+
+        codigo_pasta, codigo_ext, codigo_hash = {}, {}, {}
+        for caminho_pasta, arquivo in arquivos:
+            pasta_id = codigo_pasta.get(caminho_pasta)
+            if pasta_id is None:
+                pasta_id = codigo_pasta[caminho_pasta] = len(self.caminhos_pasta)
+                self.caminhos_pasta.append(caminho_pasta)
+
+            ext = arquivo.extensao
+            ext_id = codigo_ext.get(ext)
+            if ext_id is None:
+                # extensões que só diferem na caixa dividem o mesmo código
+                minuscula = (ext or "").lower()
+                ext_id = codigo_ext.get(minuscula)
+                if ext_id is None:
+                    ext_id = codigo_ext[minuscula] = len(self.extensoes)
+                    self.extensoes.append(minuscula)
+                codigo_ext[ext] = ext_id
+
+            hash_id = SEM_HASH
+            if arquivo.hash_md5:
+                hash_id = codigo_hash.get(arquivo.hash_md5)
+                if hash_id is None:
+                    hash_id = codigo_hash[arquivo.hash_md5] = len(self.hashes)
+                    self.hashes.append(arquivo.hash_md5)
+
+            self.arquivos.append(arquivo)
+            self.tamanhos.append(arquivo.tamanho or 0)
+            self.mtimes.append(arquivo.mtime_ns if arquivo.mtime_ns is not None else SEM_MTIME)
+            self.ext_codigos.append(ext_id)
+            self.pasta_ids.append(pasta_id)
+            self.hash_ids.append(hash_id)
+            self.duplicaveis.append(entra_em_duplicados(arquivo))
+
+        self.segundos_montagem = time.perf_counter() - inicio
+        metricas().observar("leitor_etapa_segundos", self.segundos_montagem, etapa="tabela_arquivos")
+
+    @classmethod
+    def para(cls, raiz):
+        """Tabela da árvore `raiz`, reaproveitada enquanto a árvore for a mesma."""
+        raiz_atual, tabela = cls._atual
+        if raiz_atual is raiz:
+            return tabela
+        with cls._trava:
+            raiz_atual, tabela = cls._atual
+            if raiz_atual is not raiz:
+                tabela = cls(raiz.iter_arquivos())
+                cls._atual = (raiz, tabela)
+            return tabela
+
+    @classmethod
+    def descartar(cls, raiz):
+        """Esquece a tabela de `raiz` (a árvore mudou no lugar); o próximo para() remonta."""
+        with cls._trava:
+            if cls._atual[0] is raiz:
+                cls._atual = (None, None)
+
+    def __len__(self):
+        return len(self.tamanhos)
+
+    def linha(self, i):
+        """(caminho_pasta, Arquivo) da linha `i`."""
+        return self.caminhos_pasta[self.pasta_ids[i]], self.arquivos[i]
+
+    def _colunas_np(self):
+        return (
+            np.frombuffer(self.tamanhos, dtype=np.int64),
+            np.frombuffer(self.ext_codigos, dtype=np.int32),
+            np.frombuffer(self.hash_ids, dtype=np.int32),
+        )
+
+    # ================================
+    # Agregações
+    # ================================
+
+    def arquivos_com_hash(self):
+        if np is not None and len(self):
+            return int(np.count_nonzero(self._colunas_np()[2] != SEM_HASH))
+        return sum(1 for h in self.hash_ids if h != SEM_HASH)
+
+    def totais_por_extensao(self):
+        """{ext: {"quantidade", "tamanho", "faixas": {gt_1gb, between_100mb_1gb, lt_100mb}}}"""
+        n_ext = len(self.extensoes)
+        if np is not None and len(self):
+            tamanhos, ext_codigos, _ = self._colunas_np()
+            quantidades = np.bincount(ext_codigos, minlength=n_ext)
+            maiores = tamanhos > UM_GB
+            menores = tamanhos < CEM_MB
+            faixas = {}
+            for nome, mascara in (
+                ("gt_1gb", maiores),
+                ("between_100mb_1gb", ~(maiores | menores)),
+                ("lt_100mb", menores),
+            ):
+                faixas[nome] = self._somar_por_codigo(ext_codigos[mascara], tamanhos[mascara], n_ext)
+            somas = faixas["gt_1gb"] + faixas["between_100mb_1gb"] + faixas["lt_100mb"]
+            return {
+                ext: {
+                    "quantidade": int(quantidades[codigo]),
+                    "tamanho": int(somas[codigo]),
+                    "faixas": {nome: int(valores[codigo]) for nome, valores in faixas.items()},
+                }
+                for codigo, ext in enumerate(self.extensoes)
+            }
+
+        totais = {
+            ext: {"quantidade": 0, "tamanho": 0, "faixas": {"gt_1gb": 0, "between_100mb_1gb": 0, "lt_100mb": 0}}
+            for ext in self.extensoes
+        }
+        extensoes = self.extensoes
+        for codigo, tamanho in zip(self.ext_codigos, self.tamanhos):
+            total = totais[extensoes[codigo]]
+            total["quantidade"] += 1
+            total["tamanho"] += tamanho
+            if tamanho > UM_GB:
+                total["faixas"]["gt_1gb"] += tamanho
+            elif tamanho >= CEM_MB:
+                total["faixas"]["between_100mb_1gb"] += tamanho
+            else:
+                total["faixas"]["lt_100mb"] += tamanho
+        return totais
+
+    @staticmethod
+    def _somar_por_codigo(codigos, valores, minlength):
+        # bincount soma em float64: exato enquanto cada soma ficar abaixo de 2**53 bytes (8 PiB)
+        return np.rint(np.bincount(codigos, weights=valores, minlength=minlength)).astype(np.int64)
+
+    def histograma_tamanhos(self, limites):
+        """Quantidade de arquivos em cada faixa [limites[i-1], limites[i]) (len(limites) + 1 faixas)."""
+        limites = sorted(limites)
+        if np is not None and len(self):
+            tamanhos = self._colunas_np()[0]
+            faixas = np.searchsorted(np.asarray(limites, dtype=np.int64), tamanhos, side="right")
+            return [int(q) for q in np.bincount(faixas, minlength=len(limites) + 1)]
+
+        contagem = [0] * (len(limites) + 1)
+        for tamanho in self.tamanhos:
+            contagem[bisect_right(limites, tamanho)] += 1
+        return contagem
+
+    def _sequencias_np(self):
+        """
+        Linhas com hash que entram nos duplicados, ordenadas por (hash,
+        tamanho, linha), e os limites [inicio, fim) de cada sequência com a
+        mesma chave.
+        """
+        tamanhos, _, hash_ids = self._colunas_np()
+        duplicaveis = np.frombuffer(self.duplicaveis, dtype=np.int8) != 0
+        linhas = np.nonzero((hash_ids != SEM_HASH) & duplicaveis)[0]
+        if not len(linhas):
+            return None
+        ordem = linhas[np.lexsort((linhas, tamanhos[linhas], hash_ids[linhas]))]
+        chave_t, chave_h = tamanhos[ordem], hash_ids[ordem]
+        quebra = np.empty(len(ordem), dtype=bool)
+        quebra[0] = True
+        quebra[1:] = (chave_t[1:] != chave_t[:-1]) | (chave_h[1:] != chave_h[:-1])
+        inicios = np.nonzero(quebra)[0]
+        fins = np.append(inicios[1:], len(ordem))
+        return ordem, inicios, fins, chave_t, chave_h
+
+    def grupos_duplicados(self):
+        """
+        [(tamanho, hash_md5, [linhas]), ...] para os pares (tamanho, hash)
+        com mais de um arquivo, na ordem da primeira linha de cada grupo.
+        Arquivos removidos e vazios não entram (ver entra_em_duplicados).
+        """
+        if np is not None and len(self):
+            sequencias = self._sequencias_np()
+            if sequencias is None:
+                return []
+            ordem, inicios, fins, chave_t, chave_h = sequencias
+            grupos = [
+                (int(chave_t[a]), self.hashes[chave_h[a]], ordem[a:b].tolist())
+                for a, b in zip(inicios.tolist(), fins.tolist()) if b - a > 1
+            ]
+            grupos.sort(key=lambda grupo: grupo[2][0])
+            return grupos
+
+        grupos = defaultdict(list)
+        for i, (tamanho, hash_id, duplicavel) in enumerate(zip(self.tamanhos, self.hash_ids, self.duplicaveis)):
+            if hash_id != SEM_HASH and duplicavel:
+                grupos[(tamanho, hash_id)].append(i)
+        return [
+            (tamanho, self.hashes[hash_id], linhas)
+            for (tamanho, hash_id), linhas in grupos.items() if len(linhas) > 1
+        ]
+
+    def estatisticas_duplicados(self):
+        """(total_duplicados, espaco_duplicado) somando (qtd - 1) cópias de cada grupo."""
+        if np is not None and len(self):
+            sequencias = self._sequencias_np()
+            if sequencias is None:
+                return 0, 0
+            _, inicios, fins, chave_t, _ = sequencias
+            copias = (fins - inicios) - 1
+            return int(copias.sum()), int((copias * chave_t[inicios]).sum())
+
+        total = espaco = 0
+        for tamanho, _, linhas in self.grupos_duplicados():
+            total += len(linhas) - 1
+            espaco += (len(linhas) - 1) * tamanho
+        return total, espaco
@@ -0,0 +1,313 @@
+# Tarefas.py
+import json
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+from .Progresso import OperacaoCancelada, Progresso
+from .utils_serializacao import gravacao_atomica
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+CANCELADA = "cancelada"
+INTERROMPIDA = "interrompida"  # o processo terminou com a tarefa pela metade
+FINAIS = (CONCLUIDA, ERRO, CANCELADA, INTERROMPIDA)
+
+MAX_HISTORICO = 50             # varreduras, atualizações e hashes terminados
+MAX_HISTORICO_OBSERVADOR = 20  # lotes do Observador: frequentes, têm a própria cota
+
+
+class Tarefa:
+    """Uma varredura, atualização ou cálculo de hash pedido pela interface."""
+
+    def __init__(self, tipo, parametros=None, funcao=None, id=None):
+        self.id = id or uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.parametros = parametros or {}
+        self.funcao = funcao  # funcao(progresso, **parametros) -> mensagem final
+        self.estado = NA_FILA
+        self.criada_em = time.time()
+        self.iniciada_em = None
+        self.terminada_em = None
+        self.progresso = {}  # último Progresso.instantaneo()
+        self.mensagem = None
+        self.erro = None
+        self.controle = None  # Progresso da execução (cancelamento)
+        self.cancelamento_pedido = False
+
+    @property
+    def terminada(self):
+        return self.estado in FINAIS
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "parametros": self.parametros,
+            "estado": self.estado,
+            "criada_em": self.criada_em,
+            "iniciada_em": self.iniciada_em,
+            "terminada_em": self.terminada_em,
+            "progresso": self.progresso,
+            "mensagem": self.mensagem,
+            "erro": self.erro,
+            "cancelamento_pedido": self.cancelamento_pedido,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tarefa = cls(data["tipo"], data.get("parametros"), id=data["id"])
+        tarefa.estado = data.get("estado", ERRO)
+        tarefa.criada_em = data.get("criada_em")
+        tarefa.iniciada_em = data.get("iniciada_em")
+        tarefa.terminada_em = data.get("terminada_em")
+        tarefa.progresso = data.get("progresso") or {}
+        tarefa.mensagem = data.get("mensagem")
+        tarefa.erro = data.get("erro")
+        tarefa.cancelamento_pedido = bool(data.get("cancelamento_pedido"))
+        return tarefa
+
+    def __repr__(self):
+        return f"Tarefa({self.id}, {self.tipo}, {self.estado})"
+
+
+class FilaTarefas:
+    """
+    Executa as tarefas uma de cada vez numa thread em segundo plano (todas
+    regravam o mesmo cache) e guarda o estado delas em `caminho`, para que
+    o histórico sobreviva a um reinício do servidor; o que estava na fila
+    ou rodando volta como "interrompida". A fila é do processo do servidor
+    (runserver), que é quem executa e consulta as tarefas: o estado fica na
+    memória e o tarefas.json é regravado inteiro, então só um processo pode
+    ter a fila (ver fila_tarefas).
+
+    O cancelamento é cooperativo: Varredor e MotorHash olham o Progresso da
+    tarefa a cada diretório/lote.
+
+    Cada mudança de estado ou publicação de progresso incrementa `versao`;
+    aguardar() bloqueia até a próxima, para quem transmite os eventos.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = os.fspath(caminho)
+        self._trava = threading.Lock()
+        self._mudou = threading.Condition(self._trava)
+        self.versao = 0
+        self._tarefas = OrderedDict()
+        self._fila = queue.Queue()
+        self._thread = None
+        self._carregar()
+
+    # ================================
+    # API
+    # ================================
+
+    def enfileirar(self, tipo, funcao, **parametros):
+        tarefa = Tarefa(tipo, parametros, funcao)
+        with self._trava:
+            self._tarefas[tarefa.id] = tarefa
+            self._podar()
+            self._registrar_mudanca()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._trabalhar, name="fila-tarefas", daemon=True)
+                self._thread.start()
+        self._fila.put(tarefa)
+        print(f"📋 Tarefa {tarefa.id} ({tipo}) na fila.")
+        return tarefa
+
+    def obter(self, id_tarefa):
+        """Estado da tarefa (dict), ou None se ela não existir."""
+        with self._trava:
+            tarefa = self._tarefas.get(id_tarefa)
+            return tarefa.to_dict() if tarefa is not None else None
+
+    def listar(self):
+        """Tarefas conhecidas, da mais recente para a mais antiga."""
+        with self._trava:
+            tarefas = [t.to_dict() for t in self._tarefas.values()]
+        return sorted(tarefas, key=lambda t: t["criada_em"] or 0, reverse=True)
+
+    def aguardar(self, id_tarefa, versao, timeout):
+        """
+        Espera até `timeout` segundos por uma mudança posterior a `versao`
+        (None não espera). Devolve (estado da tarefa ou None, versão atual).
+        """
+        with self._mudou:
+            if versao is not None:
+                self._mudou.wait_for(lambda: self.versao != versao, timeout)
+            tarefa = self._tarefas.get(id_tarefa)
+            return (tarefa.to_dict() if tarefa is not None else None), self.versao
+
+    def cancelar(self, id_tarefa):
+        """
+        Pede o cancelamento. Na fila, a tarefa é descartada; em execução,
+        para no próximo diretório/lote. None se a tarefa não existir.
+        """
+        with self._trava:
+            tarefa = self._tarefas.get(id_tarefa)
+            if tarefa is None:
+                return None
+            if not tarefa.terminada:
+                tarefa.cancelamento_pedido = True
+                if tarefa.estado == NA_FILA:
+                    self._terminar(tarefa, CANCELADA, mensagem="Cancelada antes de começar.")
+                elif tarefa.controle is not None:
+                    tarefa.controle.cancelar()
+                self._registrar_mudanca()
+            return tarefa.to_dict()
+
+    # ================================
+    # Execução
+    # ================================
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self._fila.get()
+            try:
+                self._executar(tarefa)
+            finally:
+                self._fila.task_done()
+
+    def _executar(self, tarefa):
+        with self._trava:
+            if tarefa.terminada:  # cancelada enquanto estava na fila
+                return
+            tarefa.estado = EXECUTANDO
+            tarefa.iniciada_em = time.time()
+            tarefa.controle = Progresso(ao_publicar=lambda dados: self._publicar(tarefa, dados))
+            self._registrar_mudanca()
+
+        print(f"▶️ Tarefa {tarefa.id} ({tarefa.tipo}) iniciada.")
+        try:
+            mensagem = tarefa.funcao(tarefa.controle, **tarefa.parametros)
+        except OperacaoCancelada:
+            estado, mensagem, erro = CANCELADA, "Cancelada; o cache não foi alterado.", None
+        except Exception as e:
+            traceback.print_exc()
+            estado, mensagem, erro = ERRO, None, str(e)
+        else:
+            estado, erro = CONCLUIDA, None
+
+        with self._trava:
+            tarefa.progresso = tarefa.controle.instantaneo()
+            self._terminar(tarefa, estado, mensagem=mensagem, erro=erro)
+            self._registrar_mudanca()
+        print(f"⏹️ Tarefa {tarefa.id} ({tarefa.tipo}): {estado}.")
+
+    def _publicar(self, tarefa, dados):
+        with self._trava:
+            tarefa.progresso = dados
+            self._registrar_mudanca()
+
+    @staticmethod
+    def _terminar(tarefa, estado, mensagem=None, erro=None):
+        tarefa.estado = estado
+        tarefa.mensagem = mensagem
+        tarefa.erro = erro
+        tarefa.terminada_em = time.time()
+        tarefa.controle = None
+        tarefa.funcao = None
+
+    # ================================
+    # Persistência
+    # ================================
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                salvas = json.load(f).get("tarefas", [])
+        except (OSError, ValueError, AttributeError):
+            return
+
+        # Tarefas que estavam na fila ou rodando quando o processo parou não voltam sozinhas
+        interrompidas = False
+        for data in salvas:
+            try:
+                tarefa = Tarefa.from_dict(data)
+            except (KeyError, TypeError):
+                continue
+            if not tarefa.terminada:
+                self._terminar(tarefa, INTERROMPIDA, erro="O servidor foi reiniciado durante a tarefa.")
+                interrompidas = True
+            self._tarefas[tarefa.id] = tarefa
+        if interrompidas:
+            self._persistir()
+
+    def _podar(self):
+        """Descarta as terminadas mais antigas; os lotes do Observador não tiram espaço das outras."""
+        terminadas = {False: [], True: []}
+        for id_tarefa, t in self._tarefas.items():
+            if t.terminada:
+                terminadas[t.tipo == "observador"].append(id_tarefa)
+        for observador, ids in terminadas.items():
+            limite = MAX_HISTORICO_OBSERVADOR if observador else MAX_HISTORICO
+            for id_tarefa in ids[:max(len(ids) - limite, 0)]:
+                del self._tarefas[id_tarefa]
+
+    def _registrar_mudanca(self):
+        """Grava e acorda quem está em aguardar() (chamado com a trava)."""
+        self.versao += 1
+        self._persistir()
+        self._mudou.notify_all()
+
+    def _persistir(self):
+        """Grava todas as tarefas (chamado com a trava); troca atômica do arquivo."""
+        try:
+            os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+            with gravacao_atomica(self.caminho, "w", encoding="utf-8") as f:
+                json.dump({"tarefas": [t.to_dict() for t in self._tarefas.values()]}, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Não foi possível gravar o estado das tarefas: {e}")
+
+
+_fila = None
+_trava_fila = threading.Lock()
+_fd_dono = None  # trava de tarefas.lock, segura enquanto o processo viver
+
+
+def fila_tarefas():
+    """
+    A fila do processo, com o estado em Cache/tarefas.json (ao lado do
+    cache). Só um processo pode ter a fila: com vários workers (gunicorn
+    --workers 2, uvicorn --workers 2) cada um teria a sua, as consultas de
+    um não achariam as tarefas do outro e as varreduras rodariam juntas. O
+    wsgi/asgi cria a fila ao subir, e o segundo processo não sobe.
+    """
+    global _fila
+    with _trava_fila:
+        if _fila is None:
+            from .utils_cache import caminho_cache
+            caminho = caminho_cache().with_name("tarefas.json")
+            _reservar_fila(caminho.with_name("tarefas.lock"))
+            _fila = FilaTarefas(caminho)
+        return _fila
+
+
+def _reservar_fila(caminho):
+    """Trava `caminho` para este processo ou levanta ImproperlyConfigured se outro já tem a fila."""
+    global _fd_dono
+    from django.core.exceptions import ImproperlyConfigured
+    from .utils_cache import _tentar_travar
+
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o644)
+    if not _tentar_travar(fd):
+        os.close(fd)
+        try:
+            with open(caminho, "r", encoding="ascii") as f:
+                dono = f" (PID {int(f.read())})"
+        except (OSError, ValueError):
+            dono = ""
+        raise ImproperlyConfigured(
+            f"A fila de tarefas já é de outro processo{dono}. O Leitor roda com um só "
+            "processo de servidor (ex.: gunicorn --workers 1 --threads 8 leitor.wsgi)."
+        )
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    _fd_dono = fd
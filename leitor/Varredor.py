@@ -0,0 +1,270 @@
+# Varredor.py
+import os
+import threading
+import time
+from collections import deque
+
+from .Arquivo import Arquivo
+from .Metricas import contar, metricas
+from .Progresso import OperacaoCancelada
+
+# Varredura é limitada por I/O: vale a pena ter mais threads que núcleos
+WORKERS_PADRAO = min(32, (os.cpu_count() or 1) * 4)
+
+
+def arquivo_do_stat(nome_entrada, caminho, st, tempos_extras=False):
+    """Arquivo com os dados de `st` (stat de `caminho`), como a varredura monta."""
+    nome, extensao = os.path.splitext(nome_entrada)
+    arquivo = Arquivo(
+        nome, extensao.lstrip("."), st.st_size,
+        mtime_ns=st.st_mtime_ns, inode=st.st_ino, dispositivo=st.st_dev,
+    )
+    if tempos_extras:
+        arquivo.ctime_ns = st.st_ctime_ns
+        arquivo.atime_ns = st.st_atime_ns
+    # O caminho é derivado da pasta, salvo quando o nome não se
+    # reconstrói (ex.: "arquivo." perde o ponto no splitext)
+    if arquivo.nome_arquivo != nome_entrada:
+        arquivo.caminho_completo = caminho
+    return arquivo
+
+
+class EstatisticasVarredura:
+    def __init__(self):
+        self.arquivos = 0
+        self.pastas = 0
+        self.erros = 0
+        self.inicio = None
+        self.fim = None
+
+    @property
+    def segundos(self):
+        if self.inicio is None:
+            return 0.0
+        fim = self.fim if self.fim is not None else time.perf_counter()
+        return max(fim - self.inicio, 1e-9)
+
+    @property
+    def arquivos_por_segundo(self):
+        return self.arquivos / self.segundos if self.inicio is not None else 0.0
+
+    @property
+    def pastas_por_segundo(self):
+        return self.pastas / self.segundos if self.inicio is not None else 0.0
+
+    def to_dict(self):
+        return {
+            "arquivos": self.arquivos,
+            "pastas": self.pastas,
+            "erros": self.erros,
+            "segundos": round(self.segundos, 3),
+            "arquivos_por_segundo": round(self.arquivos_por_segundo, 1),
+            "pastas_por_segundo": round(self.pastas_por_segundo, 1),
+        }
+
+    def __repr__(self):
+        return (
+            f"{self.arquivos} arquivos, {self.pastas} pastas em {self.segundos:.2f}s "
+            f"({self.arquivos_por_segundo:.0f} arquivos/s, {self.pastas_por_segundo:.0f} pastas/s)"
+        )
+
+
+class Varredor:
+    """
+    Monta a árvore Pasta/NoPasta/Arquivo usando os.scandir, aproveitando o
+    tipo e o stat que já vêm no DirEntry em vez de isfile/isdir/getsize.
+
+    Os diretórios são distribuídos entre um pool limitado de threads. Cada
+    thread consome a própria fila pelo fim (profundidade primeiro) e, quando
+    ela esvazia, rouba trabalho do início da fila de outra thread. Sem nada
+    para roubar, a thread dorme numa Condition, avisada quando alguém
+    enfileira subpastas ou quando a varredura termina.
+
+    Com um `progresso` (ver Progresso), os contadores são publicados
+    durante a varredura e um cancelamento pedido interrompe a leitura
+    com OperacaoCancelada.
+
+    O mtime de cada arquivo sempre sai do stat do DirEntry; com
+    `tempos_extras` o ctime e o atime também são guardados.
+    """
+
+    def __init__(self, workers=None, progresso=None, tempos_extras=False):
+        self.workers = max(1, workers or WORKERS_PADRAO)
+        self.progresso = progresso
+        self.tempos_extras = tempos_extras
+        self.estatisticas = EstatisticasVarredura()
+
+    def varrer(self, caminho):
+        """Varre `caminho` e devolve a Pasta raiz já preenchida."""
+        from .Pasta import Pasta
+
+        raiz = Pasta(caminho, ler_conteudo=False)
+        self.varrer_em(raiz)
+        return raiz
+
+    def varrer_em(self, raiz):
+        """Preenche uma Pasta já criada (sem conteúdo) com a árvore do disco."""
+        self.estatisticas = EstatisticasVarredura()
+        self.estatisticas.inicio = time.perf_counter()
+
+        if self.workers == 1:
+            self._varrer_sequencial(raiz)
+        else:
+            self._varrer_paralelo(raiz)
+
+        self.estatisticas.fim = time.perf_counter()
+        self._registrar_metricas()
+        if self.progresso is not None:
+            if self.progresso.cancelado:
+                raise OperacaoCancelada()
+            self.progresso.atualizar(forcar=True, caminho_atual=None, **self._contadores([]))
+        raiz.calcular_totais()
+        print(f"📂 Varredura de {raiz.caminho_completo}: {self.estatisticas}")
+        return self.estatisticas
+
+    def _registrar_metricas(self):
+        e = self.estatisticas
+        metricas().observar("leitor_etapa_segundos", e.segundos, etapa="varredura")
+        contar("leitor_arquivos_varridos_total", e.arquivos)
+        contar("leitor_pastas_varridas_total", e.pastas)
+        contar("leitor_erros_varredura_total", e.erros)
+        contar("leitor_stat_total", e.arquivos, origem="varredura")  # um stat por arquivo
+
+    def _varrer_sequencial(self, raiz):
+        contagem = [0, 0, 0]  # arquivos, pastas, erros
+        pilha = [raiz]
+        while pilha:
+            pasta = pilha.pop()
+            pilha.extend(reversed(self._ler_diretorio(pasta, contagem)))
+            if self.progresso is not None and self._informar([contagem], pasta):
+                break
+        self._somar(contagem)
+
+    def _varrer_paralelo(self, raiz):
+        filas = [deque() for _ in range(self.workers)]
+        filas[0].append(raiz)
+        pendentes = [1]  # diretórios enfileirados e ainda não lidos
+        # Guarda `pendentes` e o empilhamento de subpastas: quem vai dormir
+        # confere as filas com a mesma trava, então nenhum aviso se perde
+        ha_trabalho = threading.Condition()
+        concluido = threading.Event()
+        contagens = [[0, 0, 0] for _ in range(self.workers)]
+
+        def proxima(indice):
+            try:
+                return filas[indice].pop()
+            except IndexError:
+                pass
+            for deslocamento in range(1, self.workers):
+                vitima = filas[(indice + deslocamento) % self.workers]
+                try:
+                    return vitima.popleft()
+                except IndexError:
+                    continue
+            return None
+
+        def encerrar():
+            with ha_trabalho:
+                concluido.set()
+                ha_trabalho.notify_all()
+
+        def trabalhar(indice):
+            propria = filas[indice]
+            contagem = contagens[indice]
+            while not concluido.is_set():
+                pasta = proxima(indice)
+                if pasta is None:
+                    with ha_trabalho:
+                        while not concluido.is_set() and not any(filas):
+                            ha_trabalho.wait()
+                    continue
+
+                subpastas = []
+                try:
+                    subpastas = self._ler_diretorio(pasta, contagem)
+                except Exception as e:
+                    contagem[2] += 1
+                    print(f"[ERRO] Falha inesperada ao ler {pasta.caminho_completo}: {e}")
+
+                with ha_trabalho:
+                    pendentes[0] += len(subpastas) - 1
+                    propria.extend(reversed(subpastas))
+                    if pendentes[0] == 0:
+                        concluido.set()
+                        ha_trabalho.notify_all()
+                    elif len(subpastas) > 1:
+                        # A primeira fica com esta thread; as outras podem ser roubadas
+                        ha_trabalho.notify(len(subpastas) - 1)
+                if self.progresso is not None and self._informar(contagens, pasta):
+                    encerrar()
+
+        threads = [
+            threading.Thread(target=trabalhar, args=(i,), name=f"varredor-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for contagem in contagens:
+            self._somar(contagem)
+
+    def _contadores(self, contagens):
+        arquivos = self.estatisticas.arquivos + sum(c[0] for c in contagens)
+        pastas = self.estatisticas.pastas + sum(c[1] for c in contagens)
+        erros = self.estatisticas.erros + sum(c[2] for c in contagens)
+        return {"arquivos": arquivos, "pastas": pastas, "erros": erros}
+
+    def _informar(self, contagens, pasta):
+        """Publica os contadores (se já for hora) e diz se a varredura deve parar."""
+        if self.progresso.precisa_publicar():
+            # As contagens de outras threads podem estar um diretório atrasadas: é só progresso
+            self.progresso.atualizar(caminho_atual=pasta.caminho_completo, **self._contadores(contagens))
+        return self.progresso.cancelado
+
+    def _somar(self, contagem):
+        self.estatisticas.arquivos += contagem[0]
+        self.estatisticas.pastas += contagem[1]
+        self.estatisticas.erros += contagem[2]
+
+    def _ler_diretorio(self, pasta, contagem):
+        """Lê um diretório, preenche `pasta` e devolve as subpastas a visitar."""
+        from .Pasta import Pasta
+
+        caminho = pasta.caminho_completo
+        try:
+            with os.scandir(caminho) as it:
+                entradas = list(it)
+        except PermissionError:
+            print(f"[PERMISSÃO NEGADA] Não foi possível listar: {caminho}")
+            contagem[2] += 1
+            return []
+        except OSError as e:
+            print(f"[ERRO OS] Erro ao listar {caminho}: {e}")
+            contagem[2] += 1
+            return []
+
+        contagem[1] += 1
+        subpastas = []
+
+        for entrada in entradas:
+            try:
+                # Arquivo normal
+                if entrada.is_file():
+                    arquivo = arquivo_do_stat(entrada.name, entrada.path, entrada.stat(), self.tempos_extras)
+                    arquivo.pasta = pasta
+                    pasta.arquivos.append(arquivo)
+                    contagem[0] += 1
+                    continue
+
+                # Subpasta
+                if entrada.is_dir():
+                    nova_pasta = Pasta(entrada.path, ler_conteudo=False)
+                    pasta.adicionar_subpasta(nova_pasta)
+                    subpastas.append(nova_pasta)
+            except (PermissionError, OSError) as e:
+                print(f"[ERRO ARQUIVO] Ignorando {entrada.path}: {e}")
+                contagem[2] += 1
+
+        return subpastas
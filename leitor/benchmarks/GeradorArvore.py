@@ -0,0 +1,113 @@
+# leitor/benchmarks/GeradorArvore.py
+import math
+import os
+import random
+import shutil
+
+DISTRIBUICOES = ("fixa", "uniforme", "lognormal")
+EXTENSOES = ("txt", "jpg", "png", "pdf", "mp4", "zip", "py", "log", "csv", "bin")
+SIGMA_LOGNORMAL = 1.5  # cauda longa: muitos arquivos pequenos e alguns grandes
+
+
+class GeradorArvore:
+    """
+    Monta uma árvore de pastas e arquivos sintética e reproduzível (mesma
+    semente = mesmos nomes, tamanhos e conteúdos) para os benchmarks:
+
+    - `profundidade` níveis abaixo da raiz, cada pasta com `largura` subpastas
+      e `arquivos_por_pasta` arquivos;
+    - tamanhos pela `distribuicao` ("fixa", "uniforme" entre 0 e o dobro da
+      média, ou "lognormal" com média `tamanho_medio`), limitados a `tamanho_maximo`;
+    - uma fração `proporcao_duplicados` dos arquivos é cópia byte a byte de
+      um arquivo gerado antes, em outra pasta ou com outro nome.
+    """
+
+    def __init__(self, profundidade=3, largura=4, arquivos_por_pasta=20, distribuicao="lognormal",
+                 tamanho_medio=64 * 1024, tamanho_maximo=4 * 1024 * 1024, proporcao_duplicados=0.1,
+                 semente=0):
+        if distribuicao not in DISTRIBUICOES:
+            raise ValueError(f"Distribuição inválida: {distribuicao!r} (use {', '.join(DISTRIBUICOES)})")
+        if profundidade < 0 or largura < 0 or arquivos_por_pasta < 0:
+            raise ValueError("profundidade, largura e arquivos_por_pasta não podem ser negativos.")
+        if not 0 <= proporcao_duplicados <= 1:
+            raise ValueError("proporcao_duplicados deve estar entre 0 e 1.")
+        self.profundidade = profundidade
+        self.largura = largura
+        self.arquivos_por_pasta = arquivos_por_pasta
+        self.distribuicao = distribuicao
+        self.tamanho_medio = max(0, tamanho_medio)
+        self.tamanho_maximo = max(self.tamanho_medio, tamanho_maximo)
+        self.proporcao_duplicados = proporcao_duplicados
+        self.semente = semente
+
+    def parametros(self):
+        return {
+            "profundidade": self.profundidade,
+            "largura": self.largura,
+            "arquivos_por_pasta": self.arquivos_por_pasta,
+            "distribuicao": self.distribuicao,
+            "tamanho_medio": self.tamanho_medio,
+            "tamanho_maximo": self.tamanho_maximo,
+            "proporcao_duplicados": self.proporcao_duplicados,
+            "semente": self.semente,
+        }
+
+    def _tamanho(self, rng):
+        if self.distribuicao == "fixa":
+            tamanho = self.tamanho_medio
+        elif self.distribuicao == "uniforme":
+            tamanho = rng.randint(0, 2 * self.tamanho_medio)
+        else:
+            if not self.tamanho_medio:
+                return 0
+            # mu escolhido para a média da lognormal ser tamanho_medio
+            mu = math.log(self.tamanho_medio) - SIGMA_LOGNORMAL ** 2 / 2
+            tamanho = int(rng.lognormvariate(mu, SIGMA_LOGNORMAL))
+        return min(tamanho, self.tamanho_maximo)
+
+    def gerar(self, destino):
+        """
+        Cria a árvore em `destino` (que não pode existir ainda) e devolve
+        os parâmetros e o que foi gerado: pastas, arquivos, bytes e duplicados.
+        """
+        destino = os.path.abspath(destino)
+        os.makedirs(destino)
+        rng = random.Random(self.semente)
+        originais = []  # arquivos com conteúdo próprio, candidatos a serem copiados
+        pastas = arquivos = duplicados = total_bytes = 0
+
+        pilha = [(destino, 0)]
+        while pilha:
+            caminho, nivel = pilha.pop()
+            pastas += 1
+            for i in range(self.arquivos_por_pasta):
+                nome = f"arquivo_{nivel}_{i}.{rng.choice(EXTENSOES)}"
+                caminho_arquivo = os.path.join(caminho, nome)
+                if originais and rng.random() < self.proporcao_duplicados:
+                    origem, tamanho = rng.choice(originais)
+                    shutil.copyfile(origem, caminho_arquivo)
+                    duplicados += 1
+                else:
+                    tamanho = self._tamanho(rng)
+                    with open(caminho_arquivo, "wb") as f:
+                        f.write(rng.randbytes(tamanho))
+                    originais.append((caminho_arquivo, tamanho))
+                arquivos += 1
+                total_bytes += tamanho
+
+            if nivel < self.profundidade:
+                for i in reversed(range(self.largura)):
+                    subpasta = os.path.join(caminho, f"pasta_{nivel + 1}_{i}")
+                    os.mkdir(subpasta)
+                    pilha.append((subpasta, nivel + 1))
+
+        print(f"🌳 Árvore sintética em {destino}: {arquivos} arquivos ({duplicados} duplicados), "
+              f"{pastas} pastas, {total_bytes / (1024 * 1024):.1f} MB.")
+        return {
+            "parametros": self.parametros(),
+            "caminho": destino,
+            "pastas": pastas,
+            "arquivos": arquivos,
+            "bytes": total_bytes,
+            "duplicados": duplicados,
+        }
@@ -0,0 +1,7 @@
+# leitor/benchmarks/__init__.py
+"""
+Benchmarks dos caminhos quentes (varredura, hash, duplicados, cache, busca
+e home) sobre árvores sintéticas reproduzíveis. Uso: python manage.py benchmark
+"""
+from .GeradorArvore import DISTRIBUICOES, GeradorArvore
+from .casos import BENCHMARKS, comparar, executar_benchmarks, medir
@@ -0,0 +1,331 @@
+# leitor/benchmarks/casos.py
+import contextlib
+import gc
+import io
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from ..DetectorDuplicatas import DetectorDuplicatas
+from ..IndiceBusca import IndiceBusca
+from ..ManipuladorPasta import ManipuladorPasta
+from ..MotorHash import MotorHash
+from ..Pasta import Pasta
+from ..Resumo import Resumo
+from ..TabelaArquivos import np
+from ..utils_cache import carregar_raiz_do_cache, invalidar_snapshot, salvar_cache
+
+VERSAO = 1
+BACKENDS_CACHE = ("binario", "json")  # o SQLite grava no banco do Django; fica de fora
+
+
+def medir(funcao, repeticoes=5, preparar=None):
+    """
+    Roda funcao() `repeticoes` vezes, com preparar() antes de cada uma
+    (fora do tempo) e os prints descartados. Devolve (medição, último
+    resultado); a medição traz os tempos e min/mediana/média/max em segundos.
+    """
+    tempos = []
+    resultado = None
+    for _ in range(max(1, repeticoes)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if preparar is not None:
+                preparar()
+            gc.collect()
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append(time.perf_counter() - inicio)
+    medicao = {
+        "repeticoes": len(tempos),
+        "min": min(tempos),
+        "mediana": statistics.median(tempos),
+        "media": statistics.fmean(tempos),
+        "max": max(tempos),
+        "segundos": tempos,
+    }
+    return medicao, resultado
+
+
+def _vazao(medicao, arquivos=None, total_bytes=None):
+    """Acrescenta arquivos/s e MB/s (pela mediana) à medição."""
+    segundos = max(medicao["mediana"], 1e-9)
+    if arquivos is not None:
+        medicao["arquivos"] = arquivos
+        medicao["arquivos_por_segundo"] = round(arquivos / segundos, 1)
+    if total_bytes is not None:
+        medicao["bytes"] = total_bytes
+        medicao["mb_por_segundo"] = round(total_bytes / (1024 * 1024) / segundos, 1)
+    return medicao
+
+
+class Contexto:
+    """O que os benchmarks compartilham: a árvore varrida e uma pasta temporária para os caches."""
+
+    def __init__(self, diretorio, repeticoes, pasta_temporaria):
+        self.diretorio = diretorio
+        self.repeticoes = repeticoes
+        self.pasta_temporaria = pasta_temporaria
+        self._raiz = None
+
+    @property
+    def raiz(self):
+        if self._raiz is None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._raiz = Pasta(self.diretorio)
+                self._raiz.calcular_totais()
+        return self._raiz
+
+    @raiz.setter
+    def raiz(self, valor):
+        self._raiz = valor
+
+    @property
+    def arquivos(self):
+        return [arquivo for _, arquivo in self.raiz.iter_arquivos()]
+
+    @property
+    def total_bytes(self):
+        return sum(arquivo.tamanho or 0 for arquivo in self.arquivos)
+
+    def garantir_hashes(self):
+        """Hashes de todos os arquivos, para a busca por hash ter o que achar."""
+        pendentes = [arquivo for arquivo in self.arquivos if not arquivo.hash_md5]
+        if pendentes:
+            with contextlib.redirect_stdout(io.StringIO()):
+                MotorHash().calcular(pendentes)
+
+    def limpar_hashes(self):
+        for arquivo in self.arquivos:
+            arquivo.hash_md5 = None
+
+    def configuracao_cache(self, backend):
+        """Settings que apontam o cache para a pasta temporária, no `backend` pedido."""
+        return override_settings(
+            CACHE_PATH=os.path.join(self.pasta_temporaria, backend, "cache.json"),
+            LEITOR_CACHE_BACKEND=backend,
+        )
+
+
+# ================================
+# Benchmarks
+# ================================
+
+def _varredura(ctx):
+    medicao, raiz = medir(lambda: Pasta(ctx.diretorio), ctx.repeticoes)
+    raiz.calcular_totais()
+    ctx.raiz = raiz
+    medicao["pastas"] = raiz.total_subpastas + 1
+    return _vazao(medicao, arquivos=raiz.total_arquivos)
+
+
+def _hash_arquivo(ctx):
+    arquivos = ctx.arquivos
+
+    def calcular():
+        for arquivo in arquivos:
+            arquivo._calcular_hash()
+
+    medicao, _ = medir(calcular, ctx.repeticoes)
+    return _vazao(medicao, arquivos=len(arquivos), total_bytes=ctx.total_bytes)
+
+
+def _hash_motor(ctx):
+    arquivos = ctx.arquivos
+    motor = MotorHash()
+    medicao, _ = medir(lambda: motor.calcular(arquivos, somente_sem_hash=False), ctx.repeticoes)
+    medicao["workers"] = motor.workers
+    medicao["modo"] = motor.modo
+    return _vazao(medicao, arquivos=len(arquivos), total_bytes=ctx.total_bytes)
+
+
+def _duplicados(ctx):
+    medicao, grupos = medir(
+        lambda: DetectorDuplicatas().detectar(ctx.raiz.iter_arquivos()),
+        ctx.repeticoes,
+        preparar=ctx.limpar_hashes,
+    )
+    medicao["grupos"] = len(grupos)
+    medicao["duplicados"] = sum(len(itens) - 1 for _, _, itens in grupos)
+    return _vazao(medicao, arquivos=len(ctx.arquivos))
+
+
+def _to_dict(ctx):
+    medicao, _ = medir(ctx.raiz.to_dict, ctx.repeticoes)
+    return _vazao(medicao, arquivos=len(ctx.arquivos))
+
+
+def _from_dict(ctx):
+    dados = ctx.raiz.to_dict()
+    medicao, _ = medir(lambda: Pasta.from_dict(dados), ctx.repeticoes)
+    return _vazao(medicao, arquivos=len(ctx.arquivos))
+
+
+def _cache_salvar(backend):
+    def benchmark(ctx):
+        resumo = Resumo.da_arvore(ctx.raiz)
+        with ctx.configuracao_cache(backend):
+            medicao, _ = medir(lambda: salvar_cache(ctx.raiz, {"hash_calculado": True}, resumo=resumo),
+                               ctx.repeticoes)
+        return _vazao(medicao, arquivos=len(ctx.arquivos))
+    return benchmark
+
+
+def _cache_carregar(backend):
+    def carregar():
+        raiz, _ = carregar_raiz_do_cache()
+        for pasta in raiz.iter_pastas():
+            pasta.arquivos  # o cache binário só decodifica os arquivos quando são lidos
+        return raiz
+
+    def benchmark(ctx):
+        with ctx.configuracao_cache(backend):
+            if carregar_raiz_do_cache()[0] is None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    salvar_cache(ctx.raiz, {"hash_calculado": True})
+            medicao, _ = medir(carregar, ctx.repeticoes)
+        return _vazao(medicao, arquivos=len(ctx.arquivos))
+    return benchmark
+
+
+def _indice_busca(ctx):
+    entradas = ctx.raiz.coletar_arquivos()
+    medicao, _ = medir(lambda: IndiceBusca(entradas), ctx.repeticoes)
+    return _vazao(medicao, arquivos=len(entradas))
+
+
+def _busca(filtros):
+    """Benchmark de ManipuladorPasta.buscar_avancado com `filtros` (o índice já montado fica fora do tempo)."""
+    def benchmark(ctx):
+        if "hash_md5" in filtros:
+            ctx.garantir_hashes()
+        manipulador = ManipuladorPasta(ctx.diretorio, raiz=ctx.raiz)
+        with contextlib.redirect_stdout(io.StringIO()):
+            IndiceBusca.para(ctx.raiz)
+        argumentos = {chave: (valor(ctx) if callable(valor) else valor) for chave, valor in filtros.items()}
+        medicao, resposta = medir(lambda: manipulador.buscar_avancado(**argumentos), ctx.repeticoes)
+        medicao["filtros"] = argumentos
+        medicao["encontrados"] = resposta["encontrados"]
+        return medicao
+    return benchmark
+
+
+def _algum_hash(ctx):
+    return next((arquivo.hash_md5[:8] for arquivo in ctx.arquivos if arquivo.hash_md5), "")
+
+
+def _home_resumo(ctx):
+    from ..views import _contexto_home
+
+    def agregar():
+        resumo = Resumo.dos_arquivos(ctx.raiz.iter_arquivos())
+        return _contexto_home(resumo.agregados(), ctx.diretorio, True)
+
+    medicao, _ = medir(agregar, ctx.repeticoes)
+    return _vazao(medicao, arquivos=len(ctx.arquivos))
+
+
+def _home_view(ctx):
+    from ..views import home
+
+    requisicao = RequestFactory().get("/")
+    with ctx.configuracao_cache("json"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            salvar_cache(ctx.raiz, {"hash_calculado": True})
+        medicao, resposta = medir(lambda: home(requisicao), ctx.repeticoes)
+    medicao["status"] = resposta.status_code
+    return medicao
+
+
+BENCHMARKS = {
+    "varredura": _varredura,
+    "hash_arquivo": _hash_arquivo,
+    "hash_motor": _hash_motor,
+    "duplicados": _duplicados,
+    "to_dict": _to_dict,
+    "from_dict": _from_dict,
+    **{f"cache_salvar_{backend}": _cache_salvar(backend) for backend in BACKENDS_CACHE},
+    **{f"cache_carregar_{backend}": _cache_carregar(backend) for backend in BACKENDS_CACHE},
+    "indice_busca": _indice_busca,
+    "busca_nome": _busca({"nome": "arquivo_1"}),
+    "busca_extensao": _busca({"extensao": "jpg"}),
+    "busca_tamanho": _busca({"tamanho_min": "16kb", "tamanho_max": "1mb"}),
+    "busca_hash": _busca({"hash_md5": _algum_hash}),
+    "busca_combinada": _busca({"nome": "arquivo", "extensao": "txt", "tamanho_min": "1kb"}),
+    "busca_ordenada": _busca({"ordenar": "-tamanho", "agregados": True}),
+    "home_resumo": _home_resumo,
+    "home_view": _home_view,
+}
+
+
+# ================================
+# Execução e comparação
+# ================================
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def executar_benchmarks(diretorio, repeticoes=5, somente=None, arvore=None, ao_terminar=None):
+    """
+    Roda os benchmarks (todos, ou os nomes em `somente`) sobre a árvore em
+    `diretorio` e devolve o relatório (um dict pronto para JSON).
+    `ao_terminar(nome, medicao)` é chamado depois de cada um.
+    """
+    nomes = list(somente or BENCHMARKS)
+    desconhecidos = [nome for nome in nomes if nome not in BENCHMARKS]
+    if desconhecidos:
+        raise ValueError(f"Benchmarks desconhecidos: {', '.join(desconhecidos)} (use {', '.join(BENCHMARKS)})")
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="leitor-bench-cache-") as pasta_temporaria:
+        ctx = Contexto(diretorio, repeticoes, pasta_temporaria)
+        try:
+            for nome in nomes:
+                resultados[nome] = BENCHMARKS[nome](ctx)
+                if ao_terminar is not None:
+                    ao_terminar(nome, resultados[nome])
+        finally:
+            invalidar_snapshot()  # o snapshot apontaria para os caches temporários
+
+    return {
+        "versao": VERSAO,
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np is not None,
+        "arvore": arvore or {"caminho": os.path.abspath(diretorio)},
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, anterior, tolerancia=0.10):
+    """
+    Compara as medianas de dois relatórios. Devolve [(nome, antes, agora,
+    variação, piorou)], só para os benchmarks que estão nos dois;
+    `piorou` quando a variação passa de `tolerancia` (0.10 = 10% mais lento).
+    """
+    comparacao = []
+    for nome, medicao in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome)
+        if not antes or not antes.get("mediana"):
+            continue
+        variacao = medicao["mediana"] / antes["mediana"] - 1
+        comparacao.append((nome, antes["mediana"], medicao["mediana"], variacao, variacao > tolerancia))
+    return comparacao
@@ -1,12 +1,10 @@
 # leitor/context_processors.py
-import json
 from datetime import datetime
-from pathlib import Path
 
-from django.conf import settings
 from django.utils import timezone
 
-CACHE_JSON_PATH = Path(settings.BASE_DIR) / "Cache" / "cache.json"
+from .Observador import observador
+from .utils_cache import info_snapshot, meta_snapshot, usar_indice_sqlite
 
 
 def _humanize_delta(delta):
@@ -28,17 +26,27 @@ def cache_info(request):
     Devolve, por exemplo:
       - cache_last_updated_label: "há 5 min", "há 2 h", "há 1 d"
       - cache_age_minutes: idade do cache em minutos (int ou None)
-      - cache_stale: True se o cache passou de 30 minutos
+      - cache_stale: True se o cache passou de 30 minutos (nunca com o
+        Observador ativo: ele mantém o cache em dia)
+      - cache_observado: True se o Observador está acompanhando as pastas
+      - cache_geracao: quantas vezes o snapshot em memória foi (re)carregado
     """
     label = "indisponível"
     cache_age_minutes = None
     cache_stale = False
+    obs = observador()
+    cache_observado = obs is not None and obs.ativo
 
     try:
-        with CACHE_JSON_PATH.open(encoding="utf-8") as f:
-            data = json.load(f)
+        # Só a meta, sem montar a árvore a cada página: no SQLite ela tem
+        # tabela própria; nos outros, vem do snapshot se ele já foi carregado
+        if usar_indice_sqlite():
+            from .IndiceSQLite import IndiceSQLite
+            data = IndiceSQLite().carregar_meta()
+        else:
+            data = meta_snapshot()
 
-        raw = data.get("data")  # string no formato "%d_%m_%Y,%H:%M"
+        raw = (data or {}).get("data")  # string no formato "%d_%m_%Y,%H:%M"
         if raw:
             dt = datetime.strptime(raw, "%d_%m_%Y,%H:%M")
             dt = timezone.make_aware(dt, timezone.get_default_timezone())
@@ -53,7 +61,7 @@ def cache_info(request):
             cache_age_minutes = max(0, int(delta.total_seconds() // 60))
 
             # considerado "velho" se passou de 30 minutos
-            if cache_age_minutes >= 30:
+            if cache_age_minutes >= 30 and not cache_observado:
                 cache_stale = True
 
     except Exception:
@@ -64,4 +72,6 @@ def cache_info(request):
         "cache_last_updated_label": label,
         "cache_age_minutes": cache_age_minutes,
         "cache_stale": cache_stale,
+        "cache_observado": cache_observado,
+        "cache_geracao": info_snapshot()["geracao"],
     }
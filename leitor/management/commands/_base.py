@@ -0,0 +1,117 @@
+# leitor/management/commands/_base.py
+import argparse
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.Progresso import INTERVALO_PADRAO, OperacaoCancelada, Progresso
+from leitor.utils_cache import existe_cache
+
+# Códigos de saída dos comandos scan, update, hash, duplicates e search,
+# para o cron e os scripts testarem $?
+SAIDA_ERRO = 1           # a operação falhou
+SAIDA_USO = 2            # argumento inválido (o mesmo código do argparse)
+SAIDA_SEM_CACHE = 3      # não há cache (ou duplicados) para ler ou atualizar
+SAIDA_CANCELADA = 130    # interrompida com Ctrl+C ou SIGTERM; o cache não foi alterado
+
+
+def inteiro_positivo(valor):
+    """type= do argparse para opções como --workers e --pagina."""
+    try:
+        numero = int(valor)
+    except ValueError:
+        numero = 0
+    if numero < 1:
+        raise argparse.ArgumentTypeError(f"deve ser um inteiro maior que zero: {valor!r}")
+    return numero
+
+
+def tamanho_legivel(tamanho):
+    for unidade in ("B", "KB", "MB", "GB"):
+        if tamanho < 1024:
+            return f"{tamanho:.0f} {unidade}" if unidade == "B" else f"{tamanho:.1f} {unidade}"
+        tamanho /= 1024
+    return f"{tamanho:.1f} TB"
+
+
+def exigir_cache():
+    if not existe_cache():
+        raise CommandError("Nenhum cache encontrado. Execute `python manage.py scan <caminho>` primeiro.",
+                           returncode=SAIDA_SEM_CACHE)
+
+
+class ComandoOperacao(BaseCommand):
+    """
+    Base dos comandos que rodam as operações da interface (varredura,
+    atualização, hash) fora do servidor web, com as mesmas funções das
+    tarefas (leitor/utils_operacoes.py). O progresso vai para o stderr: numa
+    linha só quando é um terminal, uma linha a cada INTERVALO_LOG segundos
+    quando é um log (cron). --verbosity 0 desliga o progresso.
+
+    Ctrl+C ou SIGTERM cancelam como o botão da interface: a operação para
+    no próximo ponto de verificação e o cache não é gravado. Um segundo
+    sinal encerra na hora.
+    """
+
+    INTERVALO_LOG = 10.0
+
+    def executar(self, funcao, verbosidade=1, **parametros):
+        """Roda funcao(progresso, **parametros) e mostra a mensagem que ela devolve."""
+        terminal = self.stderr.isatty()
+        progresso = Progresso(
+            ao_publicar=self._mostrar_progresso if verbosidade > 0 else None,
+            intervalo=INTERVALO_PADRAO if terminal else self.INTERVALO_LOG,
+        )
+        self._terminal = terminal
+        self._largura = 0
+
+        anteriores = {}
+
+        def _cancelar(numero, quadro):
+            progresso.cancelar()
+            signal.signal(numero, anteriores[numero])
+
+        for numero in (signal.SIGINT, signal.SIGTERM):
+            anteriores[numero] = signal.signal(numero, _cancelar)
+        try:
+            mensagem = funcao(progresso, **parametros)
+        except OperacaoCancelada:
+            raise CommandError("Cancelada; o cache não foi alterado.", returncode=SAIDA_CANCELADA)
+        except ValueError as e:
+            raise CommandError(str(e), returncode=SAIDA_ERRO)
+        finally:
+            for numero, anterior in anteriores.items():
+                signal.signal(numero, anterior)
+            if terminal and self._largura:
+                self.stderr.write("")  # termina a linha do progresso
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {mensagem}"))
+
+    def _mostrar_progresso(self, dados):
+        partes = []
+        if dados.get("arquivos_total"):
+            partes.append(f"{dados.get('arquivos', 0)}/{dados['arquivos_total']} arquivos")
+        elif "arquivos" in dados:
+            partes.append(f"{dados['arquivos']} arquivos")
+        if dados.get("pastas"):
+            partes.append(f"{dados['pastas']} pastas")
+        if dados.get("bytes"):
+            partes.append(tamanho_legivel(dados["bytes"]))
+        if dados.get("erros"):
+            partes.append(f"{dados['erros']} erros")
+        if "percentual" in dados:
+            eta = f", faltam ~{dados['eta_segundos']:.0f}s" if "eta_segundos" in dados else ""
+            partes.append(f"{dados['percentual']}%{eta}")
+        if dados.get("mb_por_segundo"):
+            partes.append(f"{dados['mb_por_segundo']} MB/s")
+        elif dados.get("arquivos_por_segundo"):
+            partes.append(f"{dados['arquivos_por_segundo']:.0f} arquivos/s")
+
+        linha = f"⏳ {dados.get('etapa') or '...'}"
+        if partes:
+            linha += ": " + ", ".join(partes)
+        if self._terminal:
+            self.stderr.write("\r" + linha.ljust(self._largura), ending="")
+            self._largura = max(self._largura, len(linha))
+        else:
+            self.stderr.write(linha)
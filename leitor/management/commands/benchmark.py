@@ -0,0 +1,132 @@
+# leitor/management/commands/benchmark.py
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.ManipuladorPasta import parse_tamanho
+from leitor.benchmarks import BENCHMARKS, DISTRIBUICOES, GeradorArvore, comparar, executar_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede os caminhos quentes (varredura, hash, duplicados, to_dict/from_dict, cache, busca e home) "
+        "numa árvore sintética reproduzível e grava o resultado em JSON, para comparar versões."
+    )
+
+    def add_arguments(self, parser):
+        arvore = parser.add_argument_group("árvore sintética")
+        arvore.add_argument("--diretorio", help="usa uma árvore já existente em vez de gerar uma")
+        arvore.add_argument("--profundidade", type=int, default=3, help="níveis abaixo da raiz (padrão: 3)")
+        arvore.add_argument("--largura", type=int, default=4, help="subpastas por pasta (padrão: 4)")
+        arvore.add_argument("--arquivos-por-pasta", type=int, default=20, help="padrão: 20")
+        arvore.add_argument("--distribuicao", choices=DISTRIBUICOES, default="lognormal",
+                            help="distribuição dos tamanhos (padrão: lognormal)")
+        arvore.add_argument("--tamanho-medio", default="64kb", help="ex.: 64kb, 1mb (padrão: 64kb)")
+        arvore.add_argument("--tamanho-maximo", default="4mb", help="padrão: 4mb")
+        arvore.add_argument("--duplicados", type=float, default=0.1,
+                            help="fração dos arquivos que são cópias de outros (padrão: 0.1)")
+        arvore.add_argument("--semente", type=int, default=0, help="mesma semente = mesma árvore (padrão: 0)")
+        arvore.add_argument("--manter", action="store_true", help="não apaga a árvore gerada no final")
+
+        parser.add_argument("--repeticoes", type=int, default=5, help="execuções de cada benchmark (padrão: 5)")
+        parser.add_argument("--somente", nargs="+", choices=list(BENCHMARKS), metavar="NOME",
+                            help=f"roda só estes benchmarks ({', '.join(BENCHMARKS)})")
+        parser.add_argument("--saida", help="grava o relatório JSON neste arquivo")
+        parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+        parser.add_argument("--comparar", metavar="ANTERIOR.json", help="compara com um relatório gravado antes")
+        parser.add_argument("--tolerancia", type=float, default=0.10,
+                            help="quanto mais lento conta como regressão na comparação (padrão: 0.10 = 10%%)")
+        parser.add_argument("--falhar-se-pior", action="store_true",
+                            help="termina com erro se algum benchmark passar da tolerância")
+
+    def handle(self, *args, **options):
+        anterior = None
+        if options["comparar"]:
+            try:
+                with open(options["comparar"], "r", encoding="utf-8") as f:
+                    anterior = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Não foi possível ler {options['comparar']}: {e}")
+
+        temporaria = None
+        if options["diretorio"]:
+            diretorio = options["diretorio"]
+            if not os.path.isdir(diretorio):
+                raise CommandError(f"O caminho '{diretorio}' não existe ou não é uma pasta.")
+            arvore = {"caminho": os.path.abspath(diretorio)}
+        else:
+            try:
+                gerador = GeradorArvore(
+                    profundidade=options["profundidade"],
+                    largura=options["largura"],
+                    arquivos_por_pasta=options["arquivos_por_pasta"],
+                    distribuicao=options["distribuicao"],
+                    tamanho_medio=parse_tamanho(options["tamanho_medio"]) or 0,
+                    tamanho_maximo=parse_tamanho(options["tamanho_maximo"]) or 0,
+                    proporcao_duplicados=options["duplicados"],
+                    semente=options["semente"],
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+            temporaria = tempfile.mkdtemp(prefix="leitor-bench-")
+            diretorio = os.path.join(temporaria, "arvore")
+            # com --json, o stdout fica só para o relatório
+            with contextlib.redirect_stdout(sys.stderr if options["json"] else sys.stdout):
+                arvore = gerador.gerar(diretorio)
+
+        def ao_terminar(nome, medicao):
+            if options["json"]:
+                return
+            vazao = ""
+            if "mb_por_segundo" in medicao:
+                vazao = f" ({medicao['mb_por_segundo']} MB/s)"
+            elif "arquivos_por_segundo" in medicao:
+                vazao = f" ({medicao['arquivos_por_segundo']:.0f} arquivos/s)"
+            self.stdout.write(f"⏱️ {nome:<24} mediana {medicao['mediana'] * 1000:9.2f} ms  "
+                              f"(min {medicao['min'] * 1000:.2f}, max {medicao['max'] * 1000:.2f}){vazao}")
+
+        try:
+            relatorio = executar_benchmarks(
+                diretorio, repeticoes=options["repeticoes"], somente=options["somente"],
+                arvore=arvore, ao_terminar=ao_terminar,
+            )
+        finally:
+            if temporaria is not None:
+                if options["manter"]:
+                    self.stdout.write(f"🌳 Árvore mantida em {diretorio}")
+                else:
+                    shutil.rmtree(temporaria, ignore_errors=True)
+
+        piores = []
+        if anterior is not None:
+            comparacao = comparar(relatorio, anterior, options["tolerancia"])
+            piores = [nome for nome, _, _, _, piorou in comparacao if piorou]
+            relatorio["comparacao"] = {
+                "com": anterior.get("commit"),
+                "tolerancia": options["tolerancia"],
+                "variacoes": {nome: variacao for nome, _, _, variacao, _ in comparacao},
+                "piores": piores,
+            }
+
+        if options["saida"]:
+            os.makedirs(os.path.dirname(os.path.abspath(options["saida"])), exist_ok=True)
+            with open(options["saida"], "w", encoding="utf-8") as f:
+                json.dump(relatorio, f, ensure_ascii=False, indent=2)
+            if not options["json"]:
+                self.stdout.write(self.style.SUCCESS(f"✅ Relatório gravado em {options['saida']}."))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, indent=2))
+        elif anterior is not None:
+            self.stdout.write(f"\n📊 Comparação com {options['comparar']} (commit {anterior.get('commit') or '?'}):")
+            for nome, antes, agora, variacao, piorou in comparacao:
+                marca = "⚠️" if piorou else "  "
+                self.stdout.write(f"{marca} {nome:<24} {antes * 1000:9.2f} ms → {agora * 1000:9.2f} ms  ({variacao:+.1%})")
+
+        if piores and options["falhar_se_pior"]:
+            raise CommandError(f"Mais lentos que a tolerância: {', '.join(piores)}")
@@ -0,0 +1,57 @@
+# leitor/management/commands/duplicates.py
+import contextlib
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.utils_cache import carregar_duplicados
+
+from ._base import SAIDA_SEM_CACHE, exigir_cache, inteiro_positivo, tamanho_legivel
+
+
+class Command(BaseCommand):
+    help = (
+        "Lista os grupos de duplicados gravados com o cache, do maior espaço desperdiçado para o menor. "
+        "Saída: 0 ok, 2 argumento inválido, 3 sem cache ou sem duplicados calculados."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON (o mesmo de /duplicados/grupos/)")
+        parser.add_argument("--pagina", type=inteiro_positivo, default=1, help="padrão: 1")
+        parser.add_argument("--por-pagina", type=inteiro_positivo, help="grupos por página (padrão: todos)")
+        parser.add_argument("--ext", default="", help="só arquivos com esta extensão")
+        parser.add_argument("--pasta", default="", help="só arquivos cujo caminho contém este texto")
+        parser.add_argument("--verificar-disco", action="store_true", help="confere no disco os arquivos listados")
+
+    def handle(self, *args, **options):
+        exigir_cache()
+        # com --json, o stdout fica só para o resultado
+        with contextlib.redirect_stdout(sys.stderr if options["json"] else sys.stdout):
+            grupos = carregar_duplicados()
+            if grupos is None:
+                raise CommandError("Nenhum duplicado calculado. Execute `python manage.py hash` primeiro.",
+                                   returncode=SAIDA_SEM_CACHE)
+
+            resultado = grupos.pagina(
+                options["pagina"], options["por_pagina"] or max(len(grupos), 1),
+                ext=options["ext"], pasta=options["pasta"], verificar_disco=options["verificar_disco"],
+            )
+        if options["json"]:
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+
+        for grupo in resultado["grupos"]:
+            self.stdout.write(
+                f"#{grupo['id']} {grupo['qtd_arquivos']} × {tamanho_legivel(grupo['tamanho'])} "
+                f"({tamanho_legivel(grupo['desperdicio'])} desperdiçados) md5 {grupo['hash']}"
+            )
+            for arquivo in grupo["arquivos"]:
+                marca = "  ❌ não existe mais" if arquivo.get("existe") is False else ""
+                self.stdout.write(f"    {arquivo['modificacao']}  {arquivo['caminho']}{marca}")
+
+        self.stdout.write(
+            f"🧮 {resultado['total_grupos']} grupos, {resultado['total_duplicados']} duplicados, "
+            f"{tamanho_legivel(resultado['espaco_duplicado'])} desperdiçados "
+            f"(página {resultado['pagina']} de {resultado['total_paginas']})."
+        )
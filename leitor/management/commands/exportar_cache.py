@@ -0,0 +1,40 @@
+# leitor/management/commands/exportar_cache.py
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.utils_cache import carregar_raiz_do_cache
+from leitor.utils_serializacao import escrever_cache
+
+
+class Command(BaseCommand):
+    help = "Exporta a árvore do cache (qualquer backend) para JSON, para ferramentas que leem o cache.json."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "destino", nargs="?", default=settings.CACHE_PATH,
+            help="arquivo JSON a gravar (padrão: settings.CACHE_PATH)",
+        )
+        parser.add_argument(
+            "--aninhado", action="store_true",
+            help="grava no formato antigo (um objeto só com \"estrutura\") em vez de uma pasta por linha",
+        )
+
+    def handle(self, *args, **options):
+        raiz, meta = carregar_raiz_do_cache()
+        if raiz is None:
+            raise CommandError("Nenhum cache encontrado. Execute uma varredura primeiro.")
+
+        destino = options["destino"]
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        if options["aninhado"]:
+            data = dict(meta or {})
+            data["estrutura"] = raiz.to_dict()
+            with open(destino, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        else:
+            escrever_cache(destino, raiz, meta)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {raiz.total_arquivos} arquivos exportados para {destino}."))
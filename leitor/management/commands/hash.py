@@ -0,0 +1,26 @@
+# leitor/management/commands/hash.py
+from leitor.utils_operacoes import tarefa_recalcular_duplicados
+
+from ._base import ComandoOperacao, exigir_cache, inteiro_positivo
+
+
+class Command(ComandoOperacao):
+    help = (
+        "Calcula os hashes do cache e recalcula os grupos de duplicados, como o 'Recalcular' da tela de "
+        "duplicados. Saída: 0 ok, 1 erro, 2 argumento inválido, 3 sem cache, 130 cancelada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=inteiro_positivo, help="workers do hash (padrão: LEITOR_HASH_WORKERS)")
+        parser.add_argument(
+            "--todos", action="store_true",
+            help="calcula o hash de todo arquivo ainda sem hash, não só dos candidatos a duplicado",
+        )
+
+    def handle(self, *args, **options):
+        exigir_cache()
+
+        self.executar(
+            tarefa_recalcular_duplicados, verbosidade=options["verbosity"],
+            workers=options["workers"], todos=options["todos"],
+        )
@@ -0,0 +1,37 @@
+# leitor/management/commands/importar_cache.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.IndiceSQLite import IndiceSQLite
+from leitor.utils_cache import ler_arquivo_cache, trava_cache
+
+
+class Command(BaseCommand):
+    help = "Importa um cache.json (ou cache.bin) existente para o índice SQLite (LEITOR_CACHE_BACKEND = \"sqlite\")."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "arquivo", nargs="?", default=settings.CACHE_PATH,
+            help="cache.json ou cache.bin a importar (padrão: settings.CACHE_PATH)",
+        )
+
+    def handle(self, *args, **options):
+        caminho = options["arquivo"]
+        if not os.path.exists(caminho):
+            raise CommandError(f"Arquivo não encontrado: {caminho}")
+
+        try:
+            raiz, data = ler_arquivo_cache(caminho)
+        except (ValueError, OSError, KeyError, TypeError) as e:
+            raise CommandError(f"Não foi possível ler {caminho}: {e}")
+
+        if raiz is None:
+            raise CommandError(f"{caminho} não tem a árvore de pastas.")
+
+        with trava_cache():
+            IndiceSQLite().salvar(raiz, data)
+
+        total = sum(1 for _ in raiz.iter_arquivos())
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} arquivos importados de {caminho}."))
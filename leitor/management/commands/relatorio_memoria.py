@@ -0,0 +1,42 @@
+# leitor/management/commands/relatorio_memoria.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.utils_cache import carregar_raiz_do_cache
+from leitor.utils_memoria import relatorio_memoria
+
+
+def _carregar_completo():
+    raiz, meta = carregar_raiz_do_cache()
+    if raiz is not None:
+        for pasta in raiz.iter_pastas():
+            pasta.arquivos  # o cache binário só decodifica os arquivos quando são lidos
+    return raiz, meta
+
+
+class Command(BaseCommand):
+    help = "Mede quanta memória a árvore do cache ocupa (total e bytes por arquivo), para dimensionar os workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="imprime o relatório em JSON")
+
+    def handle(self, *args, **options):
+        relatorio = relatorio_memoria(_carregar_completo)
+        if relatorio is None:
+            raise CommandError("Nenhum cache encontrado. Execute uma varredura primeiro.")
+
+        if options["json"]:
+            self.stdout.write(json.dumps(relatorio, ensure_ascii=False, indent=2))
+            return
+
+        mb = 1024 * 1024
+        self.stdout.write(
+            f"🧠 {relatorio['arquivos']} arquivos em {relatorio['pastas']} pastas: "
+            f"{relatorio['bytes_retidos'] / mb:.1f} MB retidos "
+            f"({relatorio['bytes_por_arquivo']:.0f} bytes/arquivo, carga em {relatorio['segundos_carga']}s)"
+        )
+        self.stdout.write(f"Estimativa por sys.getsizeof: {relatorio['estimativa_getsizeof'] / mb:.1f} MB")
+        arquivos = max(relatorio["arquivos"], 1)
+        for categoria, total in relatorio["detalhe"].items():
+            self.stdout.write(f"  {categoria:<24} {total / mb:8.1f} MB  {total / arquivos:6.0f} bytes/arquivo")
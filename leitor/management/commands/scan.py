@@ -0,0 +1,32 @@
+# leitor/management/commands/scan.py
+import os
+
+from django.core.management.base import CommandError
+
+from leitor.utils_operacoes import tarefa_nova_varredura
+
+from ._base import SAIDA_USO, ComandoOperacao, inteiro_positivo
+
+
+class Command(ComandoOperacao):
+    help = (
+        "Varre uma pasta e grava um cache novo, como a 'Nova varredura' da interface, mas fora do "
+        "servidor web (ex.: no cron). Saída: 0 ok, 1 erro, 2 caminho inválido, 130 cancelada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("caminho", help="pasta a varrer")
+        parser.add_argument("--hash", action="store_true",
+                            help="calcula o hash e os duplicados em seguida (a lista dos grupos só com --verbosity 2)")
+        parser.add_argument("--workers", type=inteiro_positivo, help="workers do hash (padrão: LEITOR_HASH_WORKERS)")
+
+    def handle(self, *args, **options):
+        caminho = options["caminho"]
+        if not os.path.isdir(caminho):
+            raise CommandError(f"O caminho '{caminho}' não existe ou não é uma pasta.", returncode=SAIDA_USO)
+
+        self.executar(
+            tarefa_nova_varredura, verbosidade=options["verbosity"],
+            scan_path=os.path.abspath(caminho), calcular_hash=options["hash"], workers=options["workers"],
+            listar_duplicados=options["verbosity"] >= 2,
+        )
@@ -0,0 +1,82 @@
+# leitor/management/commands/search.py
+import contextlib
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leitor.ManipuladorPasta import parse_tamanho
+from leitor.utils_operacoes import executar_busca, parametros_pagina
+
+from ._base import SAIDA_USO, exigir_cache, inteiro_positivo, tamanho_legivel
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca arquivos no cache com os mesmos filtros de /buscar-arquivos/, sem o servidor web. "
+        "Saída: 0 ok (mesmo sem resultados), 2 argumento inválido, 3 sem cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("nome", nargs="?", default="", help="parte do nome do arquivo")
+        parser.add_argument("--extensao", default="", help="ex.: pdf ou pdf,jpg")
+        parser.add_argument("--tamanho-min", default="", help="ex.: 100mb")
+        parser.add_argument("--tamanho-max", default="", help="ex.: 1gb")
+        parser.add_argument("--hash", default="", help="MD5 do conteúdo")
+        parser.add_argument("--ordenar", default="", help="tamanho, nome ou caminho; decrescente com '-' (--ordenar=-tamanho)")
+        parser.add_argument("--pagina", type=inteiro_positivo, default=1, help="padrão: 1")
+        parser.add_argument("--por-pagina", type=inteiro_positivo, help="padrão: o mesmo da tela")
+        parser.add_argument("--limite", type=inteiro_positivo, help="máximo de resultados navegáveis")
+        parser.add_argument("--verificar-disco", action="store_true",
+                            help="confere no disco os arquivos da página (data e tamanho atuais)")
+        parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON (o mesmo de /buscar-arquivos/)")
+
+    def handle(self, *args, **options):
+        # parse_tamanho ignora o que não entende; aqui isso viraria uma busca sem o filtro
+        for opcao in ("tamanho_min", "tamanho_max"):
+            if options[opcao] and parse_tamanho(options[opcao]) is None:
+                raise CommandError(
+                    f"--{opcao.replace('_', '-')} inválido: {options[opcao]!r} (ex.: 2048, 100kb, 1.5gb)",
+                    returncode=SAIDA_USO,
+                )
+        filtros = {
+            "nome": options["nome"],
+            "extensao": options["extensao"],
+            "tamanho_min": options["tamanho_min"],
+            "tamanho_max": options["tamanho_max"],
+            "hash": options["hash"],
+            "pagina": options["pagina"],
+            "por_pagina": options["por_pagina"],
+            "ordenar": options["ordenar"],
+            "limite": options["limite"],
+        }
+        try:
+            paginacao = parametros_pagina(filtros)
+        except ValueError as e:
+            raise CommandError(str(e), returncode=SAIDA_USO)
+        paginacao["verificar_disco"] = options["verificar_disco"]
+        exigir_cache()
+
+        # com --json, o stdout fica só para o resultado
+        with contextlib.redirect_stdout(sys.stderr if options["json"] else sys.stdout):
+            resultado = executar_busca(filtros, paginacao)
+        if options["json"]:
+            self.stdout.write(json.dumps(resultado, ensure_ascii=False, indent=2))
+            return
+
+        for item in resultado["resultados"]:
+            marca = "  ❌ não existe mais" if item.get("existe") is False else ""
+            self.stdout.write(
+                f"{tamanho_legivel(item['tamanho']):>10}  {item['modificacao']}  "
+                f"{os.path.join(item['caminho'], item['nome'])}{marca}"
+            )
+        self.stdout.write(
+            f"🔎 {resultado['encontrados']} encontrados "
+            f"(página {resultado['pagina']} de {resultado['total_paginas']})."
+        )
+        if resultado.get("sem_hash"):
+            self.stderr.write(
+                f"⚠️ {resultado['sem_hash']} arquivos ainda sem hash ficaram fora do filtro; "
+                "calcule com `python manage.py hash --todos`."
+            )
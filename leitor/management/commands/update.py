@@ -0,0 +1,31 @@
+# leitor/management/commands/update.py
+import os
+
+from django.core.management.base import CommandError
+
+from leitor.utils_operacoes import tarefa_atualizar_cache
+
+from ._base import SAIDA_USO, ComandoOperacao, exigir_cache, inteiro_positivo
+
+
+class Command(ComandoOperacao):
+    help = (
+        "Varre de novo só uma pasta e mescla o resultado no cache existente, como o 'Atualizar cache' "
+        "da interface. Saída: 0 ok, 1 erro, 2 caminho inválido, 3 sem cache, 130 cancelada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("caminho", help="pasta a varrer de novo")
+        parser.add_argument("--hash", action="store_true", help="calcula o hash dos arquivos ainda sem hash")
+        parser.add_argument("--workers", type=inteiro_positivo, help="workers do hash (padrão: LEITOR_HASH_WORKERS)")
+
+    def handle(self, *args, **options):
+        caminho = options["caminho"]
+        if not os.path.isdir(caminho):
+            raise CommandError(f"O caminho '{caminho}' não existe ou não é uma pasta.", returncode=SAIDA_USO)
+        exigir_cache()
+
+        self.executar(
+            tarefa_atualizar_cache, verbosidade=options["verbosity"],
+            scan_path=os.path.abspath(caminho), calcular_hash=options["hash"], workers=options["workers"],
+        )
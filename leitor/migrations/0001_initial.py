@@ -0,0 +1,52 @@
+# Generated by Django 4.2 on 2026-10-17 22:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaIndice',
+            fields=[
+                ('chave', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('valor', models.JSONField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PastaIndexada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.TextField(db_index=True)),
+                ('caminho_completo', models.TextField()),
+                ('pai', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='subpastas', to='leitor.pastaindexada')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArquivoIndexado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.TextField()),
+                ('extensao', models.TextField()),
+                ('extensao_busca', models.TextField(db_index=True)),
+                ('tamanho', models.BigIntegerField(db_index=True)),
+                ('hash_md5', models.CharField(db_index=True, max_length=32, null=True)),
+                ('caminho_completo', models.TextField(null=True)),
+                ('removido', models.BooleanField(default=False)),
+                ('mtime_ns', models.BigIntegerField(null=True)),
+                ('inode', models.BigIntegerField(null=True)),
+                ('dispositivo', models.BigIntegerField(null=True)),
+                ('pasta', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='arquivos', to='leitor.pastaindexada')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='arquivoindexado',
+            index=models.Index(fields=['tamanho', 'hash_md5'], name='arquivo_tamanho_hash_idx'),
+        ),
+    ]
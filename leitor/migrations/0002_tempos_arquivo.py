@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 23:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leitor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arquivoindexado',
+            name='atime_ns',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='arquivoindexado',
+            name='ctime_ns',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+TAMANHO_LOTE = 5000
+
+
+def preencher_nome_busca(apps, schema_editor):
+    # lower() do SQLite só converte ASCII: o minúsculo sai do Python
+    ArquivoIndexado = apps.get_model("leitor", "ArquivoIndexado")
+    lote = []
+    for arquivo in ArquivoIndexado.objects.only("id", "nome").iterator(chunk_size=TAMANHO_LOTE):
+        arquivo.nome_busca = arquivo.nome.lower()
+        lote.append(arquivo)
+        if len(lote) >= TAMANHO_LOTE:
+            ArquivoIndexado.objects.bulk_update(lote, ["nome_busca"])
+            lote = []
+    if lote:
+        ArquivoIndexado.objects.bulk_update(lote, ["nome_busca"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leitor', '0002_tempos_arquivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arquivoindexado',
+            name='nome_busca',
+            field=models.TextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.RunPython(preencher_nome_busca, migrations.RunPython.noop),
+    ]
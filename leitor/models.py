@@ -0,0 +1,49 @@
+# leitor/models.py
+from django.db import models
+
+
+# Tabelas do índice SQLite (LEITOR_CACHE_BACKEND = "sqlite").
+# As FKs não têm constraint no banco: o índice é sempre reescrito inteiro
+# a cada varredura (ver IndiceSQLite.salvar).
+
+class PastaIndexada(models.Model):
+    nome = models.TextField(db_index=True)
+    caminho_completo = models.TextField()
+    pai = models.ForeignKey(
+        "self", null=True, blank=True, related_name="subpastas",
+        on_delete=models.DO_NOTHING, db_constraint=False,
+    )
+
+
+class ArquivoIndexado(models.Model):
+    pasta = models.ForeignKey(
+        PastaIndexada, related_name="arquivos",
+        on_delete=models.DO_NOTHING, db_constraint=False,
+    )
+    nome = models.TextField()
+    # nome em minúsculas (str.lower, como o IndiceBusca): o LIKE do SQLite
+    # só ignora a caixa de letras ASCII, então "Ação" não acharia "ação"
+    nome_busca = models.TextField()
+    extensao = models.TextField()
+    # extensão em minúsculas, para filtrar por igualdade usando o índice
+    extensao_busca = models.TextField(db_index=True)
+    tamanho = models.BigIntegerField(db_index=True)
+    hash_md5 = models.CharField(max_length=32, null=True, db_index=True)
+    caminho_completo = models.TextField(null=True)
+    removido = models.BooleanField(default=False)
+    mtime_ns = models.BigIntegerField(null=True)
+    ctime_ns = models.BigIntegerField(null=True)
+    atime_ns = models.BigIntegerField(null=True)
+    inode = models.BigIntegerField(null=True)
+    dispositivo = models.BigIntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["tamanho", "hash_md5"], name="arquivo_tamanho_hash_idx"),
+        ]
+
+
+class MetaIndice(models.Model):
+    """Metadados do cache ("data", "hash_calculado", ...), um por chave."""
+    chave = models.CharField(max_length=100, primary_key=True)
+    valor = models.JSONField(null=True)
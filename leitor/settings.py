@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'leitor.Metricas.MiddlewareMetricas',  # primeiro, para medir a requisição inteira
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -128,6 +129,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CACHE_PATH = os.path.join(BASE_DIR, "Cache", "cache.json")
 
+# Onde a árvore varrida é guardada:
+# "binario" -> Cache/cache.bin (lido via mmap; enquanto ele não existir o
+# cache.json antigo é usado, e `python manage.py exportar_cache` gera o JSON);
+# "json" -> Cache/cache.json; "sqlite" -> tabelas indexadas do banco acima
+# (rode `python manage.py migrate` e, para aproveitar um cache existente,
+# `python manage.py importar_cache`)
+LEITOR_CACHE_BACKEND = "binario"
+
+# Carrega a árvore do cache em memória ao subir o servidor (leitor/utils_cache.py)
+LEITOR_AQUECER_CACHE = True
+
+# Guarda também o ctime e o atime de cada arquivo na varredura (o mtime
+# sempre é guardado); as telas mostram o que está no cache, sem stat
+LEITOR_VARREDURA_TEMPOS_EXTRAS = False
+
+# Observador (leitor/Observador.py): acompanha as pastas do cache (inotify no
+# Linux, polling do mtime das pastas nos outros casos) e aplica criações,
+# alterações, remoções e renomeações no cache em lotes, sem nova varredura.
+# Cada pasta usa um watch do inotify (limite em fs.inotify.max_user_watches)
+LEITOR_OBSERVADOR = False
+LEITOR_OBSERVADOR_ESPERA = 2.0           # segundos sem eventos para fechar um lote
+LEITOR_OBSERVADOR_ESPERA_MAXIMA = 30.0   # atraso máximo de um lote com eventos contínuos
+LEITOR_OBSERVADOR_POLLING = 60.0         # intervalo do polling, quando ele é usado
+LEITOR_OBSERVADOR_POLLING_ARQUIVOS = 600.0  # no polling, releitura com stat de cada arquivo (pega reescritas no lugar)
+
+# Motor de hash (leitor/MotorHash.py)
+# "thread" para discos lentos/rede (I/O), "processo" para NVMe (CPU)
+LEITOR_HASH_MODO = "thread"
+LEITOR_HASH_WORKERS = None  # None = padrão do MotorHash
+LEITOR_HASH_LIMITE_MB = 256  # bytes em processamento ao mesmo tempo
+
+# Confirma os grupos de duplicados byte a byte depois do MD5 (mais lento)
+LEITOR_DUPLICADOS_COMPARAR_BYTES = False
+
+# Métricas (leitor/Metricas.py), expostas em /metrics no formato do Prometheus.
+# Buscas em /buscar-arquivos/ mais lentas que isso vão para Cache/buscas_lentas.jsonl
+LEITOR_BUSCA_LENTA_SEGUNDOS = 1.0
+
+# Busca por hash com "Conferir no disco": calcula em segundo plano o hash dos
+# candidatos que ainda não têm, até esta quantidade (acima, refine os filtros
+# ou use python manage.py hash --todos)
+LEITOR_BUSCA_HASH_MAX_ARQUIVOS = 1000
+
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [
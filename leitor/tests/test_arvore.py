@@ -0,0 +1,63 @@
+# leitor/tests/test_arvore.py
+import os
+
+from leitor.ManipuladorPasta import ManipuladorPasta
+from leitor.Pasta import Pasta
+from leitor.utils_operacoes import _replace_subtree
+
+from .test_duplicados import ArvoreTemporaria
+
+
+class ArvoreTests(ArvoreTemporaria):
+    def setUp(self):
+        super().setUp()
+        for relativo, tamanho in (
+            ("raiz.txt", 1), ("a/a1.bin", 100), ("a/a2.bin", 50),
+            ("a/fundo/f.bin", 1000), ("a/fundo/mais/m.bin", 7),
+            ("b/b1.txt", 10), ("b/vazia/.keep", 0),
+        ):
+            self._escrever(relativo, "x" * tamanho)
+
+    def _pasta(self, raiz, *partes):
+        caminho = os.path.join(self.disco, *partes)
+        return next(p for p in raiz.iter_pastas() if p.caminho_completo == caminho)
+
+    def test_totais_e_maiores_pastas(self):
+        raiz = self._varrer()
+        raiz.calcular_totais()
+        self.assertEqual((raiz.tamanho_total, raiz.total_arquivos, raiz.total_subpastas), (1168, 7, 5))
+        a = self._pasta(raiz, "a")
+        self.assertEqual((a.tamanho_total, a.total_arquivos, a.total_subpastas), (1157, 4, 2))
+
+        manipulador = ManipuladorPasta(self.disco, raiz=raiz)
+        nivel1 = manipulador.maiores_pastas(profundidade=1)
+        self.assertEqual([(p["nome"], p["tamanho_total"]) for p in nivel1["resultados"]], [("a", 1157), ("b", 10)])
+        nivel2 = manipulador.maiores_pastas(profundidade=2, limite=1)
+        self.assertEqual([p["nome"] for p in nivel2["resultados"]], ["fundo"])
+        self.assertEqual(manipulador.maiores_pastas(profundidade=9)["status"], "vazio")
+
+    def test_atualizar_uma_subarvore(self):
+        antiga = self._varrer()
+        intocada = self._pasta(antiga, "b")
+
+        # No disco: some um arquivo, aparece outro e uma pasta inteira some
+        os.remove(os.path.join(self.disco, "a", "a2.bin"))
+        self._escrever("a/novo.bin", "x" * 5)
+        os.remove(os.path.join(self.disco, "a", "fundo", "mais", "m.bin"))
+        os.rmdir(os.path.join(self.disco, "a", "fundo", "mais"))
+
+        nova = Pasta(os.path.join(self.disco, "a"))
+        self.assertTrue(_replace_subtree(antiga, nova))
+        self.assertFalse(_replace_subtree(antiga, Pasta(os.path.join(self.pasta.name))))
+
+        self.assertIs(self._pasta(antiga, "a"), nova)
+        self.assertIs(self._pasta(antiga, "b"), intocada)
+        arquivos = {a.nome_arquivo: a for _, a in nova.iter_arquivos()}
+        self.assertEqual(sorted(arquivos), ["a1.bin", "a2.bin", "f.bin", "m.bin", "novo.bin"])
+        self.assertTrue(arquivos["a2.bin"].removido)  # fica no cache, marcado como removido
+        self.assertFalse(arquivos["novo.bin"].removido)
+        # A subpasta só da árvore antiga volta inteira, com o que tinha
+        self.assertEqual(self._pasta(antiga, "a", "fundo", "mais").arquivos[0].nome_arquivo, "m.bin")
+
+        antiga.calcular_totais()
+        self.assertEqual((antiga.total_arquivos, antiga.total_subpastas), (8, 5))
@@ -0,0 +1,111 @@
+# leitor/tests/test_busca.py
+import os
+
+from leitor.Arquivo import Arquivo
+from leitor.IndiceBusca import IndiceBusca
+from leitor.ManipuladorPasta import ManipuladorPasta
+from leitor.utils_operacoes import candidatos_sem_hash
+
+from .test_duplicados import ArvoreTemporaria
+
+
+class CandidatosSemHashTests(ArvoreTemporaria):
+    def test_so_os_arquivos_da_busca(self):
+        for relativo, conteudo in (
+            ("foto1.jpg", "igual"), ("sub/Foto2.JPG", "igual"), ("foto3.jpg", "x" * 50),
+            ("doc.txt", "igual"), ("outro.bin", "zz"),
+        ):
+            self._escrever(relativo, conteudo)
+        raiz = self._varrer()
+        por_nome = {a.nome: a for _, a in raiz.iter_arquivos()}
+        por_nome["foto1"].hash_md5 = "ja-calculado"
+
+        nomes = lambda filtros: sorted(a.nome_arquivo for a in candidatos_sem_hash(raiz, filtros))
+        self.assertEqual(nomes({"extensao": "jpg"}), ["Foto2.JPG", "foto3.jpg"])
+        self.assertEqual(nomes({"nome": "FOTO", "tamanho_max": "10"}), ["Foto2.JPG"])
+        self.assertEqual(nomes({"tamanho_min": 40}), ["foto3.jpg"])
+        self.assertEqual(len(nomes({})), 4)
+
+
+class IndiceBuscaTests(ArvoreTemporaria):
+    def setUp(self):
+        super().setUp()
+        for relativo, tamanho in (
+            ("relatorio.pdf", 10), ("sub/Relatorio Final.PDF", 300), ("foto.jpg", 2000),
+            ("sub/fotografia.jpg", 50), ("notas", 0), ("sub/mais/relato.txt", 300),
+        ):
+            self._escrever(relativo, "x" * tamanho)
+        self.raiz = self._varrer()
+        self.addCleanup(setattr, IndiceBusca, "_atual", (None, None))
+        self.indice = IndiceBusca.para(self.raiz)
+
+    def _nomes(self, **filtros):
+        return sorted(a.nome_arquivo for _, a in self.indice.arquivos(self.indice.consultar(**filtros)))
+
+    def test_consultas_batem_com_a_busca_linear(self):
+        self.assertIs(IndiceBusca.para(self.raiz), self.indice)
+        self.assertEqual(self._nomes(t_min=50, t_max=300), ["Relatorio Final.PDF", "fotografia.jpg", "relato.txt"])
+        self.assertEqual(self._nomes(t_max=0), ["notas"])
+        self.assertEqual(self._nomes(nome="relat"), ["Relatorio Final.PDF", "relato.txt", "relatorio.pdf"])
+        self.assertEqual(self._nomes(nome="relatorio", extensao="pdf", t_min=100), ["Relatorio Final.PDF"])
+        self.assertEqual(self._nomes(nome="fo"), ["foto.jpg", "fotografia.jpg"])  # curto demais para trigrama
+        self.assertEqual(self._nomes(nome="xyz"), [])
+        self.assertEqual(self._nomes(extensao=""), ["notas"])
+
+        # Sem filtros vem tudo, na ordem da varredura
+        ids = self.indice.consultar()
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), 6)
+
+    def test_atualizacao_no_lugar(self):
+        por_nome = {a.nome_arquivo: a for _, a in self.raiz.iter_arquivos()}
+        foto = por_nome["foto.jpg"]
+        tamanho_antigo, foto.tamanho = foto.tamanho, 5
+        nova = Arquivo("relatorio2", "pdf", 4000, caminho_completo=os.path.join(self.disco, "relatorio2.pdf"))
+        IndiceBusca.atualizar(self.raiz, [(self.disco, nova)], [(foto, tamanho_antigo)])
+
+        self.assertIs(IndiceBusca.para(self.raiz), self.indice)
+        self.assertEqual(self._nomes(t_max=10), ["foto.jpg", "notas", "relatorio.pdf"])
+        self.assertEqual(self._nomes(t_min=1000), ["relatorio2.pdf"])
+        self.assertEqual(self._nomes(nome="relatorio", extensao="pdf"), ["Relatorio Final.PDF", "relatorio.pdf", "relatorio2.pdf"])
+
+        # Atualizar outra árvore não mexe neste índice
+        IndiceBusca.atualizar(object(), [(self.disco, nova)], [])
+        self.assertEqual(len(self.indice), 7)
+
+
+class BuscarAvancadoTests(ArvoreTemporaria):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            self._escrever(f"p{i // 3}/log{i}.txt", "x" * (i + 1) * 10)
+        self._escrever("outro.bin", "y" * 1000)
+        self.addCleanup(setattr, IndiceBusca, "_atual", (None, None))
+        self.manipulador = ManipuladorPasta(self.disco, raiz=self._varrer())
+
+    def test_paginas(self):
+        pagina = self.manipulador.buscar_avancado(nome="log", por_pagina=3, pagina=2, ordenar="-tamanho")
+        self.assertEqual((pagina["quantidade"], pagina["encontrados"], pagina["total_paginas"]), (7, 7, 3))
+        self.assertEqual([r["nome"] for r in pagina["resultados"]], ["log3.txt", "log2.txt", "log1.txt"])
+
+        ultima = self.manipulador.buscar_avancado(nome="log", por_pagina=3, pagina=3, ordenar="-tamanho")
+        self.assertEqual([r["nome"] for r in ultima["resultados"]], ["log0.txt"])
+        fora = self.manipulador.buscar_avancado(nome="log", por_pagina=3, pagina=9)
+        self.assertEqual((fora["status"], fora["resultados"]), ("ok", []))
+
+    def test_filtros_limite_e_agregados(self):
+        pagina = self.manipulador.buscar_avancado(extensao=".TXT", tamanho_min="30", tamanho_max="0.05kb",
+                                                  ordenar="nome", agregados=True)
+        self.assertEqual([r["nome"] for r in pagina["resultados"]], ["log2.txt", "log3.txt", "log4.txt"])
+        self.assertEqual(pagina["agregados"]["bytes"], 30 + 40 + 50)
+
+        limitada = self.manipulador.buscar_avancado(ordenar="-tamanho", limite=2, por_pagina=1, pagina=2)
+        self.assertEqual((limitada["quantidade"], limitada["encontrados"], limitada["total_paginas"]), (2, 8, 2))
+        self.assertEqual([r["nome"] for r in limitada["resultados"]], ["log6.txt"])
+
+        # O filtro por hash só compara o que já tem hash
+        vazia = self.manipulador.buscar_avancado(extensao="txt", hash_md5="abc")
+        self.assertEqual((vazia["status"], vazia["sem_hash"]), ("vazio", 7))
+
+        with self.assertRaises(ValueError):
+            self.manipulador.buscar_avancado(ordenar="cor")
@@ -0,0 +1,155 @@
+# leitor/tests/test_cache_binario.py
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from leitor.Arquivo import Arquivo
+from leitor.CacheBinario import (
+    CABECALHO, REGISTRO_ARQUIVO, REGISTRO_ARQUIVO_V1, TEM_ATIME, TEM_CTIME, CacheBinario,
+)
+from leitor.Pasta import Pasta
+
+META = {"data": "17_10_2026,21:00", "caminho_raiz": "/dados", "hash_calculado": True}
+
+
+def _arquivo(nome, extensao, tamanho, **campos):
+    hash_md5 = campos.pop("hash_md5", None)
+    removido = campos.pop("removido", False)
+    arquivo = Arquivo(nome, extensao, tamanho, **campos)
+    arquivo.hash_md5 = hash_md5
+    arquivo.removido = removido
+    return arquivo
+
+
+def _arvore():
+    raiz = Pasta("/dados", ler_conteudo=False)
+    raiz.adicionar_arquivo(_arquivo(
+        "relatório", "pdf", 1234, mtime_ns=1_700_000_000_123_456_789, ctime_ns=1_700_000_001_000_000_000,
+        atime_ns=1_700_000_002_000_000_000, inode=42, dispositivo=7, hash_md5="9b36ac812626c33a079a3fe64ddddffb",
+    ))
+    raiz.adicionar_arquivo(_arquivo("LEIAME", None, 0, mtime_ns=1))
+
+    fotos = Pasta("/dados/fotos", ler_conteudo=False)
+    fotos.adicionar_arquivo(_arquivo("praia", "jpg", 2_000_000, hash_md5="hash-que-nao-e-md5", removido=True))
+    # Caminho que não dá para derivar da pasta fica guardado no registro
+    fotos.adicionar_arquivo(_arquivo("fora", "jpg", 10, caminho_completo="/outro/lugar/fora.jpg"))
+    raiz.adicionar_subpasta(fotos)
+
+    vazia = Pasta("/dados/vazia", ler_conteudo=False)
+    raiz.adicionar_subpasta(vazia)
+    vazia.adicionar_subpasta(Pasta("/dados/vazia/ações", ler_conteudo=False))
+    return raiz
+
+
+def _listagem(raiz, tempos_extras=True):
+    linhas = []
+    for caminho, a in raiz.iter_arquivos():
+        linhas.append((
+            caminho, a.nome, a.extensao, a.tamanho, a.caminho_completo, a.mtime_ns,
+            a.ctime_ns if tempos_extras else None, a.atime_ns if tempos_extras else None,
+            a.inode, a.dispositivo, a.hash_md5, a.removido,
+        ))
+    return linhas
+
+
+def _para_v1(caminho):
+    """Regrava um cache.bin v2 no formato v1 (registros de arquivo sem ctime/atime)."""
+    with open(caminho, "rb") as f:
+        dados = bytearray(f.read())
+    campos = list(CABECALHO.unpack_from(dados, 0))
+    n_arquivos, off_arquivos = campos[4], campos[6]
+    fim = off_arquivos + REGISTRO_ARQUIVO.size * n_arquivos
+
+    registros = b"".join(
+        REGISTRO_ARQUIVO_V1.pack(tamanho, mtime_ns, *resto[:-1], resto[-1] & ~(TEM_CTIME | TEM_ATIME))
+        for tamanho, mtime_ns, _ctime, _atime, *resto in REGISTRO_ARQUIVO.iter_unpack(dados[off_arquivos:fim])
+    )
+    deslocamento = fim - off_arquivos - len(registros)
+    campos[1] = 1
+    for i in range(7, 11):  # offsets das seções depois dos arquivos
+        campos[i] -= deslocamento
+    novo = dados[:off_arquivos] + registros + dados[fim:]
+    CABECALHO.pack_into(novo, 0, *campos)
+    with open(caminho, "wb") as f:
+        f.write(novo)
+
+
+class CacheBinarioTests(SimpleTestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        self.caminho = os.path.join(self.pasta.name, "cache.bin")
+
+    def _carregar(self):
+        leitor = CacheBinario(self.caminho)
+        self.addCleanup(leitor.fechar)
+        return leitor, *leitor.carregar()
+
+    def test_ida_e_volta_v2(self):
+        original = _arvore()
+        CacheBinario.escrever(self.caminho, original, META)
+
+        self.assertTrue(CacheBinario.reconhece(self.caminho))
+        _, raiz, meta = self._carregar()
+        self.assertEqual(meta, META)
+        self.assertEqual(
+            [p.caminho_completo for p in raiz.iter_pastas()],
+            ["/dados", "/dados/fotos", "/dados/vazia", "/dados/vazia/ações"],
+        )
+        self.assertEqual(_listagem(raiz), _listagem(original))
+        self.assertEqual((raiz.total_arquivos, raiz.tamanho_total, raiz.total_subpastas), (4, 2_001_244, 3))
+
+    def test_le_arquivo_v1(self):
+        original = _arvore()
+        CacheBinario.escrever(self.caminho, original, META)
+        _para_v1(self.caminho)
+
+        _, raiz, meta = self._carregar()
+        self.assertEqual(meta, META)
+        self.assertEqual(_listagem(raiz), _listagem(original, tempos_extras=False))
+
+    def test_arquivos_decodificados_sob_demanda(self):
+        CacheBinario.escrever(self.caminho, _arvore(), META)
+        leitor, raiz, _ = self._carregar()
+        fotos = raiz.subpastas.pasta
+
+        # Só as pastas com arquivos ficam pendentes, e nada foi decodificado ainda
+        self.assertIsNotNone(raiz._origem)
+        self.assertIsNotNone(fotos._origem)
+        self.assertIsNone(raiz.subpastas.proximo.pasta._origem)
+        self.assertEqual(raiz._arquivos, [])
+
+        self.assertEqual([a.nome_arquivo for a in fotos.arquivos], ["praia.jpg", "fora.jpg"])
+        self.assertIsNone(fotos._origem)
+        self.assertIsNotNone(leitor._mm)
+
+        # A última pasta pendente decodificada fecha o mmap
+        self.assertEqual([a.nome_arquivo for a in raiz.arquivos], ["relatório.pdf", "LEIAME"])
+        self.assertIsNone(leitor._mm)
+
+    def test_leitura_concorrente_da_mesma_pasta(self):
+        raiz = Pasta("/dados", ler_conteudo=False)
+        for i in range(2000):
+            raiz.adicionar_arquivo(_arquivo(f"a{i}", "txt", i))
+        CacheBinario.escrever(self.caminho, raiz, META)
+        _, raiz, _ = self._carregar()
+
+        barreira = threading.Barrier(8)
+        erros, quantidades = [], []
+
+        def ler():
+            barreira.wait()
+            try:
+                quantidades.append(len(raiz.arquivos))
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=ler) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(erros, [])
+        self.assertEqual(quantidades, [2000] * 8)
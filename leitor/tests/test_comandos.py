@@ -0,0 +1,70 @@
+# leitor/tests/test_comandos.py
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from leitor import utils_cache
+from leitor.management.commands._base import SAIDA_SEM_CACHE, SAIDA_USO
+
+from .test_duplicados import ArvoreTemporaria
+
+
+class ComandosTests(ArvoreTemporaria):
+    def setUp(self):
+        super().setUp()
+        cache = os.path.join(self.pasta.name, "Cache", "cache.json")
+        ajuste = override_settings(CACHE_PATH=cache, LEITOR_CACHE_BACKEND="binario")
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.addCleanup(utils_cache.invalidar_snapshot)
+        self._escrever("a.txt", "igual")
+        self._escrever("sub/b.txt", "igual")
+        self._escrever("grande.bin", "x" * 5000)
+
+    def _rodar(self, *args):
+        saida = io.StringIO()
+        call_command(*args, verbosity=0, stdout=saida, stderr=io.StringIO())
+        return saida.getvalue()
+
+    def _codigo(self, *args):
+        with self.assertRaises(CommandError) as contexto:
+            self._rodar(*args)
+        return contexto.exception.returncode
+
+    def test_codigos_de_saida(self):
+        self.assertEqual(self._codigo("search", "a"), SAIDA_SEM_CACHE)
+        self.assertEqual(self._codigo("duplicates"), SAIDA_SEM_CACHE)
+        self.assertEqual(self._codigo("scan", os.path.join(self.disco, "nao-existe")), SAIDA_USO)
+
+        self.assertIn("Varredura concluída", self._rodar("scan", self.disco, "--hash"))
+        self.assertEqual(self._codigo("search", "--tamanho-min", "abc"), SAIDA_USO)
+        self.assertEqual(self._codigo("search", "--tamanho-max", "muito"), SAIDA_USO)
+        self.assertEqual(self._codigo("search", "--ordenar", "cor"), SAIDA_USO)
+        self.assertEqual(self._codigo("update", os.path.join(self.disco, "nao-existe")), SAIDA_USO)
+
+    def test_busca_depois_da_varredura(self):
+        self._rodar("scan", self.disco)
+        resultado = json.loads(self._rodar("search", "--tamanho-min", "1kb", "--json"))
+        self.assertEqual([r["nome"] for r in resultado["resultados"]], ["grande.bin"])
+
+        # Sem resultados não é erro
+        resultado = json.loads(self._rodar("search", "nada-disso", "--json"))
+        self.assertEqual((resultado["status"], resultado["encontrados"]), ("vazio", 0))
+
+    def test_scan_resume_os_duplicados(self):
+        self._escrever("sem_extensao", "igual")
+        impresso = io.StringIO()
+        with redirect_stdout(impresso):
+            self._rodar("scan", self.disco, "--hash")
+        self.assertIn("📈 Duplicados: 1 grupos, 2 arquivos duplicados", impresso.getvalue())
+        self.assertNotIn("sub/b.txt", impresso.getvalue())
+
+        impresso = io.StringIO()
+        with redirect_stdout(impresso):
+            call_command("scan", self.disco, "--hash", verbosity=2, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertIn("b.txt em sub/b.txt", impresso.getvalue())
+        self.assertIn(" sem_extensao em sem_extensao\n", impresso.getvalue())
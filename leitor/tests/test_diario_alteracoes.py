@@ -0,0 +1,102 @@
+# leitor/tests/test_diario_alteracoes.py
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from leitor.Arquivo import Arquivo
+from leitor.DiarioAlteracoes import DiarioAlteracoes
+from leitor.IndiceBusca import IndiceBusca
+from leitor.Observador import MudancasArvore
+from leitor.Pasta import Pasta
+
+BASE = ("/cache/cache.bin", 1_700_000_000_000_000_000, 4096)
+
+
+def _arvore(raiz_disco):
+    raiz = Pasta(raiz_disco, ler_conteudo=False)
+    for nome, tamanho in (("a", 10), ("b", 20)):
+        arquivo = Arquivo(nome, "txt", tamanho, mtime_ns=1)
+        arquivo.hash_md5 = f"{nome * 32}"
+        raiz.adicionar_arquivo(arquivo)
+    raiz.calcular_totais()
+    return raiz
+
+
+def _listagem(raiz):
+    return sorted((caminho, a.nome_arquivo, a.tamanho, a.removido, a.hash_md5) for caminho, a in raiz.iter_arquivos())
+
+
+class DiarioAlteracoesTests(SimpleTestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        self.disco = os.path.join(self.pasta.name, "dados")
+        os.makedirs(self.disco)
+        self.diario = DiarioAlteracoes(os.path.join(self.pasta.name, "alteracoes.jsonl"))
+
+    def _escrever(self, relativo, conteudo):
+        caminho = os.path.join(self.disco, relativo)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "w") as f:
+            f.write(conteudo)
+        return caminho
+
+    def test_lote_reaplicado_reproduz_a_arvore(self):
+        for nome, tamanho in (("a", 10), ("b", 20)):
+            self._escrever(f"{nome}.txt", "x" * tamanho)
+        arvore = _arvore(self.disco)
+        mudancas = MudancasArvore(arvore)
+        mudancas.aplicar_caminho(self._escrever("a.txt", "x" * 15))
+        mudancas.aplicar_caminho(self._escrever("nova/funda/c.bin", "c"))
+        os.remove(os.path.join(self.disco, "b.txt"))
+        mudancas.aplicar_caminho(os.path.join(self.disco, "b.txt"))
+        mudancas.recalcular_totais()
+        self.diario.anexar(BASE, mudancas.lote({"data": "18_10_2026,10:00"}))
+
+        lotes, posicao = self.diario.ler(BASE)
+        self.assertEqual(posicao, self.diario.tamanho())
+        copia = _arvore(self.disco)
+        reaplicado = MudancasArvore(copia)
+        for lote in lotes:
+            reaplicado.aplicar_lote(lote)
+        reaplicado.recalcular_totais()
+
+        self.assertEqual(lotes[0]["meta"], {"data": "18_10_2026,10:00"})
+        self.assertEqual(_listagem(copia), _listagem(arvore))
+        self.assertEqual(
+            (copia.total_arquivos, copia.tamanho_total, copia.total_subpastas),
+            (arvore.total_arquivos, arvore.tamanho_total, arvore.total_subpastas),
+        )
+        # Reaplicar o mesmo lote não muda nada
+        MudancasArvore(copia).aplicar_lote(lotes[0])
+        self.assertEqual(_listagem(copia), _listagem(arvore))
+
+    def test_linha_incompleta_e_outra_base(self):
+        self.diario.anexar(BASE, {"pastas": [], "arquivos": []})
+        lotes, posicao = self.diario.ler(BASE)
+        with open(self.diario.caminho, "a", encoding="ascii") as f:
+            f.write('{"pastas": [')  # lote ainda sendo gravado
+        self.assertEqual(self.diario.ler(BASE, desde=posicao), ([], posicao))
+        self.assertEqual(self.diario.ler(("outro", 1)), (None, 0))
+
+        # Anexar com outra base recomeça o diário
+        self.diario.anexar(("outro", 1), {"pastas": ["/x"], "arquivos": []})
+        self.assertEqual(self.diario.ler(BASE), (None, 0))
+        self.assertEqual(self.diario.ler(("outro", 1))[0], [{"pastas": ["/x"], "arquivos": []}])
+
+    def test_indice_busca_recebe_so_o_lote(self):
+        for nome, tamanho in (("a", 10), ("b", 20)):
+            self._escrever(f"{nome}.txt", "x" * tamanho)
+        arvore = _arvore(self.disco)
+        indice = IndiceBusca.para(arvore)
+        mudancas = MudancasArvore(arvore)
+        mudancas.aplicar_caminho(self._escrever("a.txt", "x" * 25))
+        mudancas.aplicar_caminho(self._escrever("novo.txt", "x" * 12))
+        IndiceBusca.atualizar(arvore, mudancas.novos, mudancas.tamanhos_anteriores)
+
+        self.assertIs(IndiceBusca.para(arvore), indice)
+        nomes = lambda ids: sorted(a.nome_arquivo for _, a in indice.arquivos(ids))
+        self.assertEqual(nomes(indice.consultar("", None, 0, 15)), ["novo.txt"])
+        self.assertEqual(nomes(indice.consultar("", None, 20, 30)), ["a.txt", "b.txt"])
+        self.assertEqual(nomes(indice.consultar("novo")), ["novo.txt"])
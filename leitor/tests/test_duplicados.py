@@ -0,0 +1,138 @@
+# leitor/tests/test_duplicados.py
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from leitor.Arquivo import Arquivo, calcular_md5
+from leitor.DetectorDuplicatas import DetectorDuplicatas
+from leitor.GruposDuplicados import GruposDuplicados
+from leitor.Pasta import Pasta
+
+MD5_VAZIO = "d41d8cd98f00b204e9800998ecf8427e"
+
+
+class ArvoreTemporaria(SimpleTestCase):
+    """Base dos testes que precisam de arquivos de verdade num diretório temporário."""
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+        self.disco = os.path.join(self.pasta.name, "dados")
+        os.makedirs(self.disco)
+
+    def _escrever(self, relativo, conteudo):
+        caminho = os.path.join(self.disco, relativo)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, "wb") as f:
+            f.write(conteudo.encode() if isinstance(conteudo, str) else conteudo)
+        return caminho
+
+    def _varrer(self):
+        return Pasta(self.disco)
+
+
+class GruposDuplicadosTests(ArvoreTemporaria):
+    def _grupos(self, grupos):
+        caminho = os.path.join(self.pasta.name, "duplicados.jsonl")
+        cabecalho = GruposDuplicados.escrever(caminho, grupos, ("cache", 1, 2))
+        return cabecalho, GruposDuplicados(caminho)
+
+    def test_vazios_e_removidos_ficam_de_fora(self):
+        for nome in ("v1", "v2"):
+            self._escrever(f"{nome}.txt", "")
+        for nome in ("a", "b", "c"):
+            self._escrever(f"{nome}.txt", "igual")
+        raiz = self._varrer()
+        por_nome = {a.nome: a for _, a in raiz.iter_arquivos()}
+        for arquivo in por_nome.values():
+            arquivo.hash_md5 = MD5_VAZIO if not arquivo.tamanho else "922fb303ea4204ee681417be98dcd350"
+        por_nome["c"].removido = True
+
+        grupos = [
+            (0, MD5_VAZIO, [(self.disco, por_nome["v1"]), (self.disco, por_nome["v2"])]),
+            (5, "922fb303ea4204ee681417be98dcd350",
+             [(self.disco, por_nome[n]) for n in ("a", "b", "c")]),
+        ]
+        cabecalho, leitor = self._grupos(grupos)
+        self.assertEqual((cabecalho["total_grupos"], cabecalho["total_duplicados"], cabecalho["espaco_duplicado"]),
+                         (1, 1, 5))
+        self.assertEqual([a["nome"] for a in leitor.pagina()["grupos"][0]["arquivos"]], ["a.txt", "b.txt"])
+
+        # O detector segue a mesma regra e chega ao mesmo número de grupos
+        duplicatas = DetectorDuplicatas().detectar(raiz.iter_arquivos())
+        self.assertEqual([(t, len(g)) for t, _, g in duplicatas], [(5, 2)])
+
+    def test_paginas_em_ordem_de_desperdicio(self):
+        grupos = []
+        for i, tamanho in enumerate((10, 300, 20, 5000, 7)):
+            arquivos = [Arquivo(f"g{i}_{n}", "bin", tamanho, caminho_completo=f"/d/g{i}_{n}.bin") for n in range(2)]
+            grupos.append((tamanho, f"{i:032x}", [("/d", a) for a in arquivos]))
+        cabecalho, leitor = self._grupos(grupos)
+
+        self.assertEqual(cabecalho["espaco_duplicado"], 10 + 300 + 20 + 5000 + 7)
+        primeira = leitor.pagina(pagina=1, por_pagina=2)
+        segunda = leitor.pagina(pagina=2, por_pagina=2)
+        ultima = leitor.pagina(pagina=3, por_pagina=2)
+        self.assertEqual([g["tamanho"] for g in primeira["grupos"]], [5000, 300])
+        self.assertEqual([g["tamanho"] for g in segunda["grupos"]], [20, 10])
+        self.assertEqual([(g["id"], g["tamanho"]) for g in ultima["grupos"]], [(5, 7)])
+        self.assertEqual((primeira["total_paginas"], primeira["quantidade"]), (3, 5))
+        self.assertEqual(leitor.pagina(pagina=9, por_pagina=2)["grupos"], [])
+
+        # Filtro por pasta/extensão lê o arquivo todo e conta só os grupos que passam
+        filtrado = leitor.pagina(ext="bin", pasta="g3_")
+        self.assertEqual((filtrado["quantidade"], filtrado["grupos"][0]["tamanho"]), (1, 5000))
+
+
+class DetectorDuplicatasTests(ArvoreTemporaria):
+    BLOCO = 16  # impressão com blocos pequenos para os testes
+
+    def _detectar(self, **opcoes):
+        raiz = self._varrer()
+        detector = DetectorDuplicatas(tamanho_bloco=self.BLOCO, **opcoes)
+        duplicatas = detector.detectar(raiz.iter_arquivos())
+        por_nome = {a.nome: a for _, a in raiz.iter_arquivos()}
+        grupos = sorted(sorted(a.nome for _, a in grupo) for _, _, grupo in duplicatas)
+        return grupos, por_nome, detector.estatisticas
+
+    def test_etapas(self):
+        meio_a = b"i" * 16 + b"A" + b"m" * 150 + b"f" * 33   # 200 bytes: mesmo início, meio e fim,
+        meio_b = b"i" * 16 + b"B" + b"m" * 150 + b"f" * 33   # mas diferem fora dos blocos lidos
+        for nome, conteudo in (
+            ("v1", b""), ("v2", b""),                    # vazios: nem entram
+            ("p1", b"pequeno"), ("p2", b"pequeno"),      # até 3 blocos: a impressão é o MD5
+            ("p3", b"pequenO"),                          # mesmo tamanho, conteúdo diferente
+            ("g1", meio_a), ("g2", meio_a), ("g3", meio_b),
+            ("unico", b"u" * 999),
+        ):
+            self._escrever(f"{nome}.bin", conteudo)
+
+        grupos, por_nome, stats = self._detectar()
+        self.assertEqual(grupos, [["g1", "g2"], ["p1", "p2"]])
+        self.assertEqual(por_nome["p1"].hash_md5, calcular_md5(os.path.join(self.disco, "p1.bin")))
+        self.assertEqual(por_nome["g3"].hash_md5, calcular_md5(os.path.join(self.disco, "g3.bin")))
+        for nome in ("v1", "v2", "p3", "unico"):
+            self.assertIsNone(por_nome[nome].hash_md5, nome)
+
+        self.assertEqual((stats["arquivos"], stats["candidatos_tamanho"], stats["candidatos_impressao"]), (9, 6, 5))
+        # A impressão lê no máximo 3 blocos de cada candidato; o MD5 completo só os 3 grandes
+        self.assertEqual(stats["bytes_lidos_impressao"], 3 * 7 + 3 * 3 * self.BLOCO)
+        self.assertEqual((stats["bytes_lidos_hash"], stats["hashes_calculados"], stats["grupos"]), (600, 5, 2))
+
+    def test_hash_guardado_recalcular_e_bytes(self):
+        self._escrever("a.bin", b"x" * 100)
+        self._escrever("b.bin", b"x" * 30 + b"y" + b"x" * 69)  # difere fora dos blocos da impressão
+        raiz = self._varrer()
+
+        def detectar(**opcoes):
+            detector = DetectorDuplicatas(tamanho_bloco=self.BLOCO, **opcoes)
+            return len(detector.detectar(raiz.iter_arquivos())), detector.estatisticas["bytes_lidos_hash"]
+
+        # Um hash guardado igual é aceito sem reler o arquivo...
+        for _, arquivo in raiz.iter_arquivos():
+            arquivo.hash_md5 = "velho"
+        self.assertEqual(detectar(), (1, 0))
+        # ...salvo com a confirmação byte a byte ou pedindo para recalcular
+        self.assertEqual(detectar(comparar_bytes=True), (0, 0))
+        self.assertEqual(detectar(recalcular=True), (0, 200))
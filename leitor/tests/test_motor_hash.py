@@ -0,0 +1,93 @@
+# leitor/tests/test_motor_hash.py
+import os
+import threading
+import time
+from unittest import mock
+
+from leitor import MotorHash as modulo
+from leitor.Arquivo import calcular_md5
+from leitor.MotorHash import MotorHash, reaproveitar_hashes
+
+from .test_duplicados import ArvoreTemporaria
+
+MTIME = 1_700_000_000_000_000_000
+
+
+class ReaproveitarHashesTests(ArvoreTemporaria):
+    def _fixar_mtime(self, caminho):
+        os.utime(caminho, ns=(MTIME, MTIME))
+        return caminho
+
+    def _hashes(self, raiz):
+        return {a.nome_arquivo: a.hash_md5 for _, a in raiz.iter_arquivos()}
+
+    def test_reaproveita_so_o_que_nao_mudou(self):
+        self._fixar_mtime(self._escrever("igual.txt", "conteudo"))
+        self._fixar_mtime(self._escrever("mudou.txt", "antes"))
+        antiga = self._varrer()
+        for _, arquivo in antiga.iter_arquivos():
+            arquivo.hash_md5 = calcular_md5(arquivo.caminho_completo)
+
+        self._escrever("mudou.txt", "depois!")
+        nova = self._varrer()
+        self.assertEqual(reaproveitar_hashes(antiga, nova), {"reaproveitados": 1, "invalidados": 1})
+        self.assertEqual(self._hashes(nova), {"igual.txt": calcular_md5(os.path.join(self.disco, "igual.txt")),
+                                              "mudou.txt": None})
+
+    def test_nomes_que_so_diferem_na_caixa(self):
+        maiusculo = self._fixar_mtime(self._escrever("A.txt", "aaaa"))
+        if os.path.exists(os.path.join(self.disco, "a.txt")):
+            self.skipTest("sistema de arquivos não diferencia maiúsculas")
+        antiga = self._varrer()
+        for _, arquivo in antiga.iter_arquivos():
+            arquivo.hash_md5 = calcular_md5(arquivo.caminho_completo)
+
+        # Mesmo tamanho e mtime, outro conteúdo: não pode herdar o MD5 de A.txt
+        self._fixar_mtime(self._escrever("a.txt", "bbbb"))
+        nova = self._varrer()
+        reaproveitar_hashes(antiga, nova)
+        self.assertEqual(self._hashes(nova), {"A.txt": calcular_md5(maiusculo), "a.txt": None})
+
+
+class MotorHashTests(ArvoreTemporaria):
+    def test_limite_de_bytes_em_voo(self):
+        for i in range(12):
+            self._escrever(f"a{i}.bin", bytes([i]) * 100)
+        self._escrever("grande.bin", b"g" * 500)  # sozinho já passa do limite
+        arquivos = [a for _, a in self._varrer().iter_arquivos()]
+
+        em_voo, picos, trava = [0], [], threading.Lock()
+
+        def medir(caminho):
+            tamanho = os.path.getsize(caminho)
+            with trava:
+                em_voo[0] += tamanho
+                picos.append(em_voo[0])
+            time.sleep(0.005)
+            with trava:
+                em_voo[0] -= tamanho
+            return calcular_md5(caminho)
+
+        with mock.patch.object(modulo, "LOTE_MAX_ARQUIVOS", 1):
+            motor = MotorHash(workers=8, limite_bytes=250)
+            resultados = motor.mapear(arquivos, medir)
+
+        # Dois lotes de 100 bytes cabem juntos; o de 500 só entra com o pool vazio
+        self.assertEqual(sorted(set(picos)), [100, 200, 500])
+        self.assertEqual({a.nome: v for a, v in resultados}, {a.nome: calcular_md5(a.caminho_completo) for a in arquivos})
+        self.assertEqual((motor.estatisticas.arquivos, motor.estatisticas.bytes), (13, 12 * 100 + 500))
+
+    def test_calcular_so_os_sem_hash(self):
+        self._escrever("a.txt", "um")
+        self._escrever("b.txt", "dois")
+        some = self._escrever("some.txt", "tres")
+        raiz = self._varrer()
+        por_nome = {a.nome: a for _, a in raiz.iter_arquivos()}
+        por_nome["a"].hash_md5 = "ja-calculado"
+        os.remove(some)
+
+        estatisticas = MotorHash(workers=2).calcular(raiz.iter_arquivos())
+        self.assertEqual(por_nome["a"].hash_md5, "ja-calculado")
+        self.assertEqual(por_nome["b"].hash_md5, calcular_md5(os.path.join(self.disco, "b.txt")))
+        self.assertIsNone(por_nome["some"].hash_md5)  # sumiu do disco: nem hash nem erro
+        self.assertEqual((estatisticas.arquivos, estatisticas.erros), (1, 0))
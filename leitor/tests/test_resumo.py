@@ -0,0 +1,59 @@
+# leitor/tests/test_resumo.py
+import os
+
+from django.test import override_settings
+
+from leitor import utils_cache
+from leitor.DetectorDuplicatas import DetectorDuplicatas
+from leitor.Resumo import Resumo
+
+from .test_duplicados import MD5_VAZIO, ArvoreTemporaria
+
+
+class ResumoTests(ArvoreTemporaria):
+    def setUp(self):
+        super().setUp()
+        for relativo, conteudo in (
+            ("v1.txt", ""), ("v2.txt", ""),
+            ("a.txt", "igual"), ("b.txt", "igual"), ("sub/c.txt", "igual"),
+            ("x.bin", "x" * 100), ("sub/y.bin", "x" * 100),
+            ("unico.txt", "só um"),
+        ):
+            self._escrever(relativo, conteudo)
+        self.raiz = self._varrer()
+        DetectorDuplicatas().detectar(self.raiz.iter_arquivos())
+        por_nome = {a.nome: a for _, a in self.raiz.iter_arquivos()}
+        # Como depois de um hash --todos e de um arquivo que sumiu do disco
+        por_nome["v1"].hash_md5 = por_nome["v2"].hash_md5 = MD5_VAZIO
+        por_nome["c"].removido = True
+
+        cache = os.path.join(self.pasta.name, "Cache", "cache.json")
+        ajuste = override_settings(CACHE_PATH=cache, LEITOR_CACHE_BACKEND="binario")
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.addCleanup(utils_cache.invalidar_snapshot)
+
+    def test_totais_da_home_batem_com_duplicados_jsonl(self):
+        utils_cache.salvar_cache(self.raiz, {"hash_calculado": True})
+        resumo = utils_cache.carregar_resumo()
+        grupos = utils_cache.carregar_duplicados()
+
+        self.assertEqual(resumo.total_duplicados, grupos.cabecalho["total_duplicados"])
+        self.assertEqual(resumo.espaco_duplicado, grupos.cabecalho["espaco_duplicado"])
+        self.assertEqual((grupos.cabecalho["total_grupos"], resumo.total_duplicados, resumo.espaco_duplicado),
+                         (2, 2, 5 + 100))
+        self.assertEqual(resumo.total_arquivos, 8)
+
+    def test_recontagem_depois_de_atualizacao(self):
+        # atualizar_cache e o Observador recontam os duplicados da árvore inteira
+        resumo = Resumo.da_arvore(self.raiz, com_duplicados=False)
+        self.assertEqual(resumo.total_duplicados, 0)
+        resumo.calcular_duplicados(self.raiz.iter_arquivos())
+        self.assertEqual((resumo.total_duplicados, resumo.espaco_duplicado), (2, 105))
+        self.assertEqual(resumo.arquivos_com_hash, 7)
+
+        # As partes aditivas somam e subtraem
+        outro = Resumo.da_arvore(self.raiz)
+        outro.somar(resumo)
+        outro.subtrair(resumo)
+        self.assertEqual(outro.to_dict()["extensoes"], resumo.to_dict()["extensoes"])
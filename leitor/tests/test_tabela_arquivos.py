@@ -0,0 +1,57 @@
+# leitor/tests/test_tabela_arquivos.py
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from leitor import TabelaArquivos as modulo
+from leitor.Arquivo import Arquivo
+from leitor.TabelaArquivos import CEM_MB, UM_GB, TabelaArquivos
+
+
+def _arquivo(nome, extensao, tamanho, hash_md5=None, removido=False):
+    arquivo = Arquivo(nome, extensao, tamanho, caminho_completo=f"/d/{nome}")
+    arquivo.hash_md5 = hash_md5
+    arquivo.removido = removido
+    return arquivo
+
+
+def _arquivos():
+    return [
+        ("/d", _arquivo("a", "TXT", 5, "h1")),
+        ("/d", _arquivo("b", "txt", 5, "h1")),
+        ("/d/s", _arquivo("c", "txt", 5, "h1", removido=True)),  # removido: não é cópia
+        ("/d", _arquivo("v1", "txt", 0, "vazio")),               # vazios: não são duplicados
+        ("/d", _arquivo("v2", None, 0, "vazio")),
+        ("/d/s", _arquivo("grande", "iso", 2 * UM_GB, "h2")),
+        ("/d/s", _arquivo("grande2", "iso", 2 * UM_GB, "h2")),
+        ("/d", _arquivo("medio", "mkv", 200 * 1024 ** 2)),
+        ("/d", _arquivo("outro", "txt", 5, "h3")),               # mesmo tamanho, outro hash
+    ]
+
+
+class TabelaArquivosTests(SimpleTestCase):
+    def _conferir(self):
+        tabela = TabelaArquivos(_arquivos())
+        self.assertEqual(len(tabela), 9)
+        self.assertEqual(tabela.arquivos_com_hash(), 8)
+
+        totais = tabela.totais_por_extensao()
+        self.assertEqual(totais["txt"]["quantidade"], 5)  # "TXT" e "txt" juntas
+        self.assertEqual(totais["txt"]["tamanho"], 20)
+        self.assertEqual(totais["iso"]["faixas"], {"gt_1gb": 4 * UM_GB, "between_100mb_1gb": 0, "lt_100mb": 0})
+        self.assertEqual(totais["mkv"]["faixas"]["between_100mb_1gb"], 200 * 1024 ** 2)
+        self.assertEqual(totais[""]["quantidade"], 1)
+        self.assertEqual(tabela.histograma_tamanhos([1, CEM_MB, UM_GB]), [2, 4, 1, 2])
+
+        grupos = sorted((t, h, [tabela.linha(i)[1].nome for i in linhas]) for t, h, linhas in tabela.grupos_duplicados())
+        self.assertEqual(grupos, [(5, "h1", ["a", "b"]), (2 * UM_GB, "h2", ["grande", "grande2"])])
+        self.assertEqual(tabela.estatisticas_duplicados(), (2, 5 + 2 * UM_GB))
+
+    def test_com_numpy(self):
+        if modulo.np is None:
+            self.skipTest("NumPy não instalado")
+        self._conferir()
+
+    def test_sem_numpy(self):
+        with mock.patch.object(modulo, "np", None):
+            self._conferir()
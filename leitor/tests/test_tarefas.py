@@ -0,0 +1,50 @@
+# leitor/tests/test_tarefas.py
+import os
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from leitor import Tarefas
+from leitor.Tarefas import CONCLUIDA, MAX_HISTORICO, MAX_HISTORICO_OBSERVADOR, FilaTarefas, Tarefa
+
+
+def _terminada(tipo, criada_em):
+    tarefa = Tarefa(tipo)
+    tarefa.estado = CONCLUIDA
+    tarefa.criada_em = criada_em
+    return tarefa
+
+
+class FilaTarefasTests(SimpleTestCase):
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.pasta.cleanup)
+
+    def test_lotes_do_observador_tem_cota_propria(self):
+        fila = FilaTarefas(os.path.join(self.pasta.name, "tarefas.json"))
+        varreduras = [_terminada("varredura", i) for i in range(3)]
+        for i, tarefa in enumerate(varreduras):
+            fila._tarefas[tarefa.id] = tarefa
+            # Cada varredura seguida de uma rajada de lotes
+            for j in range(MAX_HISTORICO):
+                lote = _terminada("observador", i * 1000 + j)
+                fila._tarefas[lote.id] = lote
+        fila._podar()
+
+        tipos = [t["tipo"] for t in fila.listar()]
+        self.assertEqual(tipos.count("observador"), MAX_HISTORICO_OBSERVADOR)
+        self.assertEqual(tipos.count("varredura"), 3)
+        # Os lotes que ficam são os mais recentes
+        self.assertEqual(min(t["criada_em"] for t in fila.listar() if t["tipo"] == "observador"),
+                         2000 + MAX_HISTORICO - MAX_HISTORICO_OBSERVADOR)
+
+    def test_segundo_processo_nao_pega_a_fila(self):
+        caminho = os.path.join(self.pasta.name, "tarefas.lock")
+        with mock.patch.object(Tarefas, "_fd_dono", None):
+            Tarefas._reservar_fila(caminho)
+            self.addCleanup(os.close, Tarefas._fd_dono)
+            # Outro descritor do mesmo arquivo faz o papel do segundo worker
+            with self.assertRaisesMessage(ImproperlyConfigured, f"(PID {os.getpid()})"):
+                Tarefas._reservar_fila(caminho)
@@ -0,0 +1,54 @@
+# leitor/tests/test_varredor.py
+import os
+
+from leitor.Progresso import OperacaoCancelada, Progresso
+from leitor.Varredor import Varredor
+
+from .test_duplicados import ArvoreTemporaria
+
+
+class VarredorTests(ArvoreTemporaria):
+    def _arvore(self):
+        for i in range(6):
+            for j in range(5):
+                for k in range(3):
+                    self._escrever(f"n{i}/m{j}/arquivo{k}.dat", "x" * (i + j + k))
+            self._escrever(f"n{i}/.oculto", "")
+        os.makedirs(os.path.join(self.disco, "vazia", "mais_vazia"))
+        self._escrever("sem_extensao", "abc")
+
+    def _retrato(self, raiz):
+        pastas = [(p.caminho_completo, p.total_arquivos, p.tamanho_total, p.total_subpastas) for p in raiz.iter_pastas()]
+        arquivos = [(c, a.nome_arquivo, a.tamanho, a.mtime_ns) for c, a in raiz.iter_arquivos()]
+        return pastas, arquivos
+
+    def test_paralelo_igual_ao_sequencial(self):
+        self._arvore()
+        sequencial = Varredor(workers=1)
+        esperado = self._retrato(sequencial.varrer(self.disco))
+        self.assertEqual((sequencial.estatisticas.arquivos, sequencial.estatisticas.pastas), (6 * 16 + 1, 1 + 6 * 6 + 2))
+
+        for workers in (2, 8, 64):
+            varredor = Varredor(workers=workers)
+            raiz = varredor.varrer(self.disco)
+            self.assertEqual(self._retrato(raiz), esperado)
+            self.assertEqual(varredor.estatisticas.to_dict()["arquivos"], sequencial.estatisticas.arquivos)
+            self.assertEqual(varredor.estatisticas.pastas, sequencial.estatisticas.pastas)
+            self.assertEqual(varredor.estatisticas.erros, 0)
+            self.assertEqual(raiz.total_arquivos, 6 * 16 + 1)
+
+    def test_pasta_vazia_e_inexistente(self):
+        raiz = Varredor(workers=4).varrer(self.disco)
+        self.assertEqual((raiz.total_arquivos, raiz.total_subpastas), (0, 0))
+
+        varredor = Varredor(workers=4)
+        varredor.varrer(os.path.join(self.disco, "nao-existe"))
+        self.assertEqual((varredor.estatisticas.pastas, varredor.estatisticas.erros), (0, 1))
+
+    def test_cancelamento(self):
+        self._arvore()
+        for workers in (1, 4):
+            progresso = Progresso()
+            progresso.cancelar()
+            with self.assertRaises(OperacaoCancelada):
+                Varredor(workers=workers, progresso=progresso).varrer(self.disco)
@@ -23,8 +23,16 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name="home"),
     path('duplicados/', views.duplicados, name="duplicados"),
+    path('duplicados/grupos/', views.duplicados_grupos, name="duplicados-grupos"),
     path('pesquisar/', views.pesquisar, name="pesquisar"),
     path('nova_varredura', views.nova_varredura, name="nova_varredura"),
     path('atualizar_cache', views.atualizar_cache, name="atualizar_cache"),
     path("buscar-arquivos/", views.buscar_arquivos, name="buscar-arquivos"),
+    path("maiores-pastas/", views.maiores_pastas, name="maiores-pastas"),
+    path("tarefas/", views.tarefas, name="tarefas"),
+    path("tarefas/<str:id_tarefa>/", views.tarefa, name="tarefa"),
+    path("tarefas/<str:id_tarefa>/eventos/", views.eventos_tarefa, name="eventos-tarefa"),
+    path("tarefas/<str:id_tarefa>/cancelar/", views.cancelar_tarefa, name="cancelar-tarefa"),
+    path("observador/", views.estado_observador, name="observador"),
+    path("metrics", views.metricas_prometheus, name="metricas"),
 ]
@@ -1,17 +1,647 @@
 # core/utils_cache.py
+import functools
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from django.conf import settings
 
-CACHE_PATH = Path(settings.BASE_DIR) / "Cache" / "cache.json"
+from .CacheBinario import CacheBinario
+from .DiarioAlteracoes import DiarioAlteracoes
+from .GruposDuplicados import GruposDuplicados
+from .Metricas import contar, cronometrar
+from .utils_serializacao import escrever_cache, gravacao_atomica, ler_cache
 
-def ler_cache_bruto():
+# ==========================================
+# Armazenamento único do cache
+# ==========================================
+#
+# Todo módulo (views, context_processors, ManipuladorPasta, comandos) lê e
+# grava o cache por aqui. Nenhuma função de leitura varre o disco: sem
+# cache, elas devolvem None e quem chamou decide o que fazer.
+
+CACHE_PATH_PADRAO = Path(__file__).resolve().parent.parent / "Cache" / "cache.json"
+
+
+def _django_configurado():
+    # settings.configured só fica True depois do primeiro acesso às settings
+    return settings.configured or bool(os.environ.get("DJANGO_SETTINGS_MODULE"))
+
+
+def caminho_cache():
+    """Caminho do cache.json (settings.CACHE_PATH, ou o padrão fora do Django)."""
+    if _django_configurado():
+        return Path(getattr(settings, "CACHE_PATH", CACHE_PATH_PADRAO))
+    return CACHE_PATH_PADRAO
+
+
+def caminho_cache_binario():
+    """Caminho do cache.bin, ao lado do cache.json."""
+    return caminho_cache().with_suffix(".bin")
+
+
+def _backend():
+    if not _django_configurado():
+        return "json"
+    return getattr(settings, "LEITOR_CACHE_BACKEND", "json")
+
+
+def usar_indice_sqlite():
+    """True quando LEITOR_CACHE_BACKEND = "sqlite" (índice no banco do Django)."""
+    return _backend() == "sqlite"
+
+
+def usar_cache_binario():
+    """True quando LEITOR_CACHE_BACKEND = "binario" (Cache/cache.bin)."""
+    return _backend() == "binario"
+
+
+def arquivo_cache():
+    """
+    Arquivo de onde a árvore é lida nos backends em arquivo. No binário,
+    enquanto não houver cache.bin, o cache.json antigo continua valendo.
+    """
+    if usar_cache_binario():
+        binario = caminho_cache_binario()
+        if binario.exists() or not caminho_cache().exists():
+            return binario
+    return caminho_cache()
+
+
+def ler_arquivo_cache(caminho):
+    """(raiz, meta) de um cache em disco, binário ou JSON, com os totais das pastas."""
+    if CacheBinario.reconhece(caminho):
+        return CacheBinario(caminho).carregar()
+    raiz, meta = ler_cache(caminho)
+    if raiz is not None:
+        raiz.calcular_totais()
+    return raiz, meta
+
+
+def carregar_raiz_do_cache():
+    """
+    Carrega uma cópia própria da árvore (para quem vai alterá-la), já com
+    as alterações do diário. Se não houver cache ou ele estiver inválido,
+    retorna (None, None).
+    """
+    raiz, meta, _ = _carregar_arvore()
+    return raiz, meta
+
+
+def _carregar_arvore():
+    """(raiz, meta, posição no diário até onde ele foi aplicado)."""
+    try:
+        with cronometrar("carga_cache"):
+            return _ler_arvore()
+    except (ValueError, OSError, KeyError, TypeError) as e:
+        print(f"Erro ao carregar cache: {e}")
+        return None, None, 0
+
+
+def caminho_resumo():
+    """Resumo da home, gravado ao lado do cache.json."""
+    return caminho_cache().with_name("resumo.json")
+
+
+# ==========================================
+# Trava entre processos
+# ==========================================
+#
+# A interface, o observador e os comandos do cron (scan, update, hash)
+# podem rodar ao mesmo tempo, em processos diferentes. Cada um carrega o
+# cache, altera e grava: sem a trava, o último a gravar apagaria o
+# trabalho dos outros. Quem vai carregar para alterar segura Cache/.lock
+# (flock exclusivo) do carregamento até a gravação.
+
+INTERVALO_TRAVA = 0.5
+_trava_local = threading.local()
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def caminho_trava():
+    return caminho_cache().with_name(".lock")
+
+
+def _tentar_travar(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _destravar(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def trava_cache(progresso=None):
     """
-    Lê o cache.json e devolve o dict Python.
-    Se não existir, devolve None.
+    Segura a trava exclusiva do cache. Reentrante na mesma thread (a
+    tarefa trava e o salvar_cache dentro dela trava de novo). Enquanto
+    outro processo grava, espera; com `progresso`, mostra a espera e deixa
+    cancelar (progresso.verificar() levanta OperacaoCancelada).
     """
+    if getattr(_trava_local, "nivel", 0):
+        _trava_local.nivel += 1
+        try:
+            yield
+        finally:
+            _trava_local.nivel -= 1
+        return
+
+    caminho = caminho_trava()
+    os.makedirs(caminho.parent, exist_ok=True)
+    fd = os.open(caminho, os.O_RDWR | os.O_CREAT, 0o644)
     try:
-        with open(CACHE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
+        if not _tentar_travar(fd):
+            print("⏳ Outro processo está gravando o cache; aguardando a trava...")
+            if progresso is not None:
+                progresso.iniciar_etapa("aguardando outra gravação do cache")
+            with cronometrar("aguardar_trava_cache"):
+                while not _tentar_travar(fd):
+                    if progresso is not None:
+                        progresso.verificar()
+                    time.sleep(INTERVALO_TRAVA)
+        _trava_local.nivel = 1
+        try:
+            yield
+        finally:
+            _trava_local.nivel = 0
+            _destravar(fd)
+    finally:
+        os.close(fd)
+
+
+def com_trava_cache(funcao):
+    """Decorador das tarefas funcao(progresso, ...) que carregam, alteram e gravam o cache."""
+    @functools.wraps(funcao)
+    def envolvida(progresso, *args, **kwargs):
+        with trava_cache(progresso):
+            return funcao(progresso, *args, **kwargs)
+    return envolvida
+
+
+def salvar_cache(raiz, meta=None, resumo=None):
+    """
+    Grava a árvore, os metadados e o resumo da home no backend configurado
+    e publica o snapshot. Sem `resumo`, ele é calculado a partir da árvore.
+    Quem carregou a árvore para alterá-la deve segurar trava_cache() desde
+    o carregamento; aqui a trava só protege a própria gravação.
+    """
+    with cronometrar("salvar_cache"), trava_cache():
+        _salvar_cache(raiz, meta, resumo)
+
+
+def _salvar_cache(raiz, meta, resumo):
+    from .Resumo import Resumo
+
+    # A árvore gravada já inclui o diário. Ele sai antes do cache novo
+    # entrar: quem ler no meio vê o cache anterior sem os últimos lotes do
+    # Observador, nunca lotes antigos por cima do cache novo
+    diario().apagar()
+
+    meta = {k: v for k, v in (meta or {}).items() if k not in ("estrutura", "resumo")}
+    if resumo is None:
+        resumo = Resumo.da_arvore(raiz)
+    resumo.caminho_raiz = raiz.caminho_completo or ""
+    resumo.hash_calculado = bool(meta.get("hash_calculado"))
+
+    if usar_indice_sqlite():
+        from .IndiceSQLite import IndiceSQLite
+        IndiceSQLite().salvar(raiz, meta, resumo=resumo)
+    else:
+        cache_file = caminho_cache_binario() if usar_cache_binario() else caminho_cache()
+        os.makedirs(cache_file.parent, exist_ok=True)
+        if usar_cache_binario():
+            CacheBinario.escrever(cache_file, raiz, meta)
+        else:
+            escrever_cache(cache_file, raiz, meta)
+        _gravar_resumo_json(resumo)
+
+    _gravar_duplicados(raiz, resumo)
+    publicar_snapshot(raiz, meta)
+
+
+def _marca_resumo():
+    # Stat do arquivo do cache e tamanho do diário: o resumo gravado com
+    # outra marca está desatualizado
+    st = os.stat(arquivo_cache())
+    return [st.st_mtime_ns, st.st_size, diario().tamanho()]
+
+
+def _gravar_resumo_json(resumo):
+    data = resumo.to_dict()
+    data["cache"] = _marca_resumo()
+    with gravacao_atomica(caminho_resumo(), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def carregar_resumo():
+    """
+    Resumo da home sem carregar a árvore. Se ele faltar ou não bater com o
+    cache atual (ex.: cache antigo ou trocado à mão), é recalculado uma vez
+    a partir do snapshot e gravado. None se não houver cache.
+    """
+    from .Resumo import Resumo
+
+    if usar_indice_sqlite():
+        from .IndiceSQLite import IndiceSQLite
+        indice = IndiceSQLite()
+        resumo = Resumo.from_dict(indice.carregar_resumo())
+        if resumo is not None:
+            return resumo
+    else:
+        try:
+            marca = _marca_resumo()
+        except OSError:
+            return None
+        try:
+            with open(caminho_resumo(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("cache") == marca:
+                resumo = Resumo.from_dict(data)
+                if resumo is not None:
+                    return resumo
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            pass
+
+    raiz, meta = carregar_snapshot()
+    if raiz is None:
         return None
+    resumo = Resumo.da_arvore(raiz)
+    resumo.hash_calculado = bool((meta or {}).get("hash_calculado"))
+    if usar_indice_sqlite():
+        indice.salvar_resumo(resumo)
+    else:
+        _gravar_resumo_json(resumo)
+    print("✅ Resumo da home recalculado a partir do cache.")
+    return resumo
+
+
+def caminho_duplicados():
+    """Grupos de duplicados já ordenados (GruposDuplicados), ao lado do cache."""
+    return caminho_cache().with_name("duplicados.jsonl")
+
+
+def _gravar_duplicados(raiz, resumo):
+    """
+    Regrava os grupos de duplicados da árvore recém-salva (só quando há
+    hashes). Eles valem para o cache e as alterações do diário: um lote do
+    Observador que mexe em arquivos com hash também chama esta função.
+    """
+    caminho = caminho_duplicados()
+    if not resumo.arquivos_com_hash:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        return
+
+    from .TabelaArquivos import TabelaArquivos
+    tabela = TabelaArquivos.para(raiz)
+    grupos = (
+        (tamanho, hash_md5, [tabela.linha(i) for i in linhas])
+        for tamanho, hash_md5, linhas in tabela.grupos_duplicados()
+    )
+    os.makedirs(caminho.parent, exist_ok=True)
+    GruposDuplicados.escrever(caminho, grupos, _assinatura_base())
+
+
+def carregar_duplicados():
+    """
+    GruposDuplicados do cache atual. Se o arquivo faltar ou for de outro
+    cache (ex.: cache antigo ou trocado à mão), ele é recalculado uma vez.
+    None se não houver cache.
+    """
+    assinatura = _assinatura_base()
+    if assinatura is None:
+        return None
+    try:
+        grupos = GruposDuplicados.abrir(caminho_duplicados())
+        if grupos is not None and grupos.assinatura_cache == list(assinatura):
+            return grupos
+    except (OSError, ValueError) as e:
+        print(f"Grupos de duplicados ilegíveis, recalculando: {e}")
+
+    if usar_indice_sqlite():
+        # O índice já agrupa em SQL, sem montar a árvore inteira
+        from .IndiceSQLite import IndiceSQLite
+        candidatos = IndiceSQLite().grupos_duplicados()
+    else:
+        raiz, _ = carregar_snapshot()
+        if raiz is None:
+            return None
+        from .TabelaArquivos import TabelaArquivos
+        tabela = TabelaArquivos.para(raiz)
+        candidatos = [
+            (tamanho, hash_md5, [tabela.linha(i) for i in linhas])
+            for tamanho, hash_md5, linhas in tabela.grupos_duplicados()
+        ]
+
+    caminho = caminho_duplicados()
+    os.makedirs(caminho.parent, exist_ok=True)
+    GruposDuplicados.escrever(caminho, candidatos, assinatura)
+    print("✅ Grupos de duplicados recalculados a partir do cache.")
+    return GruposDuplicados.abrir(caminho)
+
+
+# ==========================================
+# Diário de alterações
+# ==========================================
+#
+# Os lotes do Observador não regravam o cache: cada um vira uma linha do
+# diário (DiarioAlteracoes), aplicada por cima do cache sempre que ele é
+# carregado. A próxima gravação completa (salvar_cache) já leva essas
+# alterações e apaga o diário.
+
+def caminho_diario():
+    """Diário das alterações feitas desde a última gravação completa, ao lado do cache."""
+    return caminho_cache().with_name("alteracoes.jsonl")
+
+
+def diario():
+    return DiarioAlteracoes(caminho_diario())
+
+
+def _aplicar_lotes(raiz, meta, lotes, pastas=None):
+    """Reaplica lotes do diário na árvore e os metadados deles em `meta`. Devolve o MudancasArvore."""
+    from .Observador import MudancasArvore
+
+    mudancas = MudancasArvore(raiz, pastas=pastas)
+    for lote in lotes:
+        mudancas.aplicar_lote(lote)
+        meta.update(lote.get("meta") or {})
+    mudancas.recalcular_totais()
+    return mudancas
+
+
+# ==========================================
+# Snapshot em memória da árvore do cache
+# ==========================================
+#
+# A árvore (Pasta.from_dict) é montada uma vez por processo e reaproveitada
+# por todas as requisições. Ela só é recarregada quando o cache muda no
+# disco (mtime/tamanho do cache.json/cache.bin ou marca "salvo_em" do índice SQLite)
+# ou quando uma varredura publica uma árvore nova com publicar_snapshot().
+# Quando só o diário cresce, as linhas novas são aplicadas no próprio
+# snapshot, e o IndiceBusca recebe só os arquivos delas.
+#
+# Quem vai alterar a árvore (hash, atualização) deve carregar uma cópia
+# própria com carregar_raiz_do_cache() e gravar com salvar_cache(). A
+# exceção são os lotes do Observador (alterar_snapshot), que mudam poucos
+# arquivos: eles alteram o snapshot no lugar, sob _trava_snapshot, e quem
+# estiver lendo vê cada arquivo como estava antes ou depois do lote.
+
+_trava_snapshot = threading.RLock()
+_snapshot = {
+    "assinatura": None,
+    "raiz": None,
+    "meta": None,
+    "geracao": 0,
+    "carregado_em": None,
+    "posicao_diario": 0,  # até onde o diário já está aplicado na árvore
+    "pastas": None,       # mapa das pastas da árvore para os lotes (ver _pastas_do_snapshot)
+}
+
+
+def _assinatura_base():
+    """Identifica a versão gravada por inteiro do cache, sem precisar lê-lo."""
+    if usar_indice_sqlite():
+        from .models import MetaIndice
+        salvo_em = MetaIndice.objects.filter(chave="salvo_em").values_list("valor", flat=True).first()
+        return ("sqlite", salvo_em) if salvo_em is not None else None
+
+    caminho = arquivo_cache()
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return (str(caminho), st.st_mtime_ns, st.st_size)
+
+
+def _assinatura_cache():
+    """Identifica a versão do cache em disco (base mais o tamanho do diário)."""
+    base = _assinatura_base()
+    return None if base is None else (*base, diario().tamanho())
+
+
+def existe_cache():
+    """True se há um cache gravado (no backend configurado), sem lê-lo."""
+    return _assinatura_base() is not None
+
+
+def _ler_arvore():
+    base = _assinatura_base()
+    if usar_indice_sqlite():
+        from .IndiceSQLite import IndiceSQLite
+        indice = IndiceSQLite()
+        raiz = indice.carregar_raiz()
+        if raiz is None:
+            return None, None, 0
+        meta = indice.carregar_meta()
+    else:
+        raiz, meta = ler_arquivo_cache(arquivo_cache())
+        if raiz is None:
+            return None, meta, 0
+
+    # No SQLite as linhas já têm os lotes; reaplicá-los não muda nada
+    posicao = 0
+    if base is not None:
+        lotes, posicao = diario().ler(base)
+        if lotes:
+            meta = dict(meta or {})
+            _aplicar_lotes(raiz, meta, lotes)
+    return raiz, meta, posicao
+
+
+def carregar_snapshot():
+    """
+    Devolve (raiz, meta) do snapshot em memória, relendo o cache só se ele
+    mudou desde a última carga. (None, None) se não houver cache.
+    """
+    assinatura = _assinatura_cache()
+    if assinatura is not None and assinatura == _snapshot["assinatura"]:
+        return _snapshot["raiz"], _snapshot["meta"]
+
+    with _trava_snapshot:
+        # Outra requisição pode ter recarregado enquanto esperávamos a trava
+        assinatura = _assinatura_cache()
+        if assinatura is not None and assinatura == _snapshot["assinatura"]:
+            return _snapshot["raiz"], _snapshot["meta"]
+
+        if assinatura is None:
+            _trocar_snapshot(None, None, None)
+            return None, None
+
+        if _aplicar_final_do_diario(assinatura):
+            return _snapshot["raiz"], _snapshot["meta"]
+
+        raiz, meta, posicao = _carregar_arvore()
+        contar("leitor_recargas_cache_total")
+
+        _trocar_snapshot(raiz, meta, assinatura, posicao)
+        print(f"✅ Snapshot do cache carregado (geração {_snapshot['geracao']}).")
+        return raiz, meta
+
+
+def _aplicar_final_do_diario(assinatura):
+    """
+    Se desde a última carga só o diário cresceu (lotes do Observador deste
+    ou de outro processo), aplica as linhas novas no próprio snapshot e
+    devolve True. Chamada com _trava_snapshot.
+    """
+    anterior = _snapshot["assinatura"]
+    if _snapshot["raiz"] is None or anterior is None or anterior[:-1] != assinatura[:-1]:
+        return False
+    lotes, posicao = diario().ler(assinatura[:-1], desde=_snapshot["posicao_diario"])
+    if lotes is None:
+        return False
+    if lotes:
+        meta = dict(_snapshot["meta"] or {})
+        mudancas = _aplicar_lotes(_snapshot["raiz"], meta, lotes, pastas=_pastas_do_snapshot())
+        _atualizar_indices(mudancas)
+        _snapshot["meta"] = meta
+    _snapshot["assinatura"] = assinatura
+    _snapshot["posicao_diario"] = posicao
+    return True
+
+
+def _pastas_do_snapshot():
+    if _snapshot["pastas"] is None and _snapshot["raiz"] is not None:
+        from .Observador import mapa_pastas
+        _snapshot["pastas"] = mapa_pastas(_snapshot["raiz"])
+    return _snapshot["pastas"]
+
+
+def _atualizar_indices(mudancas):
+    """Depois de uma alteração no lugar: o IndiceBusca recebe só o que mudou; a TabelaArquivos é remontada quando alguém precisar."""
+    from .IndiceBusca import IndiceBusca
+    from .TabelaArquivos import TabelaArquivos
+
+    IndiceBusca.atualizar(mudancas.raiz, mudancas.novos, mudancas.tamanhos_anteriores)
+    TabelaArquivos.descartar(mudancas.raiz)
+
+
+@contextmanager
+def alterar_snapshot():
+    """
+    Para os lotes do Observador: entrega (raiz, meta, pastas) do próprio
+    snapshot, em dia com o disco, para ser alterado no lugar (MudancasArvore
+    com esse mapa de pastas) e gravado com gravar_alteracoes(). A trava do
+    snapshot fica presa até o fim do bloco; quem chama deve segurar também
+    trava_cache(). Se o bloco levantar exceção, a árvore pode ter mudado só
+    na memória: o snapshot é descartado e a próxima leitura recarrega.
+    """
+    carregar_snapshot()
+    with _trava_snapshot:
+        try:
+            yield _snapshot["raiz"], _snapshot["meta"], _pastas_do_snapshot()
+        except BaseException:
+            _snapshot["assinatura"] = None
+            raise
+
+
+def gravar_alteracoes(mudancas, meta, resumo=None):
+    """
+    Grava um lote aplicado no snapshot dentro de alterar_snapshot(), no
+    lugar de salvar_cache: o lote vai para o diário (e, no SQLite, direto
+    para as linhas das tabelas), o resumo é regravado e os duplicados só
+    quando algum arquivo com hash mudou. O snapshot continua o mesmo objeto.
+    """
+    from .Resumo import Resumo
+
+    with cronometrar("gravar_alteracoes"), _trava_snapshot:
+        base = _assinatura_base()
+        anterior = _snapshot["meta"] or {}
+        lote = mudancas.lote({chave: valor for chave, valor in meta.items() if anterior.get(chave) != valor})
+        _atualizar_indices(mudancas)
+
+        if usar_indice_sqlite():
+            from .IndiceSQLite import IndiceSQLite
+            IndiceSQLite().aplicar_lote(lote, resumo=resumo)
+        posicao = diario().anexar(base, lote)
+        if resumo is not None and not usar_indice_sqlite():
+            _gravar_resumo_json(resumo)
+        if mudancas.mexeu_em_hash:
+            _gravar_duplicados(mudancas.raiz, resumo or Resumo.da_arvore(mudancas.raiz))
+
+        _snapshot["meta"] = meta
+        _snapshot["assinatura"] = _assinatura_cache()
+        _snapshot["posicao_diario"] = posicao
+
+
+def publicar_snapshot(raiz, meta):
+    """
+    Chamado por salvar_cache: instala a árvore recém-salva como snapshot,
+    sem precisar reler o arquivo.
+    """
+    with _trava_snapshot:
+        _trocar_snapshot(raiz, meta, _assinatura_cache())
+
+
+def invalidar_snapshot():
+    """Descarta o snapshot; a próxima leitura recarrega do disco."""
+    with _trava_snapshot:
+        _snapshot["assinatura"] = None
+
+
+def _trocar_snapshot(raiz, meta, assinatura, posicao_diario=0):
+    if _snapshot["raiz"] is not raiz or _snapshot["assinatura"] != assinatura:
+        _snapshot["geracao"] += 1
+    if _snapshot["raiz"] is not raiz:
+        _snapshot["pastas"] = None
+    _snapshot["raiz"] = raiz
+    _snapshot["meta"] = meta
+    _snapshot["assinatura"] = assinatura
+    _snapshot["posicao_diario"] = posicao_diario
+    _snapshot["carregado_em"] = time.time()
+
+
+def info_snapshot():
+    """Geração atual do snapshot e quando ele foi carregado."""
+    return {
+        "geracao": _snapshot["geracao"],
+        "carregado_em": _snapshot["carregado_em"],
+        "carregado": _snapshot["raiz"] is not None,
+    }
+
+
+def meta_snapshot():
+    """Meta do snapshot em memória sem carregar nada (None se ele ainda não foi carregado)."""
+    return _snapshot["meta"]
+
+
+def aquecer_snapshot(em_segundo_plano=True):
+    """Carrega o snapshot na inicialização do servidor (wsgi/asgi)."""
+    if not getattr(settings, "LEITOR_AQUECER_CACHE", True):
+        return
+
+    def _aquecer():
+        try:
+            raiz, _ = carregar_snapshot()
+            if raiz is not None and not usar_indice_sqlite():
+                # No backend JSON a busca usa os índices em memória
+                from .IndiceBusca import IndiceBusca
+                IndiceBusca.para(raiz)
+        except Exception as e:
+            print(f"Não foi possível aquecer o cache: {e}")
+
+    if em_segundo_plano:
+        threading.Thread(target=_aquecer, name="aquecer-cache", daemon=True).start()
+    else:
+        _aquecer()
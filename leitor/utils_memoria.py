@@ -0,0 +1,106 @@
+# core/utils_memoria.py
+import gc
+import sys
+import time
+import tracemalloc
+
+
+def medir_carga(carregar):
+    """
+    Chama `carregar()` (que deve devolver a raiz, ou (raiz, meta)) com o
+    tracemalloc ligado e devolve (resultado, bytes que ficaram alocados).
+    """
+    gc.collect()
+    ja_rodando = tracemalloc.is_tracing()
+    if not ja_rodando:
+        tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    resultado = carregar()
+    gc.collect()
+    depois, _ = tracemalloc.get_traced_memory()
+    if not ja_rodando:
+        tracemalloc.stop()
+    return resultado, depois - antes
+
+
+def _categoria(atributo):
+    if atributo in ("nome", "extensao"):
+        return "nomes e extensões"
+    if atributo in ("caminho_completo", "_caminho"):
+        return "caminhos"
+    if atributo == "hash_md5":
+        return "hashes"
+    if atributo == "arquivos":
+        return "listas de arquivos"
+    return "números e flags"
+
+
+def detalhar_arvore(raiz):
+    """
+    Quanto cada parte da árvore ocupa (sys.getsizeof, cada objeto contado
+    uma vez só, então strings internadas e inteiros pequenos saem de graça).
+    """
+    vistos = set()
+    detalhe = {}
+    arquivos = pastas = 0
+
+    def somar(categoria, obj):
+        if obj is None or id(obj) in vistos:
+            return
+        vistos.add(id(obj))
+        detalhe[categoria] = detalhe.get(categoria, 0) + sys.getsizeof(obj)
+
+    pilha = [raiz]
+    while pilha:
+        pasta = pilha.pop()
+        pastas += 1
+        somar("objetos Pasta/NoPasta", pasta)
+        for atributo in ("nome", "caminho_completo", "arquivos", "tamanho_total",
+                         "total_arquivos", "total_subpastas"):
+            somar(_categoria(atributo), getattr(pasta, atributo, None))
+
+        for arquivo in pasta.arquivos:
+            arquivos += 1
+            somar("objetos Arquivo", arquivo)
+            for atributo in getattr(type(arquivo), "__slots__", ()) or vars(arquivo):
+                if atributo == "pasta":
+                    continue
+                somar(_categoria(atributo), getattr(arquivo, atributo, None))
+
+        no = pasta.subpastas
+        while no:
+            somar("objetos Pasta/NoPasta", no)
+            pilha.append(no.pasta)
+            no = no.proximo
+
+    return {
+        "arquivos": arquivos,
+        "pastas": pastas,
+        "total": sum(detalhe.values()),
+        "detalhe": dict(sorted(detalhe.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+def relatorio_memoria(carregar):
+    """
+    Carrega a árvore com `carregar()` medindo a memória e devolve o
+    relatório: bytes retidos no total, por arquivo e por categoria.
+    """
+    inicio = time.perf_counter()
+    resultado, retidos = medir_carga(carregar)
+    segundos = time.perf_counter() - inicio
+    raiz = resultado[0] if isinstance(resultado, tuple) else resultado
+    if raiz is None:
+        return None
+
+    detalhe = detalhar_arvore(raiz)
+    arquivos = max(detalhe["arquivos"], 1)
+    return {
+        "arquivos": detalhe["arquivos"],
+        "pastas": detalhe["pastas"],
+        "bytes_retidos": retidos,
+        "bytes_por_arquivo": retidos / arquivos,
+        "segundos_carga": round(segundos, 3),
+        "estimativa_getsizeof": detalhe["total"],
+        "detalhe": detalhe["detalhe"],
+    }
@@ -0,0 +1,422 @@
+# core/utils_operacoes.py
+# Varredura, atualização do cache, hash e busca sem nada de HTTP: as views
+# enfileiram as tarefa_* na FilaTarefas e os comandos do manage.py (scan,
+# update, hash, search) chamam as mesmas funções direto, com um Progresso próprio.
+import os
+from datetime import datetime
+
+from django.conf import settings
+
+from .DetectorDuplicatas import DetectorDuplicatas
+from .IndiceBusca import ORDENACOES, normalizar_extensao
+from .IndiceSQLite import IndiceSQLite
+from .ManipuladorPasta import POR_PAGINA_MAX, POR_PAGINA_PADRAO, ManipuladorPasta, parse_tamanho, resposta_busca
+from .Metricas import contar
+from .MotorHash import MotorHash, reaproveitar_hashes, revalidar_hashes
+from .Pasta import Pasta, chave_caminho
+from .Resumo import Resumo
+from .Varredor import Varredor
+from .utils_cache import (
+    carregar_raiz_do_cache, carregar_resumo, carregar_snapshot, com_trava_cache, salvar_cache,
+    usar_indice_sqlite,
+)
+
+
+def motor_hash(progresso=None, workers=None):
+    """MotorHash configurado pelas opções LEITOR_HASH_* do settings (`workers` tem prioridade)."""
+    return MotorHash(
+        workers=workers or getattr(settings, "LEITOR_HASH_WORKERS", None),
+        modo=getattr(settings, "LEITOR_HASH_MODO", "thread"),
+        limite_bytes=getattr(settings, "LEITOR_HASH_LIMITE_MB", 256) * 1024 * 1024,
+        progresso=progresso,
+    )
+
+
+def varredor(progresso=None):
+    """Varredor configurado pelas opções LEITOR_VARREDURA_* do settings."""
+    return Varredor(
+        progresso=progresso,
+        tempos_extras=getattr(settings, "LEITOR_VARREDURA_TEMPOS_EXTRAS", False),
+    )
+
+
+def _marcar_arquivos_removidos(raiz_antiga, raiz_final):
+    """
+    Copia para raiz_final, marcados como removidos, os arquivos da árvore
+    antiga que não estão mais nela. As pastas das duas árvores são casadas
+    pelo índice de caminhos (Pasta.indice_caminhos), montado uma vez para
+    cada lado, e cada caminho é normalizado uma vez só.
+    """
+    from .Arquivo import Arquivo
+
+    pastas_finais = raiz_final.indice_caminhos()
+    presentes = {
+        (chave, arquivo.nome_arquivo.lower())
+        for chave, pasta in pastas_finais.items()
+        for arquivo in pasta.arquivos
+    }
+
+    for chave, pasta_antiga in raiz_antiga.indice_caminhos().items():
+        pasta_dest = pastas_finais.get(chave)
+        for arquivo_antigo in pasta_antiga.arquivos:
+            if (chave, arquivo_antigo.nome_arquivo.lower()) in presentes:
+                continue
+
+            if pasta_dest is None:
+                pasta_dest = Pasta(pasta_antiga.caminho_completo, ler_conteudo=False)
+                raiz_final.adicionar_subpasta(pasta_dest)
+                pastas_finais[chave] = pasta_dest
+
+            novo = Arquivo(
+                arquivo_antigo.nome, arquivo_antigo.extensao, arquivo_antigo.tamanho, arquivo_antigo.caminho_completo,
+                mtime_ns=arquivo_antigo.mtime_ns, inode=arquivo_antigo.inode, dispositivo=arquivo_antigo.dispositivo,
+                ctime_ns=arquivo_antigo.ctime_ns, atime_ns=arquivo_antigo.atime_ns,
+            )
+            novo.hash_md5 = arquivo_antigo.hash_md5
+            novo.removido = True
+            pasta_dest.adicionar_arquivo(novo)
+
+
+def salvar_cache_atualizado(raiz, meta=None, extra_meta=None, resumo=None):
+    meta = dict(meta or {})
+    meta.update(extra_meta or {})
+    salvar_cache(raiz, meta, resumo=resumo)
+
+
+@com_trava_cache
+def tarefa_nova_varredura(progresso, scan_path, calcular_hash, workers=None, listar_duplicados=False):
+    raiz_antiga, _ = carregar_raiz_do_cache()
+
+    # Só varre: o cache é gravado uma vez, no final, já com os hashes
+    progresso.iniciar_etapa("varrendo")
+    m = ManipuladorPasta(scan_path, interativo=False, carregar=False)
+    m.varrer(progresso=progresso, tempos_extras=getattr(settings, "LEITOR_VARREDURA_TEMPOS_EXTRAS", False))
+
+    # Hashes de arquivos com mesmo tamanho e mtime continuam valendo
+    reuso = reaproveitar_hashes(raiz_antiga, m.raiz)
+
+    extra_meta = {"hash_calculado": calcular_hash}
+    if m.estatisticas_varredura:
+        extra_meta["varredura"] = m.estatisticas_varredura.to_dict()
+
+    recalculados = 0
+    if calcular_hash:
+        stats_dup = m.detectar_duplicatas(
+            motor=motor_hash(progresso, workers),
+            comparar_bytes=getattr(settings, "LEITOR_DUPLICADOS_COMPARAR_BYTES", False),
+            listar=listar_duplicados,
+        )
+        recalculados = stats_dup["hashes_calculados"]
+
+    progresso.verificar()
+    progresso.iniciar_etapa("salvando")
+    m.salvar_cache(extra_meta=extra_meta)
+
+    velocidade = ""
+    if m.estatisticas_varredura:
+        velocidade = (
+            f" ({m.estatisticas_varredura.arquivos_por_segundo:.0f} arquivos/s, "
+            f"{m.estatisticas_varredura.pastas_por_segundo:.0f} pastas/s)"
+        )
+
+    if calcular_hash:
+        return (f"Varredura concluída{velocidade}. Hash calculado "
+                f"({reuso['reaproveitados']} reaproveitados, {recalculados} recalculados).")
+    return f"Varredura concluída{velocidade} sem cálculo de hash."
+
+
+@com_trava_cache
+def tarefa_recalcular_duplicados(progresso, workers=None, todos=False):
+    """
+    Recalcula os duplicados do cache. Só os arquivos com tamanho repetido
+    passam pelo hash; com `todos`, todo arquivo ainda sem hash também
+    (para a busca por hash achar qualquer um).
+    """
+    # Altera a árvore (hashes), então trabalha numa cópia própria
+    raiz, meta = carregar_raiz_do_cache()
+    if raiz is None:
+        raise ValueError("Nenhum cache encontrado. Execute uma 'Nova varredura' primeiro.")
+
+    arquivos = raiz.coletar_arquivos()
+    # Só recalcula o hash de quem mudou no disco desde o último cálculo
+    progresso.iniciar_etapa("revalidando hashes")
+    revalidar_hashes(arquivos)
+    motor = motor_hash(progresso, workers)
+    calculados = 0
+    if todos:
+        progresso.iniciar_etapa("hash MD5")
+        calculados = motor.calcular(arquivos, somente_sem_hash=True).arquivos
+    detector = DetectorDuplicatas(
+        motor=motor,
+        comparar_bytes=getattr(settings, "LEITOR_DUPLICADOS_COMPARAR_BYTES", False),
+    )
+    duplicatas = detector.detectar(arquivos)
+
+    progresso.verificar()
+    progresso.iniciar_etapa("salvando")
+    salvar_cache_atualizado(raiz, meta, extra_meta={"hash_calculado": True})
+    calculados += detector.estatisticas["hashes_calculados"]
+    return f"Duplicados recalculados: {len(duplicatas)} grupos ({calculados} hashes calculados)."
+
+
+def candidatos_sem_hash(raiz, filtros):
+    """
+    Arquivos ainda sem hash que passam pelos filtros de nome, extensão e
+    tamanho de uma busca: os que o filtro por hash não tem como comparar.
+    """
+    nome = (filtros.get("nome") or "").lower().strip()
+    extensao = normalizar_extensao(filtros.get("extensao"))
+    t_min = parse_tamanho(filtros.get("tamanho_min"))
+    t_max = parse_tamanho(filtros.get("tamanho_max"))
+
+    candidatos = []
+    for _, arquivo in raiz.iter_arquivos():
+        if arquivo.hash_md5 or arquivo.removido:
+            continue
+        if nome and nome not in arquivo.nome.lower():
+            continue
+        if extensao and (arquivo.extensao or "").lower() != extensao:
+            continue
+        tamanho = arquivo.tamanho or 0
+        if (t_min is not None and tamanho < t_min) or (t_max is not None and tamanho > t_max):
+            continue
+        candidatos.append(arquivo)
+    return candidatos
+
+
+@com_trava_cache
+def tarefa_hash_busca(progresso, filtros, workers=None):
+    """
+    Calcula o hash só dos candidatos de uma busca por hash (ver
+    candidatos_sem_hash), para a busca repetida achá-los. Não passa pelo
+    resto do inventário nem pelo detector de duplicados.
+    """
+    raiz, meta = carregar_raiz_do_cache()
+    if raiz is None:
+        raise ValueError("Nenhum cache encontrado. Execute uma 'Nova varredura' primeiro.")
+
+    candidatos = candidatos_sem_hash(raiz, filtros)
+    if not candidatos:
+        return "Todos os arquivos da busca já têm hash."
+
+    progresso.iniciar_etapa("hash MD5")
+    calculados = motor_hash(progresso, workers).calcular(candidatos, somente_sem_hash=True).arquivos
+
+    progresso.verificar()
+    progresso.iniciar_etapa("salvando")
+    salvar_cache_atualizado(raiz, meta)
+    return f"Hash dos arquivos da busca: {calculados} de {len(candidatos)} calculados."
+
+
+def _mesclar_pastas(pasta_antiga, pasta_nova):
+    """
+    Leva para pasta_nova (recém-varrida) o que só existe em pasta_antiga:
+    arquivos que não apareceram na varredura (removidos se não existem mais
+    no disco) e subpastas inteiras. Subpastas com o mesmo caminho nos dois
+    lados são mescladas do mesmo jeito, com uma pilha em vez de recursão.
+    """
+    stats = 0
+    pilha = [(pasta_antiga, pasta_nova)]
+    while pilha:
+        antiga, nova = pilha.pop()
+
+        novos_chaves = {(a.nome.lower(), (a.extensao or "").lower()) for a in nova.arquivos}
+        for a in antiga.arquivos:
+            if (a.nome.lower(), (a.extensao or "").lower()) not in novos_chaves:
+                a.removido = not (a.caminho_completo and os.path.exists(a.caminho_completo))
+                stats += 1
+                nova.adicionar_arquivo(a)
+
+        novos_sub = {}
+        atual_no = nova.subpastas
+        while atual_no:
+            novos_sub[chave_caminho(atual_no.pasta.caminho_completo)] = atual_no.pasta
+            atual_no = atual_no.proximo
+
+        antigo_no = antiga.subpastas
+        while antigo_no:
+            sub_antiga = antigo_no.pasta
+            sub_nova = novos_sub.get(chave_caminho(sub_antiga.caminho_completo))
+            if sub_nova is None:
+                nova.adicionar_subpasta(sub_antiga)
+            else:
+                pilha.append((sub_antiga, sub_nova))
+            antigo_no = antigo_no.proximo
+
+    contar("leitor_stat_total", stats, origem="atualizacao")
+
+
+def _replace_subtree(raiz, sub_arvore_nova):
+    """
+    Mescla sub_arvore_nova com a pasta de mesmo caminho dentro de `raiz` e
+    põe a nova no lugar dela. Só desce pelos ancestrais do caminho; False
+    se ele não estiver na árvore.
+    """
+    alvo = chave_caminho(sub_arvore_nova.caminho_completo)
+    chave = chave_caminho(raiz.caminho_completo)
+    if chave and chave == alvo:
+        _mesclar_pastas(raiz, sub_arvore_nova)
+        return True
+
+    pasta = raiz
+    while chave and alvo.startswith(chave.rstrip(os.sep) + os.sep):
+        atual = pasta.subpastas
+        while atual:
+            chave_filha = chave_caminho(atual.pasta.caminho_completo)
+            if chave_filha == alvo:
+                _mesclar_pastas(atual.pasta, sub_arvore_nova)
+                atual.pasta = sub_arvore_nova
+                return True
+            if alvo.startswith(chave_filha.rstrip(os.sep) + os.sep):
+                break
+            atual = atual.proximo
+        if atual is None:
+            return False
+        pasta, chave = atual.pasta, chave_filha
+    return False
+
+
+def _arquivos_sob(raiz, caminho):
+    _, pastas = raiz.pastas_sob(caminho)
+    for pasta in pastas:
+        yield from pasta.iter_arquivos()
+
+
+@com_trava_cache
+def tarefa_atualizar_cache(progresso, scan_path, calcular_hash, workers=None):
+    raiz_antiga, meta_antigo = carregar_raiz_do_cache()
+    if raiz_antiga is None:
+        raise ValueError("Nenhum cache encontrado para atualizar. Execute uma 'Nova varredura' primeiro.")
+
+    progresso.iniciar_etapa("varrendo")
+    raiz_nova = varredor(progresso).varrer(scan_path)
+
+    if not raiz_nova or (not raiz_nova.arquivos and not raiz_nova.subpastas):
+        return f"Nenhum arquivo ou pasta encontrado em '{scan_path}'. O cache não foi alterado."
+
+    # Fora de scan_path o cache não muda: o resumo da home é atualizado
+    # tirando a parte antiga de scan_path agora e somando a nova no final
+    resumo = carregar_resumo()
+    if resumo is not None:
+        resumo.subtrair(Resumo.dos_arquivos(_arquivos_sob(raiz_antiga, scan_path), com_duplicados=False))
+
+    # Arquivos com mesmo tamanho e mtime mantêm o hash do cache antigo
+    reuso = reaproveitar_hashes(raiz_antiga, raiz_nova)
+    recalculados = 0
+
+    old_roots = []
+    if raiz_antiga.caminho_completo != "": 
+        old_roots.append(raiz_antiga)
+    else: 
+        atual = raiz_antiga.subpastas
+        while atual:
+            old_roots.append(atual.pasta)
+            atual = atual.proximo
+
+    final_roots = []
+    raiz_nova_mesclada = False
+    norm_nova_path = chave_caminho(raiz_nova.caminho_completo)
+
+    for old_root in old_roots:
+        norm_old_path = chave_caminho(old_root.caminho_completo)
+        if norm_old_path == norm_nova_path:
+            try:
+                _replace_subtree(old_root, raiz_nova)
+            except Exception:
+                pass
+            raiz_nova_mesclada = True
+            final_roots.append(raiz_nova)
+
+        elif not norm_old_path.startswith(norm_nova_path + os.sep):
+            final_roots.append(old_root)
+
+    for root in final_roots:
+        norm_root_path = chave_caminho(root.caminho_completo)
+        if norm_nova_path.startswith(norm_root_path + os.sep):
+            _replace_subtree(root, raiz_nova)
+            raiz_nova_mesclada = True
+            break
+    
+    if not raiz_nova_mesclada:
+        final_roots.append(raiz_nova)
+
+    raiz_final = Pasta(caminho="", ler_conteudo=False)
+    for root in final_roots:
+        raiz_final.adicionar_subpasta(root)
+
+    if calcular_hash:
+        progresso.iniciar_etapa("hash MD5")
+        recalculados = motor_hash(progresso, workers).calcular(raiz_final.iter_arquivos(), somente_sem_hash=True).arquivos
+        meta_antigo["hash_calculado"] = True
+
+    _marcar_arquivos_removidos(raiz_antiga, raiz_final)
+
+    # Totais das pastas: recalcula só a parte trocada e os ancestrais dela
+    ancestrais, trocadas = raiz_final.pastas_sob(scan_path)
+    for pasta in trocadas:
+        pasta.calcular_totais()
+    for pasta in reversed(ancestrais):
+        pasta.somar_totais()
+
+    if resumo is not None:
+        resumo.somar(Resumo.dos_arquivos(_arquivos_sob(raiz_final, scan_path), com_duplicados=False))
+        # Duplicados dependem da árvore toda (e o hash pode ter sido
+        # calculado fora de scan_path); só os arquivos com hash contam
+        if calcular_hash or resumo.arquivos_com_hash:
+            resumo.calcular_duplicados(raiz_final.iter_arquivos())
+        else:
+            resumo.total_duplicados = resumo.espaco_duplicado = 0
+
+    meta_antigo["data"] = datetime.now().strftime('%d_%m_%Y,%H:%M')
+    meta_antigo["paths_varridos"] = [p.caminho_completo for p in final_roots]
+    progresso.verificar()
+    progresso.iniciar_etapa("salvando")
+    salvar_cache_atualizado(raiz_final, meta_antigo, resumo=resumo)
+
+    return (f"Cache hierarquicamente atualizado com os dados de '{scan_path}' "
+            f"({reuso['reaproveitados']} hashes reaproveitados, {recalculados} recalculados).")
+
+
+def parametros_pagina(filtros):
+    """pagina, por_pagina, ordenar e limite do corpo da busca (ValueError se inválidos)."""
+    try:
+        pagina = max(int(filtros.get("pagina") or 1), 1)
+        por_pagina = min(max(int(filtros.get("por_pagina") or POR_PAGINA_PADRAO), 1), POR_PAGINA_MAX)
+        limite = filtros.get("limite")
+        limite = max(int(limite), 0) if limite not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("pagina, por_pagina e limite devem ser inteiros.")
+
+    ordenar = (filtros.get("ordenar") or "").strip().lower()
+    if ordenar and ordenar.lstrip("-") not in ORDENACOES:
+        raise ValueError(f"ordenar deve ser um de: {', '.join(ORDENACOES)} (com '-' para decrescente).")
+    return {"pagina": pagina, "por_pagina": por_pagina, "ordenar": ordenar, "limite": limite}
+
+
+def executar_busca(filtros, paginacao):
+    """Busca com os filtros do corpo de /buscar-arquivos/ (índice SQLite ou árvore em memória)."""
+    if usar_indice_sqlite():
+        return IndiceSQLite().buscar(
+            nome=filtros.get("nome", ""),
+            extensao=filtros.get("extensao", ""),
+            tamanho_min=filtros.get("tamanho_min", ""),
+            tamanho_max=filtros.get("tamanho_max", ""),
+            hash_md5=filtros.get("hash", ""),
+            **paginacao,
+        )
+
+    raiz, _ = carregar_snapshot()
+    if raiz is None:
+        return resposta_busca([], 0, 0, paginacao["pagina"], paginacao["por_pagina"], paginacao["ordenar"])
+
+    mp = ManipuladorPasta(filtros.get("caminho") or ".", raiz=raiz)
+
+    return mp.buscar_avancado(
+        nome=filtros.get("nome", ""),
+        extensao=filtros.get("extensao", ""),
+        tamanho_min=filtros.get("tamanho_min", ""),
+        tamanho_max=filtros.get("tamanho_max", ""),
+        hash_md5=filtros.get("hash", ""),
+        somente_cache=filtros.get("somente_cache", False),
+        **paginacao,
+    )
@@ -0,0 +1,149 @@
+# core/utils_serializacao.py
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+from .Metricas import cronometrar
+
+# Formato em linhas do cache.json:
+#   1ª linha: {"formato_cache": "leitor-jsonl", "versao": 1, "meta": {...}}
+#   demais:   uma pasta por linha, em pré-ordem (a pai sempre vem antes):
+#             {"id": 3, "pai": 1, "caminho_completo": "...", "arquivos": [...]}
+#
+# Assim a gravação escreve pasta por pasta enquanto percorre a árvore e a
+# leitura monta cada Pasta ao ler a linha, sem ter na memória o dict
+# inteiro do inventário além da própria árvore. Caches antigos (um único
+# objeto JSON com "estrutura") continuam sendo lidos.
+
+FORMATO_JSONL = "leitor-jsonl"
+VERSAO_JSONL = 1
+
+_SEPARADORES = (",", ":")
+
+
+@contextmanager
+def gravacao_atomica(caminho, modo="w", encoding=None):
+    """
+    Abre um temporário único ao lado de `caminho` (dois processos gravando
+    ao mesmo tempo não dividem o mesmo arquivo) e, se o bloco terminar sem
+    erro, troca `caminho` por ele de uma vez. Com erro, o temporário some.
+    """
+    caminho = os.fspath(caminho)
+    fd, temporario = tempfile.mkstemp(
+        dir=os.path.dirname(caminho) or ".", prefix=os.path.basename(caminho) + ".", suffix=".tmp",
+    )
+    try:
+        with os.fdopen(fd, modo, encoding=encoding) as f:
+            yield f
+        os.chmod(temporario, 0o644)  # o mkstemp cria com 0600
+        os.replace(temporario, caminho)
+    except BaseException:
+        try:
+            os.unlink(temporario)
+        except OSError:
+            pass
+        raise
+
+
+def _linha(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARADORES) + "\n"
+
+
+def escrever_cache(caminho, raiz, meta=None):
+    """Grava `raiz` e `meta` em `caminho` no formato em linhas (troca atômica do arquivo)."""
+    with gravacao_atomica(caminho, "w", encoding="utf-8") as f:
+        f.write(_linha({"formato_cache": FORMATO_JSONL, "versao": VERSAO_JSONL, "meta": meta or {}}))
+
+        proximo_id = 0
+        pilha = [(raiz, None)]
+        while pilha:
+            pasta, pai = pilha.pop()
+            registro = {
+                "id": proximo_id,
+                "caminho_completo": pasta.caminho_completo,
+                "arquivos": [arq.to_dict(compacto=True) for arq in pasta.arquivos],
+            }
+            if pai is not None:
+                registro["pai"] = pai
+            f.write(_linha(registro))
+
+            filhos = []
+            atual = pasta.subpastas
+            while atual:
+                filhos.append((atual.pasta, proximo_id))
+                atual = atual.proximo
+            pilha.extend(reversed(filhos))
+            proximo_id += 1
+
+
+def ler_cache(caminho):
+    """
+    Lê o cache em `caminho` (formato em linhas ou JSON antigo) e devolve
+    (raiz, meta). Sem arquivo devolve (None, None); sem árvore, (None, meta).
+    """
+    try:
+        f = open(caminho, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return None, None
+
+    with f:
+        primeira = f.readline()
+        try:
+            cabecalho = json.loads(primeira)
+        except json.JSONDecodeError:
+            cabecalho = None  # JSON antigo com indentação: a 1ª linha é só "{"
+
+        if isinstance(cabecalho, dict) and cabecalho.get("formato_cache") == FORMATO_JSONL:
+            # JSON e montagem da árvore andam juntos, linha a linha
+            with cronometrar("leitura_linhas"):
+                return _ler_linhas(f), cabecalho.get("meta") or {}
+
+        # Formato antigo: um objeto só, lido de uma vez
+        if isinstance(cabecalho, dict):
+            data = cabecalho
+        else:
+            f.seek(0)
+            with cronometrar("leitura_json"):
+                data = json.load(f)
+
+    from .Pasta import Pasta
+
+    estrutura = data.pop("estrutura", None)
+    if not estrutura:
+        return None, data
+    with cronometrar("from_dict"):
+        return Pasta.from_dict(estrutura), data
+
+
+def _ler_linhas(f):
+    from .Arquivo import Arquivo
+    from .Pasta import Pasta
+
+    raiz = None
+    # Caminho da raiz até a última pasta lida: (id, pasta)
+    caminho_atual = []
+    for texto in f:
+        if not texto.strip():
+            continue
+        registro = json.loads(texto)
+        pasta = Pasta(registro["caminho_completo"], ler_conteudo=False)
+        for dados in registro.get("arquivos", ()):
+            pasta.adicionar_arquivo(Arquivo.from_dict(dados))
+
+        pai = registro.get("pai")
+        if pai is None:
+            raiz = raiz or pasta
+            caminho_atual = [(registro["id"], pasta)]
+            continue
+
+        # Em pré-ordem a pai está no caminho atual; o que vem depois dela já terminou
+        while caminho_atual and caminho_atual[-1][0] != pai:
+            caminho_atual.pop()
+        if not caminho_atual:
+            raise ValueError(f"Pasta {registro['caminho_completo']} sem pai no cache.")
+
+        caminho_atual[-1][1].adicionar_subpasta(pasta)
+        caminho_atual.append((registro["id"], pasta))
+
+    return raiz
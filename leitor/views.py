@@ -1,193 +1,42 @@
 # leitor/leitor/views.py
-from datetime import datetime
 import os
 import json
-from collections import defaultdict
 import shutil
+import time
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.shortcuts import render
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.http import JsonResponse
-from .Pasta import Pasta
-from .ManipuladorPasta import ManipuladorPasta
-from datetime import datetime
-import os
-import json
-from collections import defaultdict
-import shutil
-from .NoPasta import NoPasta
-
-CACHE_PATH = os.path.join(settings.BASE_DIR, "Cache", "cache.json")
-
-def carregar_raiz_do_cache():
-    with open(CACHE_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    estrutura = data.get("estrutura")
-    raiz = Pasta.from_dict(estrutura)
-    return raiz, data
-
-def _marcar_arquivos_removidos(raiz_antiga, raiz_final):
-    from .Arquivo import Arquivo
-
-    def find_pasta(root_pasta, target_norm):
-        if os.path.normpath(root_pasta.caminho_completo).lower() == target_norm:
-            return root_pasta
-        atual = root_pasta.subpastas
-        while atual:
-            res = find_pasta(atual.pasta, target_norm)
-            if res:
-                return res
-            atual = atual.proximo
-        return None
-
-    presentes = set()
-    for caminho_pasta, arquivo in raiz_final.coletar_arquivos():
-        key = os.path.normpath(os.path.join(caminho_pasta, f"{arquivo.nome}.{arquivo.extensao}")).lower()
-        presentes.add(key)
-
-
-    for caminho_pasta, arquivo_antigo in raiz_antiga.coletar_arquivos():
-        key = os.path.normpath(os.path.join(caminho_pasta, f"{arquivo_antigo.nome}.{arquivo_antigo.extensao}")).lower()
-        if key in presentes:
-            continue
-
-        norm_pasta = os.path.normpath(caminho_pasta).lower()
-        pasta_dest = find_pasta(raiz_final, norm_pasta)
-        if pasta_dest is None:
-            
-            from .Pasta import Pasta
-            from .NoPasta import NoPasta
-            pasta_dest = Pasta(caminho_pasta, ler_conteudo=False)
-            pasta_dest.arquivos = []
-            novo_no = NoPasta(pasta_dest)
-            
-            if raiz_final.subpastas is None:
-                raiz_final.subpastas = novo_no
-            else:
-                tail = raiz_final.subpastas
-                while tail.proximo:
-                    tail = tail.proximo
-                tail.proximo = novo_no
-                
-        novo = Arquivo(arquivo_antigo.nome, arquivo_antigo.extensao, arquivo_antigo.tamanho, arquivo_antigo.caminho_completo)
-        novo.hash_md5 = arquivo_antigo.hash_md5
-        novo.removido = True
-        pasta_dest.arquivos.append(novo)
-
-def salvar_cache_atualizado(data_or_raiz, meta=None, extra_meta=None):
-    cache_dir = os.path.dirname(CACHE_PATH)
-    os.makedirs(cache_dir, exist_ok=True)
-
-    if isinstance(data_or_raiz, dict) and meta is None:
-        data_to_save = data_or_raiz
-
-    else:
-        raiz = data_or_raiz
-        base_meta = meta.copy() if meta else {}
-
-        if extra_meta:
-            base_meta.update(extra_meta)
-
-        data_to_save = base_meta
-        data_to_save["estrutura"] = raiz.to_dict()
-
-    with open(CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data_to_save, f, ensure_ascii=False, indent=2)
-
-
-def carregar_raiz_do_cache():
-    """
-    Tenta carregar a raiz a partir do cache.json.
-    Se o arquivo não existir ou estiver inválido, retorna (None, None).
-    """
-    if not os.path.exists(CACHE_PATH):
-        return None, None
-
-    try:
-        with open(CACHE_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        estrutura = data.get("estrutura")
-        if not estrutura:
-            return None, data
-
-        raiz = Pasta.from_dict(estrutura)
-        return raiz, data
-
-    except (json.JSONDecodeError, OSError, KeyError, TypeError):
-        return None, None
-
-CACHE_PATH = os.path.join(settings.BASE_DIR, "Cache", "cache.json")
-
-
-def home(request):
-    raiz, meta = carregar_raiz_do_cache()
-    if raiz is None:
-        contexto = {
-            "total_arquivos": 0,
-            "total_tamanho_gb": 0,
-            "extensoes_unicas": 0,
-            "top_extensoes": [],
-            "estensoes": [],
-            "outros_gb": 0,
-            "hash_disponivel": False,
-            "total_duplicados": None,
-            "espaco_duplicado_gb": None,
-            "espaco_ocupado_gb": 0,
-            "espaco_livre_gb": 0,
-            "sem_cache": True,
-            "bucket_maior_1gb_gb": 0,
-            "bucket_100mb_1gb_gb": 0,
-            "bucket_menor_100mb_gb": 0,
-            "ext_buckets": {},
-        }
-        return render(request, "home/home.html", contexto)
-
-    arquivos = raiz.coletar_arquivos()
-
-    total_arquivos = len(arquivos)
-    total_tamanho_bytes = sum(arq.tamanho for _, arq in arquivos)
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from .ManipuladorPasta import POR_PAGINA_MAX, ManipuladorPasta
+from .Metricas import cronometrar, metricas, registrar_busca_lenta
+from .Observador import observador
+from .Tarefas import FINAIS, fila_tarefas
+from .utils_cache import carregar_duplicados, carregar_resumo, carregar_snapshot, info_snapshot
+from .utils_operacoes import (
+    executar_busca, parametros_pagina, tarefa_atualizar_cache, tarefa_nova_varredura,
+    tarefa_hash_busca, tarefa_recalcular_duplicados,
+)
+
+def _contexto_home(agregados, root_path, hash_calculado):
+    ext_tamanhos = agregados["ext_tamanhos"]
+    ext_buckets_bytes = agregados["ext_buckets"]
+
+    total_arquivos = agregados["total_arquivos"]
+    total_tamanho_bytes = sum(ext_tamanhos.values())
     total_tamanho_gb = total_tamanho_bytes / (1024 ** 3) if total_tamanho_bytes else 0
 
-    bucket_maior_1gb_bytes = 0
-    bucket_100mb_1gb_bytes = 0
-    bucket_menor_100mb_bytes = 0
-
-    UM_GB = 1024 ** 3
-    CEM_MB = 100 * 1024 ** 2
-
-    ext_buckets_bytes = defaultdict(lambda: {
-        "gt_1gb": 0,
-        "between_100mb_1gb": 0,
-        "lt_100mb": 0,
-    })
-
-    ext_tamanhos = defaultdict(int)
-
-    for _, arq in arquivos:
-        size = arq.tamanho
-        ext = (arq.extensao or "").lower()
-
-        if size > UM_GB:
-            bucket_maior_1gb_bytes += size
-            ext_buckets_bytes[ext]["gt_1gb"] += size
-        elif size >= CEM_MB:
-            bucket_100mb_1gb_bytes += size
-            ext_buckets_bytes[ext]["between_100mb_1gb"] += size
-        else:
-            bucket_menor_100mb_bytes += size
-            ext_buckets_bytes[ext]["lt_100mb"] += size
-
-        ext_tamanhos[ext] += size
+    bucket_maior_1gb_bytes = sum(b["gt_1gb"] for b in ext_buckets_bytes.values())
+    bucket_100mb_1gb_bytes = sum(b["between_100mb_1gb"] for b in ext_buckets_bytes.values())
+    bucket_menor_100mb_bytes = sum(b["lt_100mb"] for b in ext_buckets_bytes.values())
 
     bucket_maior_1gb_gb   = bucket_maior_1gb_bytes   / (1024 ** 3) if bucket_maior_1gb_bytes else 0
     bucket_100mb_1gb_gb   = bucket_100mb_1gb_bytes   / (1024 ** 3) if bucket_100mb_1gb_bytes else 0
     bucket_menor_100mb_gb = bucket_menor_100mb_bytes / (1024 ** 3) if bucket_menor_100mb_bytes else 0
 
-    extensoes_set = { (arq.extensao or "").lower() for _, arq in arquivos }
-    extensoes_unicas = len(extensoes_set)
+    extensoes_unicas = len(ext_tamanhos)
 
     ordenadas = sorted(ext_tamanhos.items(), key=lambda x: x[1], reverse=True)
     top5 = ordenadas[:5]
@@ -211,7 +60,7 @@ def home(request):
             key: val / (1024 ** 3) for key, val in buckets.items()
         }
 
-    root_path = raiz.caminho_completo or ""
+    root_path = root_path or ""
     drive, _ = os.path.splitdrive(root_path)
     if drive:
         base_disk_path = drive + os.sep
@@ -229,25 +78,12 @@ def home(request):
     espaco_ocupado_gb = total_tamanho_gb
     espaco_livre_gb = max(total_disk_gb - espaco_ocupado_gb, 0)
 
-    grupos_por_tamanho_hash = defaultdict(list)
-
-    for _, arq in arquivos:
-        if not arq.hash_md5:
-            continue
-        key = (arq.tamanho, arq.hash_md5)
-        grupos_por_tamanho_hash[key].append(arq)
-
-    total_duplicados = 0
-    espaco_duplicado_bytes = 0
-
-    for (tamanho, _), lista in grupos_por_tamanho_hash.items():
-        if len(lista) < 2:
-            continue
-        qtd_dup = len(lista) - 1
-        total_duplicados += qtd_dup
-        espaco_duplicado_bytes += qtd_dup * tamanho
+    total_duplicados = agregados["total_duplicados"]
+    espaco_duplicado_bytes = agregados["espaco_duplicado"]
 
-    hash_disponivel = any(arq.hash_md5 for _, arq in arquivos)
+    # O pipeline de duplicados só calcula hash de candidatos, então um cache
+    # com hash calculado pode não ter nenhum hash se não houver duplicados
+    hash_disponivel = bool(hash_calculado) or agregados["hash_disponivel"]
 
     if not hash_disponivel or total_duplicados == 0:
         total_duplicados = 0
@@ -255,7 +91,7 @@ def home(request):
     else:
         espaco_duplicado_gb = espaco_duplicado_bytes / (1024 ** 3)
 
-    contexto = {
+    return {
         "total_arquivos": total_arquivos,
         "total_tamanho_gb": total_tamanho_gb,
         "extensoes_unicas": extensoes_unicas,
@@ -272,131 +108,119 @@ def home(request):
         "bucket_menor_100mb_gb": bucket_menor_100mb_gb,
         "ext_buckets": ext_buckets_gb, 
     }
-    return render(request, "home/home.html", contexto)
 
 
-def pesquisar(request):
-    return render(request,"abas/buscar_arquivos.html")
+def home(request):
+    # A home só lê o resumo gravado com a varredura, nunca a árvore
+    resumo = carregar_resumo()
 
-def duplicados(request):
-    raiz, meta = carregar_raiz_do_cache()
-    if raiz is None:
+    if resumo is None:
         contexto = {
-            "total_duplicados": 0,
-            "total_grupos": 0,
-            "espaco_duplicado_gb": 0,
-            "grupos": [],
+            "total_arquivos": 0,
+            "total_tamanho_gb": 0,
+            "extensoes_unicas": 0,
+            "top_extensoes": [],
+            "estensoes": [],
+            "outros_gb": 0,
             "hash_disponivel": False,
+            "total_duplicados": None,
+            "espaco_duplicado_gb": None,
+            "espaco_ocupado_gb": 0,
+            "espaco_livre_gb": 0,
             "sem_cache": True,
+            "bucket_maior_1gb_gb": 0,
+            "bucket_100mb_1gb_gb": 0,
+            "bucket_menor_100mb_gb": 0,
+            "ext_buckets": {},
         }
-        return render(request, "abas/duplicados.html", contexto)
-
-    arquivos = raiz.coletar_arquivos() 
+        return render(request, "home/home.html", contexto)
 
-    flag_cache = meta.get("hash_calculado")
-    any_hash = any(a.hash_md5 for _, a in arquivos)
-    hash_disponivel = bool(flag_cache) or any_hash
+    contexto = _contexto_home(resumo.agregados(), resumo.caminho_raiz, resumo.hash_calculado)
+    with cronometrar("template"):
+        return render(request, "home/home.html", contexto)
 
-    if request.method == "POST":
-        for _, arq in arquivos:
-            if arq.caminho_completo and os.path.exists(arq.caminho_completo):
-                arq._calcular_hash()
 
-        hash_disponivel = True
-        salvar_cache_atualizado(raiz, meta, extra_meta={"hash_calculado": True})
+def pesquisar(request):
+    return render(request,"abas/buscar_arquivos.html")
 
-    if not hash_disponivel:
-        contexto = {
-            "total_duplicados": 0,
-            "total_grupos": 0,
-            "espaco_duplicado_gb": 0,
-            "grupos": [],
-            "hash_disponivel": False,
-        }
-        return render(request, "abas/duplicados.html", contexto)
+def _contexto_duplicados_vazio(sem_cache=False):
+    contexto = {
+        "total_duplicados": 0,
+        "total_grupos": 0,
+        "espaco_duplicado_gb": 0,
+        "hash_disponivel": False,
+    }
+    if sem_cache:
+        contexto["sem_cache"] = True
+    return contexto
 
-    tamanho_dict = defaultdict(list)
-
-    for caminho_pasta, arquivo in arquivos:
-        if (
-            arquivo.caminho_completo
-            and os.path.exists(arquivo.caminho_completo)
-            and arquivo.hash_md5
-        ):
-            tamanho_dict[arquivo.tamanho].append((caminho_pasta, arquivo))
-
-    grupos = []
-    total_duplicados = 0
-    espaco_duplicado_bytes = 0
-    id_grupo = 1
-
-    for tamanho, lista in tamanho_dict.items():
-        if len(lista) < 2:
-            continue
-
-        hash_dict = defaultdict(list)
-
-        for caminho, arquivo in lista:
-            if not arquivo.hash_md5:
-                continue 
-            hash_dict[arquivo.hash_md5].append((caminho, arquivo))
-
-        for hash_value, grupo in hash_dict.items():
-            if len(grupo) < 2:
-                continue
-
-            num_arquivos = len(grupo)
-            total_duplicados += (num_arquivos - 1)
-            espaco_duplicado_bytes += (num_arquivos - 1) * tamanho
-
-            primeira_ext = (grupo[0][1].extensao or "").lower()
-
-            arquivos_grupo = []
-            for caminho, arquivo in grupo:
-                full_path = arquivo.caminho_completo or os.path.join(
-                    caminho, f"{arquivo.nome}.{arquivo.extensao}"
-                )
-
-                try:
-                    mtime = os.path.getmtime(full_path)
-                    data_mod = datetime.fromtimestamp(mtime).strftime("%d/%m/%Y %H:%M")
-                except OSError:
-                    data_mod = "-"
-
-                tamanho_bytes = getattr(arquivo, "tamanho", None) or 0
-
-                arquivos_grupo.append({
-                    "nome": f"{arquivo.nome}.{arquivo.extensao}",
-                    "caminho": full_path,
-                    "data_mod": data_mod,
-                    "origem": "Cache",
-                    "tamanho_bytes": tamanho_bytes,  
-                })
-
-            grupos.append({
-                "id": id_grupo,
-                "ext": primeira_ext,
-                "hash": hash_value,
-                "tamanho_gb": tamanho / (1024 ** 3),
-                "qtd_arquivos": num_arquivos,
-                "arquivos": arquivos_grupo,
-            })
-            id_grupo += 1
-
-    total_grupos = len(grupos)
-    espaco_duplicado_gb = (
-        espaco_duplicado_bytes / (1024 ** 3)
-        if espaco_duplicado_bytes else 0
-    )
 
+def duplicados(request):
+    if request.method == "POST":
+        # O recálculo lê o disco inteiro: roda como tarefa em segundo plano
+        tarefa = fila_tarefas().enfileirar("hash", tarefa_recalcular_duplicados)
+        return _tarefa_iniciada(request, tarefa, "Recálculo de duplicados", "duplicados")
+
+    resumo = carregar_resumo()
+    if resumo is None:
+        return render(request, "abas/duplicados.html", _contexto_duplicados_vazio(sem_cache=True))
+    if not (resumo.hash_calculado or resumo.arquivos_com_hash):
+        return render(request, "abas/duplicados.html", _contexto_duplicados_vazio())
+
+    # Só os totais: os grupos vêm paginados de /duplicados/grupos/
+    grupos = carregar_duplicados()
+    cabecalho = grupos.cabecalho if grupos is not None else {}
     contexto = {
-        "total_duplicados": total_duplicados,
-        "total_grupos": total_grupos,
-        "espaco_duplicado_gb": espaco_duplicado_gb,
-        "grupos": grupos,
+        "total_duplicados": cabecalho.get("total_duplicados", 0),
+        "total_grupos": cabecalho.get("total_grupos", 0),
+        "espaco_duplicado_gb": cabecalho.get("espaco_duplicado", 0) / (1024 ** 3),
         "hash_disponivel": True,
     }
-    return render(request, "abas/duplicados.html", contexto)
+    with cronometrar("template"):
+        return render(request, "abas/duplicados.html", contexto)
+
+
+def duplicados_grupos(request):
+    """
+    Grupos de duplicados em JSON, do maior espaço desperdiçado para o menor.
+    GET: pagina, por_pagina (até POR_PAGINA_MAX), ext e pasta (filtros) e
+    verificar=1 para conferir no disco os arquivos da página.
+    """
+    try:
+        pagina = max(int(request.GET.get("pagina", 1)), 1)
+        por_pagina = min(max(int(request.GET.get("por_pagina", 20)), 1), POR_PAGINA_MAX)
+    except ValueError:
+        return JsonResponse({"status": "erro", "mensagem": "pagina e por_pagina devem ser inteiros."}, status=400)
+
+    grupos = carregar_duplicados()
+    if grupos is None:
+        return JsonResponse({"status": "vazio", "quantidade": 0, "grupos": []})
+
+    return JsonResponse(grupos.pagina(
+        pagina, por_pagina,
+        ext=request.GET.get("ext", ""),
+        pasta=request.GET.get("pasta", ""),
+        verificar_disco=request.GET.get("verificar") in ("1", "true", "on"),
+    ))
+
+
+def _quer_json(request):
+    return "application/json" in request.headers.get("Accept", "")
+
+
+def _tarefa_iniciada(request, tarefa, descricao, destino):
+    """Resposta de quem enfileirou uma tarefa: JSON para o fetch da página, redirect para o form puro."""
+    if _quer_json(request):
+        return JsonResponse({"status": "ok", "tarefa": tarefa.to_dict()}, status=202)
+    messages.info(request, f"{descricao} iniciada em segundo plano (tarefa {tarefa.id}).")
+    return redirect(destino)
+
+
+def _pedido_invalido(request, mensagem, destino):
+    if _quer_json(request):
+        return JsonResponse({"status": "erro", "mensagem": mensagem}, status=400)
+    messages.error(request, mensagem)
+    return redirect(destino)
 
 
 def nova_varredura(request):
@@ -404,82 +228,15 @@ def nova_varredura(request):
         return redirect("home")
 
     scan_path = request.POST.get("scan_path")
-    calcular_hash = bool(request.POST.get("calcular_hash")) 
-
-    m = ManipuladorPasta(scan_path, interativo=False)
+    calcular_hash = bool(request.POST.get("calcular_hash"))
 
-    m.carregar_estrutura(forcar_recriacao=True, interativo=False)
+    if not scan_path or not os.path.isdir(scan_path):
+        return _pedido_invalido(request, f"O caminho '{scan_path}' não existe ou não é uma pasta.", "home")
 
-    if calcular_hash:
-        m.detectar_duplicatas()
-        m.salvar_cache(extra_meta={"hash_calculado": True})
-    else:
-        m.salvar_cache(extra_meta={"hash_calculado": False})
-
-    messages.success(
-        request,
-        "Varredura concluída. Hash calculado." if calcular_hash
-        else "Varredura concluída sem cálculo de hash."
+    tarefa = fila_tarefas().enfileirar(
+        "varredura", tarefa_nova_varredura, scan_path=scan_path, calcular_hash=calcular_hash,
     )
-    return redirect("home")
-
-def _replace_subtree(raiz, sub_arvore_nova):
-    def _merge_pastas(old_pasta, new_pasta):
-        novos_chaves = {(a.nome.lower(), (a.extensao or "").lower()) for a in new_pasta.arquivos}
-        for a in old_pasta.arquivos:
-            key = (a.nome.lower(), (a.extensao or "").lower())
-            if key not in novos_chaves:
-                a.removido = not (a.caminho_completo and os.path.exists(a.caminho_completo))
-                new_pasta.arquivos.append(a)
-
-        novos_sub = {}
-        atual_no = new_pasta.subpastas
-        while atual_no:
-            novos_sub[os.path.normpath(atual_no.pasta.caminho_completo).lower()] = atual_no.pasta
-            atual_no = atual_no.proximo
-
-        antigo_no = old_pasta.subpastas
-        while antigo_no:
-            old_sub = antigo_no.pasta
-            key = os.path.normpath(old_sub.caminho_completo).lower()
-            if key in novos_sub:
-                _merge_pastas(old_sub, novos_sub[key])
-            else:
-                novo_no = NoPasta(old_sub)
-                if new_pasta.subpastas is None:
-                    new_pasta.subpastas = novo_no
-                else:
-                    tail = new_pasta.subpastas
-                    while tail.proximo:
-                        tail = tail.proximo
-                    tail.proximo = novo_no
-            antigo_no = antigo_no.proximo
-
-    norm_raiz = os.path.normpath(raiz.caminho_completo).lower() if raiz.caminho_completo else ""
-    norm_sub = os.path.normpath(sub_arvore_nova.caminho_completo).lower() if sub_arvore_nova.caminho_completo else ""
-    if norm_raiz and norm_raiz == norm_sub:
-        _merge_pastas(raiz, sub_arvore_nova)
-        return True
-
-    if not raiz.caminho_completo or not sub_arvore_nova.caminho_completo.startswith(raiz.caminho_completo + os.sep):
-        return False
-
-    atual = raiz.subpastas
-    while atual:
-        pasta_atual = atual.pasta
-        
-        if os.path.normpath(pasta_atual.caminho_completo) == os.path.normpath(sub_arvore_nova.caminho_completo):
-            _merge_pastas(pasta_atual, sub_arvore_nova)
-            atual.pasta = sub_arvore_nova
-            return True
-
-        if sub_arvore_nova.caminho_completo.startswith(pasta_atual.caminho_completo + os.sep):
-            if _replace_subtree(pasta_atual, sub_arvore_nova):
-                return True
-        
-        atual = atual.proximo
-        
-    return False
+    return _tarefa_iniciada(request, tarefa, "Nova varredura", "home")
 
 
 def atualizar_cache(request):
@@ -489,116 +246,179 @@ def atualizar_cache(request):
     scan_path = request.POST.get("scan_path")
     calcular_hash = bool(request.POST.get("calcular_hash"))
 
-    if not os.path.isdir(scan_path):
-        messages.error(request, f"O caminho '{scan_path}' não existe ou não é uma pasta.")
-        return redirect("home")
+    if not scan_path or not os.path.isdir(scan_path):
+        return _pedido_invalido(request, f"O caminho '{scan_path}' não existe ou não é uma pasta.", "home")
 
-    raiz_antiga, meta_antigo = carregar_raiz_do_cache()
-    if raiz_antiga is None:
-        messages.error(request, "Nenhum cache encontrado para atualizar. Execute uma 'Nova varredura' primeiro.")
-        return redirect("home")
-
-    from .Pasta import Pasta
-    raiz_nova = Pasta(scan_path, ler_conteudo=True)
+    tarefa = fila_tarefas().enfileirar(
+        "atualizacao", tarefa_atualizar_cache, scan_path=scan_path, calcular_hash=calcular_hash,
+    )
+    return _tarefa_iniciada(request, tarefa, "Atualização do cache", "home")
 
-    if not raiz_nova or (not raiz_nova.arquivos and not raiz_nova.subpastas):
-        messages.info(request, f"Nenhum arquivo ou pasta encontrado em '{scan_path}'. O cache não foi alterado.")
-        return redirect("home")
 
-    old_roots = []
-    if raiz_antiga.caminho_completo != "": 
-        old_roots.append(raiz_antiga)
-    else: 
-        atual = raiz_antiga.subpastas
-        while atual:
-            old_roots.append(atual.pasta)
-            atual = atual.proximo
-
-    final_roots = []
-    raiz_nova_mesclada = False
-    norm_nova_path = os.path.normpath(raiz_nova.caminho_completo).lower()
-
-    for old_root in old_roots:
-        norm_old_path = os.path.normpath(old_root.caminho_completo).lower()
-        if norm_old_path == norm_nova_path:
-            try:
-                _replace_subtree(old_root, raiz_nova)
-            except Exception:
-                pass
-            raiz_nova_mesclada = True
-            final_roots.append(raiz_nova)
-
-        elif not norm_old_path.startswith(norm_nova_path + os.sep) and norm_old_path != norm_nova_path:
-            final_roots.append(old_root)
-
-    for root in final_roots:
-        norm_root_path = os.path.normpath(root.caminho_completo).lower()
-        if norm_nova_path.startswith(norm_root_path + os.sep):
-            _replace_subtree(root, raiz_nova)
-            raiz_nova_mesclada = True
-            break
-    
-    if not raiz_nova_mesclada:
-        final_roots.append(raiz_nova)
-
-    raiz_final = Pasta(caminho="", ler_conteudo=False)
-    if final_roots:
-        head = NoPasta(final_roots[0])
-        atual = head
-        for i in range(1, len(final_roots)):
-            novo_no = NoPasta(final_roots[i])
-            atual.proximo = novo_no
-            atual = novo_no
-        raiz_final.subpastas = head
-
-    if calcular_hash:
-        todos_arquivos = raiz_final.coletar_arquivos()
-        for _, arq in todos_arquivos:
-            if arq.hash_md5 is None and arq.caminho_completo and os.path.exists(arq.caminho_completo):
-                arq._calcular_hash()
-        meta_antigo["hash_calculado"] = True
-
-    _marcar_arquivos_removidos(raiz_antiga, raiz_final)
-
-    def _append_old_entries(old_root, raiz_final):
-        norm_old = os.path.normpath(old_root.caminho_completo).lower()
-        atual = raiz_final.subpastas
-        while atual:
-            if os.path.normpath(atual.pasta.caminho_completo).lower() == norm_old:
-                return True 
-            atual = atual.proximo
-        novo_no = NoPasta(old_root)
-        if raiz_final.subpastas is None:
-            raiz_final.subpastas = novo_no
+def buscar_arquivos(request):
+    filtros = json.loads(request.body)
+    try:
+        paginacao = parametros_pagina(filtros)
+    except ValueError as e:
+        return JsonResponse({"status": "erro", "mensagem": str(e)}, status=400)
+    paginacao["agregados"] = bool(filtros.get("agregados"))
+    paginacao["verificar_disco"] = bool(filtros.get("verificar_disco"))
+
+    inicio = time.perf_counter()
+    with cronometrar("busca"):
+        resultado = executar_busca(filtros, paginacao)
+    segundos = time.perf_counter() - inicio
+    if segundos > getattr(settings, "LEITOR_BUSCA_LENTA_SEGUNDOS", 1.0):
+        registrar_busca_lenta(segundos, filtros, resultado)
+
+    # O filtro por hash não calcula MD5 dentro da requisição: com "Conferir no
+    # disco", os candidatos sem hash desta busca (e só eles) vão para uma
+    # tarefa, até LEITOR_BUSCA_HASH_MAX_ARQUIVOS; acima disso, nada é enfileirado
+    sem_hash = resultado.get("sem_hash", 0)
+    if sem_hash and paginacao["verificar_disco"]:
+        if sem_hash <= getattr(settings, "LEITOR_BUSCA_HASH_MAX_ARQUIVOS", 1000):
+            resultado["tarefa_hash"] = _tarefa_hash_busca(filtros)
         else:
-            tail = raiz_final.subpastas
-            while tail.proximo:
-                tail = tail.proximo
-            tail.proximo = novo_no
-        return True
+            resultado["hash_excedido"] = True
 
+    return JsonResponse(resultado, safe=False)
 
-    meta_antigo["data"] = datetime.now().strftime('%d_%m_%Y,%H:%M')
-    meta_antigo["paths_varridos"] = [p.caminho_completo for p in final_roots]
-    data_to_save = meta_antigo.copy()
-    data_to_save["estrutura"] = raiz_final.to_dict()
-    salvar_cache_atualizado(data_to_save)
 
-    messages.success(request, f"Cache hierarquicamente atualizado com os dados de '{scan_path}'.")
-    return redirect("home")
+def _tarefa_hash_busca(filtros):
+    """Id da tarefa que calcula o hash dos candidatos da busca (uma igual já na fila ou uma nova)."""
+    filtros = {campo: filtros.get(campo) or "" for campo in ("nome", "extensao", "tamanho_min", "tamanho_max")}
+    fila = fila_tarefas()
+    for dados in fila.listar():
+        if dados["tipo"] == "hash" and dados["estado"] not in FINAIS and dados["parametros"].get("filtros") == filtros:
+            return dados["id"]
+    return fila.enfileirar("hash", tarefa_hash_busca, filtros=filtros).id
 
-def buscar_arquivos(request):
-    filtros = json.loads(request.body)
 
-    mp = ManipuladorPasta(filtros.get("caminho") or ".")
+def maiores_pastas(request):
+    raiz, _ = carregar_snapshot()
+    if raiz is None:
+        return JsonResponse({"status": "vazio", "quantidade": 0, "resultados": []})
 
-    resultado = mp.buscar_avancado(
-        nome=filtros.get("nome", ""),
-        extensao=filtros.get("extensao", ""),
-        tamanho_min=filtros.get("tamanho_min", ""),
-        tamanho_max=filtros.get("tamanho_max", ""),
-        hash_md5=filtros.get("hash", ""),
-        somente_cache=filtros.get("somente_cache", False)
-    )
+    try:
+        profundidade = max(int(request.GET.get("profundidade", 1)), 0)
+        limite = min(max(int(request.GET.get("limite", 20)), 1), 500)
+    except ValueError:
+        return JsonResponse({"status": "erro", "mensagem": "profundidade e limite devem ser inteiros."}, status=400)
 
-    return JsonResponse(resultado, safe=False)
\ No newline at end of file
+    mp = ManipuladorPasta(raiz.caminho_completo, raiz=raiz)
+    return JsonResponse(mp.maiores_pastas(profundidade, limite))
+
+
+# ==========================================
+# Tarefas em segundo plano
+# ==========================================
+
+def tarefas(request):
+    return JsonResponse({"status": "ok", "tarefas": fila_tarefas().listar()})
+
+
+def tarefa(request, id_tarefa):
+    dados = fila_tarefas().obter(id_tarefa)
+    if dados is None:
+        return JsonResponse({"status": "erro", "mensagem": "Tarefa não encontrada."}, status=404)
+    return JsonResponse({"status": "ok", "tarefa": dados})
+
+
+# Sem novidade nesse intervalo, manda um comentário para a conexão não cair por ociosidade
+INTERVALO_KEEPALIVE_SSE = 15
+
+
+def _evento_sse(nome, dados, id_evento=None):
+    linhas = f"event: {nome}\n"
+    if id_evento is not None:
+        linhas += f"id: {id_evento}\n"
+    return f"{linhas}data: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def _eventos_do_estado(dados, versao, enviado):
+    """Pedaços do stream para o estado `dados` da tarefa e se ele termina aí."""
+    if dados == enviado:  # acordou por outra tarefa ou pelo timeout
+        return [": keepalive\n\n"], False
+    eventos = [_evento_sse("progresso", dados, versao)]
+    if dados["estado"] in FINAIS:
+        eventos.append(_evento_sse("fim", dados, versao))
+        return eventos, True
+    return eventos, False
+
+
+def eventos_tarefa(request, id_tarefa):
+    """
+    Server-Sent Events com o progresso da tarefa: um evento "progresso" a
+    cada publicação (no máximo a cada Progresso.intervalo) ou mudança de
+    estado e um "fim" quando ela termina, depois do qual o stream fecha.
+
+    No ASGI o stream é um gerador assíncrono: com um gerador comum o Django
+    junta o iterador inteiro (sync_to_async(list)) antes de mandar o
+    primeiro byte, e os eventos só chegariam com a tarefa terminada.
+    """
+    fila = fila_tarefas()
+    if fila.obter(id_tarefa) is None:
+        return JsonResponse({"status": "erro", "mensagem": "Tarefa não encontrada."}, status=404)
+
+    def eventos():
+        yield "retry: 3000\n\n"
+        versao, enviado = None, None
+        while True:
+            dados, versao = fila.aguardar(id_tarefa, versao, INTERVALO_KEEPALIVE_SSE)
+            if dados is None:  # saiu do histórico
+                return
+            pedacos, fim = _eventos_do_estado(dados, versao, enviado)
+            enviado = dados
+            yield from pedacos
+            if fim:
+                return
+
+    async def eventos_async():
+        # Fora das threads do Django: cada stream aberto espera num worker próprio
+        aguardar = sync_to_async(fila.aguardar, thread_sensitive=False)
+        yield "retry: 3000\n\n"
+        versao, enviado = None, None
+        while True:
+            dados, versao = await aguardar(id_tarefa, versao, INTERVALO_KEEPALIVE_SSE)
+            if dados is None:
+                return
+            pedacos, fim = _eventos_do_estado(dados, versao, enviado)
+            enviado = dados
+            for pedaco in pedacos:
+                yield pedaco
+            if fim:
+                return
+
+    stream = eventos_async() if isinstance(request, ASGIRequest) else eventos()
+    resposta = StreamingHttpResponse(stream, content_type="text/event-stream")
+    resposta["Cache-Control"] = "no-cache"
+    resposta["X-Accel-Buffering"] = "no"  # proxies (nginx) não seguram os eventos
+    return resposta
+
+
+@require_POST
+def cancelar_tarefa(request, id_tarefa):
+    dados = fila_tarefas().cancelar(id_tarefa)
+    if dados is None:
+        return JsonResponse({"status": "erro", "mensagem": "Tarefa não encontrada."}, status=404)
+    return JsonResponse({"status": "ok", "tarefa": dados})
+
+
+def estado_observador(request):
+    """Estado do Observador (modo, pastas acompanhadas, eventos e lotes)."""
+    obs = observador()
+    if obs is None:
+        return JsonResponse({"status": "desligado", "observador": None})
+    return JsonResponse({"status": "ok", "observador": obs.estado()})
+
+
+def metricas_prometheus(request):
+    """Métricas do processo no formato texto do Prometheus."""
+    snapshot = info_snapshot()
+    obs = observador()
+    medidores = {
+        ("leitor_snapshot_geracao", ()): snapshot["geracao"],
+        ("leitor_snapshot_carregado", ()): int(snapshot["carregado"]),
+        ("leitor_observador_ativo", ()): int(obs is not None and obs.ativo),
+    }
+    return HttpResponse(metricas().texto(medidores), content_type="text/plain; version=0.0.4; charset=utf-8")
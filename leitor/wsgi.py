@@ -14,3 +14,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'leitor.settings')
 
 application = get_wsgi_application()
+
+from leitor.utils_cache import aquecer_snapshot  # noqa: E402
+from leitor.Observador import iniciar_observador  # noqa: E402
+from leitor.Tarefas import fila_tarefas  # noqa: E402
+
+# Só um processo tem a fila de tarefas: um segundo worker não sobe
+fila_tarefas()
+# Monta a árvore do cache em segundo plano para a primeira página não esperar
+aquecer_snapshot()
+iniciar_observador()
@@ -312,4 +312,101 @@
             }
         };
     };
+
+    // -------------------------------------
+    // Paginação feita no servidor: os controles só pedem a página;
+    // quem chama busca os itens e informa o total com update()
+    // -------------------------------------
+    window.initServerPagination = function initServerPagination(options) {
+        const {
+            controls,             // '#dup-pagination'
+            perPage = 10,
+            perPageOptions = [10, 20, 50],
+            itemLabel = "Itens",
+            onPageChange,         // function(page, pageSize)
+        } = options || {};
+
+        const controlsEl = resolveElement(controls);
+        if (!controlsEl || typeof onPageChange !== "function") {
+            console.warn("initServerPagination: controls / onPageChange inválidos");
+            return null;
+        }
+
+        let currentPage = 1;
+        let pageSize    = perPage;
+        let totalPages  = 1;
+
+        const optionsHtml = (perPageOptions && perPageOptions.length ? perPageOptions : [perPage])
+            .map(val => `<option value="${val}" ${val === perPage ? "selected" : ""}>${val} ${itemLabel}</option>`)
+            .join("");
+
+        controlsEl.innerHTML = `
+            <div class="card-filter-controls">
+                <div class="card-filter-perpage">
+                    <select class="input" data-fancy="js fancy-select" data-fancy-label="Itens"
+                            data-fancy-up="true" data-role="per-page-select">
+                        ${optionsHtml}
+                    </select>
+                </div>
+
+                <div class="card-pagination">
+                    <button type="button" class="btn btn-sm card-page-btn card-page-btn-arrow" data-role="prev">&#x2039;</button>
+                    <div class="card-page-numbers" data-role="pages"></div>
+                    <button type="button" class="btn btn-sm card-page-btn card-page-btn-arrow" data-role="next">&#x203A;</button>
+                </div>
+            </div>
+        `;
+
+        const perPageSelect  = controlsEl.querySelector('[data-role="per-page-select"]');
+        const btnPrev        = controlsEl.querySelector('[data-role="prev"]');
+        const btnNext        = controlsEl.querySelector('[data-role="next"]');
+        const pagesContainer = controlsEl.querySelector('[data-role="pages"]');
+
+        if (typeof window.initFancySelects === "function") {
+            window.initFancySelects(controlsEl);
+        }
+
+        function goTo(page) {
+            if (page < 1 || page > totalPages || page === currentPage) return;
+            onPageChange(page, pageSize);
+        }
+
+        function renderPager() {
+            pagesContainer.innerHTML = "";
+            btnPrev.disabled = currentPage <= 1;
+            btnNext.disabled = currentPage >= totalPages;
+            if (totalPages <= 1) return;
+
+            buildPageRange(totalPages, currentPage, 6).forEach(page => {
+                const btn = document.createElement("button");
+                btn.type = "button";
+                btn.className = "btn btn-sm card-page-btn";
+                btn.textContent = page;
+                if (page === currentPage) btn.classList.add("is-active");
+                btn.addEventListener("click", () => goTo(page));
+                pagesContainer.appendChild(btn);
+            });
+        }
+
+        perPageSelect.addEventListener("change", function () {
+            const value = parseInt(this.value, 10);
+            if (!value || value <= 0) return;
+            pageSize = value;
+            onPageChange(1, pageSize);
+        });
+        btnPrev.addEventListener("click", () => goTo(currentPage - 1));
+        btnNext.addEventListener("click", () => goTo(currentPage + 1));
+
+        renderPager();
+
+        // API pública
+        return {
+            get pageSize() { return pageSize; },
+            update({ page, pages }) {
+                currentPage = page || 1;
+                totalPages  = Math.max(1, pages || 1);
+                renderPager();
+            },
+        };
+    };
 })();